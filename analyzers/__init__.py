@@ -2,13 +2,19 @@
 代码质量分析指标计算器
 """
 
+from .engine import analyze_source
 from .loc import calculate_loc
 from .comment import analyze_comments, calculate_comment_rate
+from .registry import ParseContext, register_analyzer, run_analyzers
 
 __all__ = [
+    'analyze_source',
     'calculate_loc',
     'analyze_comments', 
-    'calculate_comment_rate'
+    'calculate_comment_rate',
+    'ParseContext',
+    'register_analyzer',
+    'run_analyzers'
 ]
 
 __version__ = '0.1.0'
\ No newline at end of file
@@ -1,3 +1,7 @@
+from .engine import analyze_source
+from .registry import register_analyzer
+
+
 def analyze_comments(code):
     """
     深度分析代码注释
@@ -8,61 +12,7 @@ def analyze_comments(code):
     返回:
         dict: 包含注释统计信息
     """
-    if not code or code.strip() == "":
-        return {
-            'total_comments': 0,
-            'single_line_comments': 0,
-            'inline_comments': 0,
-            'todo_count': 0,
-            'fixme_count': 0,
-            'comment_density': 0.0
-        }
-    
-    lines = code.split('\n')
-    total_chars = len(code.replace('\n', ''))
-    comment_chars = 0
-    
-    total_comments = 0
-    single_line_comments = 0
-    inline_comments = 0
-    todo_count = 0
-    fixme_count = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        # 纯注释行
-        if stripped.startswith("#"):
-            total_comments += 1
-            single_line_comments += 1
-            comment_chars += len(stripped)
-            
-            # 检查TODO/FIXME
-            upper_line = stripped.upper()
-            if "TODO" in upper_line:
-                todo_count += 1
-            if "FIXME" in upper_line:
-                fixme_count += 1
-                
-        # 行内注释（有代码也有#注释）
-        elif "#" in line:
-            total_comments += 1
-            inline_comments += 1
-            # 只统计#后面的字符数
-            comment_part = line.split("#", 1)[1]
-            comment_chars += len(comment_part.strip())
-    
-    # 计算注释密度
-    comment_density = comment_chars / total_chars if total_chars > 0 else 0.0
-    
-    return {
-        'total_comments': total_comments,
-        'single_line_comments': single_line_comments,
-        'inline_comments': inline_comments,
-        'todo_count': todo_count,
-        'fixme_count': fixme_count,
-        'comment_density': round(comment_density, 4)
-    }
+    return analyze_source(code, ('comments',))['comments']
 
 
 def calculate_comment_rate(code):
@@ -75,9 +25,13 @@ def calculate_comment_rate(code):
     返回:
         float: 注释率（0-1）
     """
-    from .loc import calculate_loc  # 导入自己的loc模块
-    
-    loc_info = calculate_loc(code)
+    return analyze_source(code, ('comment_rate',))['comment_rate']
+
+
+@register_analyzer('comment_rate', requires=('lines',))
+def _comment_rate_analyzer(ctx):
+    """复用同一文件上已计算的 LOC 结果，不再单独统计一遍"""
+    loc_info = ctx.result('loc')
     total = loc_info['total_lines']
     comments = loc_info['comment_lines']
     
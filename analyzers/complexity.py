@@ -3,77 +3,29 @@
 比字符串匹配更准确
 """
 
-import ast
+from .engine import analyze_source
+
 
 def calculate_complexity(code):
     """
     计算代码的圈复杂度（AST专业版）
     """
-    if not code or code.strip() == "":
-        return {
-            'cyclomatic_complexity': 1,
-            'decision_points': 0,
-            'if_count': 0,
-            'for_count': 0,
-            'while_count': 0,
-            'try_count': 0,
-            'except_count': 0,
-            'error': None
-        }
-    
-    try:
-        # 用ast解析代码
-        tree = ast.parse(code)
-        
-        # 初始化计数器
-        complexity = 1
-        if_count = 0
-        for_count = 0
-        while_count = 0
-        try_count = 0
-        except_count = 0
-        
-        # 遍历所有AST节点
-        for node in ast.walk(tree):
-            if isinstance(node, ast.If):
-                if_count += 1
-                complexity += 1
-            elif isinstance(node, ast.For) or isinstance(node, ast.AsyncFor):
-                for_count += 1
-                complexity += 1
-            elif isinstance(node, ast.While):
-                while_count += 1
-                complexity += 1
-            elif isinstance(node, ast.Try):
-                try_count += 1
-                complexity += 1
-                except_count += len(node.handlers)
-                complexity += len(node.handlers)
-        
-        decision_points = if_count + for_count + while_count + try_count + except_count
-        
-        return {
-            'cyclomatic_complexity': complexity,
-            'decision_points': decision_points,
-            'if_count': if_count,
-            'for_count': for_count,
-            'while_count': while_count,
-            'try_count': try_count,
-            'except_count': except_count,
-            'error': None
-        }
-        
-    except SyntaxError as e:
-        return {
-            'cyclomatic_complexity': 1,
-            'decision_points': 0,
-            'if_count': 0,
-            'for_count': 0,
-            'while_count': 0,
-            'try_count': 0,
-            'except_count': 0,
-            'error': f'语法错误：第{e.lineno}行 {e.msg}'
-        }
+    return analyze_source(code, ('complexity',))['complexity']
+
+
+def calculate_complexity_detail(code):
+    """
+    计算完整圈复杂度（含布尔运算、推导式、条件表达式、match case）
+    以及每个函数、类的复杂度记录 ScopeComplexity(kind, name, lineno, end_lineno, complexity)
+    """
+    return analyze_source(code, ('complexity_detail',))['complexity_detail']
+
+
+def complexity_hotspots(code, limit=10):
+    """复杂度最高的函数 / 类（按复杂度降序，同分按行号）"""
+    scopes = [scope for scope in calculate_complexity_detail(code)['scopes'] if scope.kind != 'module']
+    scopes.sort(key=lambda scope: (-scope.complexity, scope.lineno))
+    return scopes[:limit]
 
 # 测试
 if __name__ == "__main__":
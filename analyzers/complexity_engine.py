@@ -0,0 +1,207 @@
+"""
+按节点类型分派的圈复杂度遍历器
+只沿语句体下降（控制流只可能出现在语句中）；需要统计布尔运算、推导式、条件表达式时才进入表达式，
+且跳过 Name / Constant 等叶子节点。同一次遍历同时给出整个文件和每个函数、类的复杂度。
+"""
+
+import ast
+from collections import namedtuple
+
+# 函数 / 类 / 模块的复杂度记录：kind 为 'module' / 'class' / 'function'，name 为带外层作用域的限定名
+ScopeComplexity = namedtuple('ScopeComplexity', ['kind', 'name', 'lineno', 'end_lineno', 'complexity'])
+
+# 旧版 calculate_complexity 统计的判定节点
+LEGACY_COUNTERS = ('if_count', 'for_count', 'while_count', 'try_count', 'except_count')
+
+# 只在表达式中出现的判定点
+EXPRESSION_COUNTERS = ('bool_op_count', 'comprehension_count', 'conditional_expr_count')
+
+COUNTERS = LEGACY_COUNTERS + ('match_case_count',) + EXPRESSION_COUNTERS
+
+# 不可能包含判定点的表达式节点
+_LEAVES = frozenset([ast.Name, ast.Constant, ast.Load, ast.Store, ast.Del])
+
+
+class ComplexityVisitor:
+    """
+    一次遍历统计判定点
+    expressions=False 时只遍历语句（足以得到旧版的 if/for/while/try/except 计数，速度最快）；
+    为 True 时额外统计布尔运算、推导式、条件表达式，并给出每个作用域的复杂度
+    作用域复杂度 = 1 + if/elif + for + while + except + match case + 布尔运算 + 推导式 + 条件表达式
+    （try 本身不计，嵌套函数 / 类单独记录，不计入外层）
+    """
+
+    def __init__(self, expressions=True):
+        self.expressions = expressions
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.scopes = []
+        self._scope_stack = []  # [限定名, 当前作用域复杂度, scopes 中的下标]
+
+    def run(self, tree):
+        end_lineno = max((getattr(node, 'end_lineno', 0) or 0 for node in tree.body), default=0)
+        self._enter('module', '<module>', 1, end_lineno)
+        self._visit_body(tree.body)
+        self._leave()
+        return self
+
+    def _enter(self, kind, name, lineno, end_lineno):
+        if self._scope_stack and name != '<module>':
+            parent = self._scope_stack[-1][0]
+            qualname = name if parent == '<module>' else f'{parent}.{name}'
+        else:
+            qualname = name
+        index = len(self.scopes)
+        self.scopes.append(ScopeComplexity(kind, qualname, lineno, end_lineno, 1))
+        self._scope_stack.append([qualname, 1, index])
+
+    def _leave(self):
+        qualname, complexity, index = self._scope_stack.pop()
+        self.scopes[index] = self.scopes[index]._replace(complexity=complexity)
+
+    def _add(self, counter, amount=1):
+        self.counts[counter] += amount
+        if counter != 'try_count':
+            self._scope_stack[-1][1] += amount
+
+    # ---- 语句 ----
+
+    def _visit_body(self, statements):
+        dispatch = self._STATEMENTS
+        for node in statements:
+            handler = dispatch.get(type(node))
+            if handler is None:
+                self._visit_other(node)
+            else:
+                handler(self, node)
+
+    def _visit_other(self, node):
+        """其他语句：With / 赋值 / 表达式语句等，只可能在表达式或嵌套语句体中含判定点"""
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.stmt):
+                self._visit_body((child,))
+            elif self.expressions:
+                self._visit_expr(child)
+
+    def _visit_if(self, node):
+        self._add('if_count')
+        self._visit_expr(node.test)
+        self._visit_body(node.body)
+        self._visit_body(node.orelse)
+
+    def _visit_for(self, node):
+        self._add('for_count')
+        self._visit_expr(node.iter)
+        self._visit_body(node.body)
+        self._visit_body(node.orelse)
+
+    def _visit_while(self, node):
+        self._add('while_count')
+        self._visit_expr(node.test)
+        self._visit_body(node.body)
+        self._visit_body(node.orelse)
+
+    def _visit_try(self, node):
+        self._add('try_count')
+        self._visit_handlers(node, 'except_count')
+
+    def _visit_try_star(self, node):
+        # except* 与 except 一样是分支，但旧版不统计 try*，只计入作用域复杂度
+        self._visit_handlers(node, None)
+
+    def _visit_handlers(self, node, counter):
+        self._visit_body(node.body)
+        for handler in node.handlers:
+            if counter is not None:
+                self._add(counter)
+            else:
+                self._scope_stack[-1][1] += 1
+            if handler.type is not None:
+                self._visit_expr(handler.type)
+            self._visit_body(handler.body)
+        self._visit_body(node.orelse)
+        self._visit_body(node.finalbody)
+
+    def _visit_match(self, node):
+        self._visit_expr(node.subject)
+        for case in node.cases:
+            pattern = case.pattern
+            # case _: 是兜底分支，不增加判定点
+            if not (type(pattern) is ast.MatchAs and pattern.pattern is None and pattern.name is None):
+                self._add('match_case_count')
+            if case.guard is not None:
+                self._visit_expr(case.guard)
+            self._visit_body(case.body)
+
+    def _visit_function(self, node):
+        self._visit_exprs(node.decorator_list)
+        if self.expressions:
+            self._visit_expr(node.args)
+        self._enter('function', node.name, node.lineno, node.end_lineno)
+        self._visit_body(node.body)
+        self._leave()
+
+    def _visit_class(self, node):
+        self._visit_exprs(node.decorator_list)
+        self._visit_exprs(node.bases)
+        self._enter('class', node.name, node.lineno, node.end_lineno)
+        self._visit_body(node.body)
+        self._leave()
+
+    # ---- 表达式 ----
+
+    def _visit_exprs(self, nodes):
+        for node in nodes:
+            self._visit_expr(node)
+
+    def _visit_expr(self, node):
+        if not self.expressions:
+            return
+        stack = [node]
+        leaves = _LEAVES
+        while stack:
+            node = stack.pop()
+            cls = type(node)
+            if cls in leaves:
+                continue
+            counter = self._EXPRESSIONS.get(cls)
+            if counter is not None:
+                counter(self, node)
+            stack.extend(ast.iter_child_nodes(node))
+
+    def _count_bool_op(self, node):
+        self._add('bool_op_count', len(node.values) - 1)
+
+    def _count_comprehension(self, node):
+        self._add('comprehension_count', sum(1 + len(generator.ifs) for generator in node.generators))
+
+    def _count_if_exp(self, node):
+        self._add('conditional_expr_count')
+
+    _STATEMENTS = {
+        ast.If: _visit_if,
+        ast.For: _visit_for,
+        ast.AsyncFor: _visit_for,
+        ast.While: _visit_while,
+        ast.Try: _visit_try,
+        ast.FunctionDef: _visit_function,
+        ast.AsyncFunctionDef: _visit_function,
+        ast.ClassDef: _visit_class,
+    }
+    if hasattr(ast, 'Match'):  # Python 3.10+
+        _STATEMENTS[ast.Match] = _visit_match
+    if hasattr(ast, 'TryStar'):  # Python 3.11+
+        _STATEMENTS[ast.TryStar] = _visit_try_star
+
+    _EXPRESSIONS = {
+        ast.BoolOp: _count_bool_op,
+        ast.IfExp: _count_if_exp,
+        ast.ListComp: _count_comprehension,
+        ast.SetComp: _count_comprehension,
+        ast.DictComp: _count_comprehension,
+        ast.GeneratorExp: _count_comprehension,
+    }
+
+
+def visit_complexity(tree, expressions=True):
+    """遍历一次 AST，返回 ComplexityVisitor（counts 为整个文件的计数，scopes 为各作用域记录）"""
+    return ComplexityVisitor(expressions).run(tree)
@@ -0,0 +1,352 @@
+"""
+单次遍历的指标计算引擎
+每个文件只切分一次行、只解析一次AST，同时得到 LOC、注释、复杂度和依赖指标
+内置指标作为分析器注册到 registry，共享同一个 ParseContext；
+loc / comment / complexity / dependency 模块中的函数都是它的薄封装
+"""
+
+from .complexity_engine import LEGACY_COUNTERS, visit_complexity
+from .loc_bytes import count_loc_bytes
+from .registry import register_analyzer, run_analyzers
+
+# 引擎可计算的指标分组
+ALL_SECTIONS = ('loc', 'comments', 'complexity', 'dependency')
+
+# 由同一次逐行扫描得到的指标分组
+LINE_SECTIONS = ('loc', 'comments', 'dependency')
+
+# 常见Python标准库
+STANDARD_LIBS = frozenset([
+    'os', 'sys', 'json', 'math', 'datetime', 're', 'collections',
+    'itertools', 'functools', 'random', 'typing', 'pathlib', 'logging'
+])
+
+
+def analyze_source(code, sections=ALL_SECTIONS):
+    """
+    一次性计算代码的各项指标
+
+    参数:
+        code: Python代码字符串或原始字节（字节按 utf-8 忽略错误解码）
+        sections: 需要计算的指标分组（ALL_SECTIONS 的子集，也可以是其他已注册的分析器）
+
+    返回:
+        dict: 分组名 -> 该分组的指标字典（与各分析函数的返回值完全一致）
+    """
+    return run_analyzers(code, sections)
+
+
+def _is_blank(ctx):
+    return ctx.memo('is_blank', ctx.text.isspace)
+
+
+def _line_section(ctx, section):
+    """
+    逐行扫描一次，同时得到本次请求的所有逐行指标分组
+    全空白代码：只有 LOC 需要逐行统计，其余指标直接返回空结果
+    """
+    text = ctx.text
+    if not text:
+        return _EMPTY[section]()
+    if _is_blank(ctx):
+        if section != 'loc':
+            return _EMPTY[section]()
+        wanted = ('loc',)
+    else:
+        wanted = tuple(name for name in LINE_SECTIONS if name == section or name in ctx.requested)
+    scan = ctx.memo(('line_scan', wanted), lambda: _scan_lines(
+        ctx.lines, len(text), 'loc' in wanted, 'comments' in wanted, 'dependency' in wanted
+    ))
+    return scan[section]
+
+
+@register_analyzer('loc', requires=('lines',))
+def _loc_analyzer(ctx):
+    # 原始字节且不需要逐行扫描其他指标时，直接在字节上计数，不切分出逐行字符串
+    if ctx.source_is_bytes and 'lines' not in ctx.built and not ctx.requested & {'comments', 'dependency'}:
+        return count_loc_bytes(ctx.raw)
+    return _line_section(ctx, 'loc')
+
+
+@register_analyzer('comments', requires=('lines',))
+def _comments_analyzer(ctx):
+    return _line_section(ctx, 'comments')
+
+
+def _syntax_error(ctx):
+    e = ctx.errors['ast']
+    return f'语法错误：第{e.lineno}行 {e.msg}'
+
+
+def _full_visit(ctx):
+    return ctx.memo('complexity_visit', lambda: visit_complexity(ctx.tree))
+
+
+@register_analyzer('complexity', requires=('ast',))
+def _complexity_analyzer(ctx):
+    if not ctx.text or _is_blank(ctx):
+        return _empty_complexity()
+    tree = ctx.tree
+    if tree is None:
+        result = _empty_complexity()
+        result['error'] = _syntax_error(ctx)
+        return result
+    # 同时请求了 complexity_detail 时共用它的完整遍历
+    visitor = _full_visit(ctx) if 'complexity_detail' in ctx.requested else None
+    return _complexity_from_tree(tree, visitor)
+
+
+@register_analyzer('complexity_detail', requires=('ast',))
+def _complexity_detail_analyzer(ctx):
+    """
+    完整圈复杂度（额外计入布尔运算、推导式、条件表达式、match case，try 本身不计）
+    以及每个模块 / 类 / 函数的复杂度记录（ScopeComplexity），同一次遍历得到
+    """
+    if not ctx.text or _is_blank(ctx):
+        return _empty_complexity_detail()
+    if ctx.tree is None:
+        result = _empty_complexity_detail()
+        result['error'] = _syntax_error(ctx)
+        return result
+    visitor = _full_visit(ctx)
+    counts = visitor.counts
+    return {
+        'cyclomatic_complexity': 1 + sum(scope.complexity - 1 for scope in visitor.scopes),
+        'match_case_count': counts['match_case_count'],
+        'bool_op_count': counts['bool_op_count'],
+        'comprehension_count': counts['comprehension_count'],
+        'conditional_expr_count': counts['conditional_expr_count'],
+        'scopes': visitor.scopes,
+        'error': None
+    }
+
+
+@register_analyzer('dependency', requires=('lines',))
+def _dependency_analyzer(ctx):
+    return _line_section(ctx, 'dependency')
+
+
+def _scan_lines(lines, code_length, want_loc, want_comments, want_dependency):
+    """逐行扫描一次，同时累计 LOC、注释和 import 统计"""
+
+    code_lines = 0
+    comment_lines = 0
+    inline_comment_lines = 0
+    blank_lines = 0
+
+    comment_chars = 0
+    single_line_comments = 0
+    inline_comments = 0
+    todo_count = 0
+    fixme_count = 0
+
+    import_count = 0
+    from_import_count = 0
+    modules = []  # 所有导入的模块（保持首次出现的顺序）
+    seen_modules = set()
+    standard_libs = []
+    external_libs = []
+
+    for line in lines:
+        stripped = line.strip()
+
+        if stripped == '':
+            blank_lines += 1
+            continue
+
+        if stripped.startswith('#'):
+            comment_lines += 1
+            if want_comments:
+                single_line_comments += 1
+                comment_chars += len(stripped)
+                upper_line = stripped.upper()
+                if "TODO" in upper_line:
+                    todo_count += 1
+                if "FIXME" in upper_line:
+                    fixme_count += 1
+            continue
+
+        code_lines += 1
+        if '#' in line:
+            inline_comment_lines += 1
+            if want_comments:
+                comment_chars += len(line.split("#", 1)[1].strip())
+
+        if not want_dependency:
+            continue
+
+        # 处理 import 语句：import os, sys, json
+        if stripped.startswith('import '):
+            import_count += 1
+            for module in stripped[7:].split(','):
+                module = module.strip().split('.')[0]  # 只取顶级模块
+                if module and module not in seen_modules:
+                    seen_modules.add(module)
+                    modules.append(module)
+                    if module in STANDARD_LIBS:
+                        standard_libs.append(module)
+                    else:
+                        external_libs.append(module)
+
+        # 处理 from ... import 语句
+        elif stripped.startswith('from '):
+            from_import_count += 1
+            module = stripped[5:].split(' import ')[0].strip().split('.')[0]
+            if module and module not in seen_modules:
+                seen_modules.add(module)
+                modules.append(module)
+                if module in STANDARD_LIBS:
+                    standard_libs.append(module)
+                else:
+                    external_libs.append(module)
+
+    result = {}
+    if want_loc:
+        total_lines = len(lines)
+        comment_rate = comment_lines / total_lines if total_lines > 0 else 0
+        result['loc'] = {
+            'total_lines': total_lines,
+            'code_lines': code_lines,
+            'comment_lines': comment_lines,
+            'inline_comment_lines': inline_comment_lines,
+            'blank_lines': blank_lines,
+            'comment_rate': round(comment_rate, 3)
+        }
+
+    if want_comments:
+        total_chars = code_length - len(lines) + 1  # 去掉换行符后的字符数
+        comment_density = comment_chars / total_chars if total_chars > 0 else 0.0
+        result['comments'] = {
+            'total_comments': single_line_comments + inline_comment_lines,
+            'single_line_comments': single_line_comments,
+            'inline_comments': inline_comment_lines,
+            'todo_count': todo_count,
+            'fixme_count': fixme_count,
+            'comment_density': round(comment_density, 4)
+        }
+
+    if want_dependency:
+        total_imports = import_count + from_import_count
+        # 简单检测循环依赖风险（如果导入自己）
+        has_circular_risk = any('test' in module.lower() for module in modules)
+        result['dependency'] = {
+            'import_count': import_count,
+            'from_import_count': from_import_count,
+            'total_imports': total_imports,
+            'modules': modules,
+            'module_count': len(modules),
+            'standard_libs': standard_libs,
+            'standard_lib_count': len(standard_libs),
+            'external_libs': external_libs,
+            'external_lib_count': len(external_libs),
+            'has_circular_risk': has_circular_risk,
+            'dependency_score': calculate_dependency_score(total_imports, len(external_libs))
+        }
+
+    return result
+
+
+def _complexity_from_tree(tree, visitor=None):
+    """
+    统计判定节点（旧版定义：if / for / while / try 各计 1，每个 except 计 1）
+    visitor: 已完成的完整遍历（complexity_detail 已算过时直接复用，不再遍历）
+    """
+    counts = (visitor or visit_complexity(tree, expressions=False)).counts
+    decision_points = sum(counts[name] for name in LEGACY_COUNTERS)
+
+    return {
+        'cyclomatic_complexity': 1 + decision_points,
+        'decision_points': decision_points,
+        'if_count': counts['if_count'],
+        'for_count': counts['for_count'],
+        'while_count': counts['while_count'],
+        'try_count': counts['try_count'],
+        'except_count': counts['except_count'],
+        'error': None
+    }
+
+
+def calculate_dependency_score(total_imports, external_count):
+    """
+    计算依赖分数（0-100分）
+    规则：外部依赖越少，分数越高
+    """
+    if total_imports == 0:
+        return 100
+
+    # 基础分
+    score = 80
+
+    # 外部依赖扣分
+    score -= min(30, external_count * 5)
+
+    # 总依赖数扣分
+    score -= min(20, total_imports * 2)
+
+    return max(0, min(100, score))
+
+
+def _empty_loc():
+    return {
+        'total_lines': 0,
+        'code_lines': 0,
+        'comment_lines': 0,
+        'inline_comment_lines': 0,
+        'blank_lines': 0,
+        'comment_rate': 0
+    }
+
+
+def _empty_comments():
+    return {
+        'total_comments': 0,
+        'single_line_comments': 0,
+        'inline_comments': 0,
+        'todo_count': 0,
+        'fixme_count': 0,
+        'comment_density': 0.0
+    }
+
+
+def _empty_complexity():
+    return {
+        'cyclomatic_complexity': 1,
+        'decision_points': 0,
+        'if_count': 0,
+        'for_count': 0,
+        'while_count': 0,
+        'try_count': 0,
+        'except_count': 0,
+        'error': None
+    }
+
+
+def _empty_complexity_detail():
+    return {
+        'cyclomatic_complexity': 1,
+        'match_case_count': 0,
+        'bool_op_count': 0,
+        'comprehension_count': 0,
+        'conditional_expr_count': 0,
+        'scopes': [],
+        'error': None
+    }
+
+
+def _empty_dependency():
+    return {
+        'import_count': 0,
+        'from_import_count': 0,
+        'total_imports': 0,
+        'modules': [],
+        'standard_lib_count': 0,
+        'external_lib_count': 0,
+        'has_circular_risk': False
+    }
+
+
+_EMPTY = {
+    'loc': _empty_loc,
+    'comments': _empty_comments,
+    'dependency': _empty_dependency,
+}
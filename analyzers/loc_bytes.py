@@ -0,0 +1,143 @@
+"""
+按字节统计 LOC 的快速路径
+直接在原始字节（或 mmap 映射的文件）上计数，不解码整个文件、不为每行创建对象；
+结果与 calculate_loc(按流水线方式解码后的源码) 完全一致。
+做法：先用 bytes.translate 删除 str.strip() 会去掉的空白字节，此后每行的首字节就是 strip 后的首字符，
+空行、注释行都可以用 bytes.count / 以字面量开头的正则计数。
+只有含非 ASCII 字节时才需要确认编码：UTF-8 只做一次分块校验，非法 UTF-8 或
+（pep263=True 时）声明了其他编码的文件退回到解码后统计。
+"""
+
+import codecs
+import io
+import mmap
+import re
+import tokenize
+
+from .registry import decode_source, run_analyzers
+
+# str.strip() 会去掉的 ASCII 空白（换行符单独处理）
+_ASCII_SPACE = b' \t\x0b\x0c\x1c\x1d\x1e\x1f'
+
+# str.strip() 会去掉的非 ASCII 空白字符
+_UNICODE_SPACE = re.compile('[\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]')
+
+_BLANK_LINE = re.compile(rb'\n(?=\n)')  # 零宽计数：findall 只返回缓存的单字节对象
+_AFTER_HASH = re.compile(rb'#[^\n]*')
+
+# 分块读取 / 校验的块大小
+_CHUNK_SIZE = 1 << 20
+
+
+def _count(pattern, data):
+    return len(pattern.findall(data))
+
+
+def _is_ascii(data):
+    if isinstance(data, bytes):
+        return data.isascii()
+    return all(data[start:start + _CHUNK_SIZE].isascii() for start in range(0, len(data), _CHUNK_SIZE))
+
+
+def _strip_spaces(data, unicode_spaces=()):
+    """换行符统一为 \\n 后删除所有空白字节（分块处理，没有 \\r 时 mmap 不会被整体复制）"""
+    if data.find(b'\r') != -1:
+        data = bytes(data).replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    parts = [b'\n']  # 哨兵：每行都以 \n 开头
+    for start in range(0, len(data), _CHUNK_SIZE):
+        parts.append(data[start:start + _CHUNK_SIZE].translate(None, _ASCII_SPACE))
+    parts.append(b'\n')
+    stripped = b''.join(parts)
+    for space in unicode_spaces:
+        stripped = stripped.replace(space, b'')
+    return stripped
+
+
+def _scan_utf8(data):
+    """
+    分块做一次严格 UTF-8 解码：返回文件中出现的非 ASCII 空白字符的 UTF-8 编码列表；
+    非法 UTF-8 时返回 None（每块解码结果用完即弃，内存占用与文件大小无关）
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')('strict')
+    found = set()
+    try:
+        for start in range(0, len(data), _CHUNK_SIZE):
+            found.update(_UNICODE_SPACE.findall(decoder.decode(data[start:start + _CHUNK_SIZE])))
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return None
+    return [space.encode('utf-8') for space in found]
+
+
+def detect_source_encoding(data):
+    """按 PEP 263 / BOM 判断源码编码（只读取前两行）"""
+    head = io.BytesIO(bytes(data[:1024]))
+    try:
+        encoding, _ = tokenize.detect_encoding(head.readline)
+    except SyntaxError:
+        return 'utf-8'
+    return encoding
+
+
+def _decoded_loc(data, encoding):
+    if encoding == 'utf-8':
+        text = decode_source(bytes(data))
+    else:
+        text = bytes(data).decode(encoding, errors='ignore')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return run_analyzers(text, ('loc',))['loc']
+
+
+def count_loc_bytes(data, pep263=False):
+    """
+    在原始字节上统计代码行数信息（返回值与 calculate_loc 相同）
+
+    参数:
+        data: bytes 或其他支持缓冲区协议的对象（如 mmap）
+        pep263: False 时与流水线一致按 UTF-8（忽略非法字节）解码；
+                True 时遵循编码声明，只有含非 ASCII 字节时才读取声明
+
+    返回:
+        dict: 与 calculate_loc(解码后的源码) 完全一致
+    """
+    if len(data) == 0:
+        return run_analyzers('', ('loc',))['loc']
+
+    unicode_spaces = ()
+    if not _is_ascii(data):
+        encoding = detect_source_encoding(data) if pep263 else 'utf-8'
+        unicode_spaces = _scan_utf8(data) if encoding == 'utf-8' else None
+        if unicode_spaces is None:
+            return _decoded_loc(data, encoding)
+
+    stripped = _strip_spaces(data, unicode_spaces)
+    total_lines = stripped.count(b'\n') - 1
+    blank_lines = _count(_BLANK_LINE, stripped)
+    comment_lines = stripped.count(b'\n#')
+    code_lines = total_lines - blank_lines - comment_lines
+    inline_comment_lines = 0
+    if stripped.count(b'#') > comment_lines:
+        # 每行第一个 # 之后的内容折叠成一个 #，含 # 的行数减去注释行即为带行内注释的代码行
+        inline_comment_lines = _AFTER_HASH.sub(b'#', stripped).count(b'#') - comment_lines
+
+    comment_rate = comment_lines / total_lines if total_lines > 0 else 0
+    return {
+        'total_lines': total_lines,
+        'code_lines': code_lines,
+        'comment_lines': comment_lines,
+        'inline_comment_lines': inline_comment_lines,
+        'blank_lines': blank_lines,
+        'comment_rate': round(comment_rate, 3)
+    }
+
+
+def count_loc_file(path, pep263=False):
+    """把文件映射到内存后统计 LOC，不把文件内容读入 Python 对象"""
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件无法映射
+            return count_loc_bytes(b'', pep263)
+        with mapped:
+            return count_loc_bytes(mapped, pep263)
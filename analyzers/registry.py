@@ -0,0 +1,213 @@
+"""
+分析器注册表与共享解析上下文
+每个分析器声明自己需要的源码表示（raw / text / lines / tokens / ast），
+ParseContext 按需构建这些表示，每个文件每种表示至多构建一次，由所有分析器共享。
+第三方分析器用 register_analyzer 注册后即可参与同一次分析，不会再增加一遍完整的解析。
+分析过程只读取模块级状态，可在多个线程中同时运行：注册表在修改时整体替换（写时复制），
+分析中的线程看到的总是某个完整的注册表。
+"""
+
+import ast
+import importlib
+import io
+import threading
+import tokenize
+from collections import namedtuple
+
+# 可声明的源码表示
+REPRESENTATIONS = ('raw', 'text', 'lines', 'tokens', 'ast')
+
+# name: 结果分组名；requires: 需要的表示；func: func(ctx) -> 结果
+Analyzer = namedtuple('Analyzer', ['name', 'requires', 'func'])
+
+_ANALYZERS = {}
+_REGISTRY_LOCK = threading.Lock()  # 只保护注册与注销之间的并发修改
+
+# 计时钩子：span_factory(名称, 类别) 返回上下文管理器；为 None 时不计时（由 pipeline.tracing 设置）
+_span_factory = None
+
+
+def decode_source(data):
+    """按 open(path, 'r', encoding='utf-8', errors='ignore') 的方式解码（含通用换行符转换）"""
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+class ParseContext:
+    """
+    单个文件的共享解析上下文
+    源码可以是 str 或原始 bytes；各表示在第一次访问时构建并缓存，
+    分析器的结果也缓存在这里，分析器之间可通过 result() 复用彼此的结果
+    """
+
+    def __init__(self, source, requested=()):
+        self.source_is_bytes = isinstance(source, bytes)
+        if self.source_is_bytes:
+            self._raw, self._text = source, None
+        else:
+            self._raw, self._text = None, source
+        self.requested = frozenset(requested)  # 本次分析请求的分析器（融合计算时使用）
+        self.built = []  # 已构建的表示（按构建顺序）
+        self.errors = {}  # 表示 -> 构建失败的异常（tokens / ast 的语法错误）
+        self._lines = self._tokens = self._tree = None
+        self._results = {}
+        self._memo = {}
+
+    def _mark(self, representation):
+        self.built.append(representation)
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            self._raw = self._text.encode('utf-8')
+            self._mark('raw')
+        return self._raw
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = decode_source(self._raw)
+            self._mark('text')
+        return self._text
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self.text.split('\n')
+            self._mark('lines')
+        return self._lines
+
+    @property
+    def tokens(self):
+        """词法单元列表；源码无法切分时为 None，异常记录在 errors['tokens']"""
+        if 'tokens' not in self.built:
+            self._mark('tokens')
+            readline = io.StringIO(self.text).readline
+            try:
+                if _span_factory is None:
+                    self._tokens = list(tokenize.generate_tokens(readline))
+                else:
+                    with _span_factory('tokenize', 'parse'):
+                        self._tokens = list(tokenize.generate_tokens(readline))
+            except (tokenize.TokenError, SyntaxError) as e:
+                self.errors['tokens'] = e
+        return self._tokens
+
+    @property
+    def tree(self):
+        """AST；语法错误时为 None，异常记录在 errors['ast']（其他异常照常抛出）"""
+        if 'ast' not in self.built:
+            self._mark('ast')
+            text = self.text
+            try:
+                if _span_factory is None:
+                    self._tree = ast.parse(text)
+                else:
+                    with _span_factory('ast.parse', 'parse'):
+                        self._tree = ast.parse(text)
+            except SyntaxError as e:
+                self.errors['ast'] = e
+        return self._tree
+
+    def get(self, representation):
+        if representation not in REPRESENTATIONS:
+            raise ValueError(f"未知的源码表示：{representation}")
+        return getattr(self, 'tree' if representation == 'ast' else representation)
+
+    def memo(self, key, factory):
+        """缓存分析器之间共享的中间结果（如多个分析器融合的一次逐行扫描）"""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+
+    def result(self, name):
+        """某个已注册分析器在本文件上的结果（每个文件至多计算一次）"""
+        if name not in self._results:
+            func = get_analyzer(name).func
+            if _span_factory is None:
+                self._results[name] = func(self)
+            else:
+                with _span_factory(f'analyzer:{name}', 'analyzer'):
+                    self._results[name] = func(self)
+        return self._results[name]
+
+
+def set_span_factory(factory):
+    """设置（None 为取消）分析器与解析步骤的计时钩子"""
+    global _span_factory
+    _span_factory = factory
+
+
+def register_analyzer(name, requires=(), replace=False):
+    """
+    注册分析器的装饰器：
+
+        @register_analyzer('todo_lines', requires=('lines',))
+        def todo_lines(ctx):
+            return sum('TODO' in line for line in ctx.lines)
+    """
+    unknown = set(requires) - set(REPRESENTATIONS)
+    if unknown:
+        raise ValueError(f"未知的源码表示：{sorted(unknown)}")
+
+    def decorator(func):
+        global _ANALYZERS
+        with _REGISTRY_LOCK:
+            if name in _ANALYZERS and not replace:
+                raise ValueError(f"分析器已注册：{name}")
+            _ANALYZERS = {**_ANALYZERS, name: Analyzer(name, tuple(requires), func)}
+        return func
+
+    return decorator
+
+
+def unregister_analyzer(name):
+    global _ANALYZERS
+    with _REGISTRY_LOCK:
+        if name in _ANALYZERS:
+            _ANALYZERS = {key: value for key, value in _ANALYZERS.items() if key != name}
+
+
+def get_analyzer(name):
+    try:
+        return _ANALYZERS[name]
+    except KeyError:
+        raise KeyError(f"未注册的分析器：{name}") from None
+
+
+def required_representations(names):
+    """一组分析器需要的全部源码表示（按 REPRESENTATIONS 的顺序）"""
+    needed = set()
+    for name in names:
+        needed.update(get_analyzer(name).requires)
+    return tuple(representation for representation in REPRESENTATIONS if representation in needed)
+
+
+def registered_analyzers():
+    """已注册的分析器名（按注册顺序）"""
+    return tuple(_ANALYZERS)
+
+
+def load_analyzer_plugins(module_names):
+    """导入第三方分析器模块，模块在导入时用 register_analyzer 完成注册"""
+    for module_name in module_names:
+        importlib.import_module(module_name)
+
+
+def run_analyzers(source, names=None, context=None):
+    """
+    在同一个解析上下文上运行一组分析器
+
+    参数:
+        source: Python代码字符串或原始字节（传入 context 时忽略）
+        names: 分析器名列表，None 表示全部已注册的分析器
+        context: 已有的 ParseContext（可复用之前构建的表示与结果）
+
+    返回:
+        dict: 分析器名 -> 结果
+    """
+    names = registered_analyzers() if names is None else tuple(names)
+    ctx = context if context is not None else ParseContext(source, names)
+    return {name: ctx.result(name) for name in names}
@@ -0,0 +1,20 @@
+"""
+性能基准：可复现的合成语料生成与各分析器 / 流水线的吞吐量测量，
+以及命名基线与回归对比（python -m benchmarks 或 pytest --bench）
+"""
+
+from .baseline import compare_reports, format_comparison, has_regression, load_baseline, save_baseline
+from .corpus import generate_corpus
+from .runner import default_cases, run_benchmarks, write_report
+
+__all__ = [
+    'generate_corpus',
+    'default_cases',
+    'run_benchmarks',
+    'write_report',
+    'save_baseline',
+    'load_baseline',
+    'compare_reports',
+    'has_regression',
+    'format_comparison'
+]
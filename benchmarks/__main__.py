@@ -0,0 +1,50 @@
+import argparse
+import sys
+
+from .baseline import (BASELINE_DIR, DEFAULT_THRESHOLD, compare_reports, format_comparison,
+                       has_regression, load_baseline, save_baseline)
+from .corpus import generate_corpus
+from .runner import default_cases, run_benchmarks, write_report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="代码质量分析流水线性能基准")
+    parser.add_argument("--corpus", default="./output/bench_corpus", help="合成语料目录（参数不变时复用）")
+    parser.add_argument("--files", type=int, default=1000, help="每个版本的文件数（1k ~ 100k）")
+    parser.add_argument("--projects", type=int, default=1)
+    parser.add_argument("--versions", type=int, default=2)
+    parser.add_argument("--max-blocks", type=int, default=200, help="单个文件最多的代码块数（控制文件大小上限）")
+    parser.add_argument("--max-depth", type=int, default=4, help="包目录最大嵌套深度")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="process_all_projects 的进程数")
+    parser.add_argument("--pools", nargs="+", choices=("process", "thread"), default=["process", "thread"],
+                        help="并行方式：进程数大于 1 时分别测进程池与线程池（线程池在自由线程 CPython 上才能用满多核）")
+    parser.add_argument("--output", default="./output/benchmark.json", help="JSON 报告路径")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的重复次数（取中位数）")
+    parser.add_argument("--save-baseline", metavar="NAME", help="把本次结果保存为命名基线")
+    parser.add_argument("--compare", metavar="NAME", help="与命名基线（或报告 JSON 路径）对比，有回归时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回归阈值（0.1 表示变慢 10%%）")
+    parser.add_argument("--baselines-dir", default=BASELINE_DIR, help="命名基线目录")
+    args = parser.parse_args(argv)
+    # 先读取基线：基线不存在或名称非法时不必跑完整个基准
+    baseline = load_baseline(args.compare, args.baselines_dir) if args.compare else None
+
+    print(f"准备语料：{args.corpus}")
+    spec = generate_corpus(args.corpus, files=args.files, projects=args.projects, versions=args.versions,
+                           max_blocks=args.max_blocks, max_depth=args.max_depth, seed=args.seed)
+    print(f"语料共 {spec['total_files']} 个文件，{spec['total_bytes'] / 1e6:.1f} MB")
+    report = run_benchmarks(args.corpus, spec, default_cases(args.workers, args.pools), repeat=args.repeat)
+    write_report(report, args.output)
+    if args.save_baseline:
+        save_baseline(report, args.save_baseline, args.baselines_dir)
+    if baseline is not None:
+        comparisons = compare_reports(baseline, report, threshold=args.threshold)
+        print(format_comparison(comparisons))
+        if has_regression(comparisons):
+            print(f"发现性能回归（阈值 {args.threshold:.0%}）")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+from collections import namedtuple
+from typing import Any, Dict, List, Mapping, Optional
+
+from .stats import median, ratio_ci
+
+# 命名基线的默认保存目录：<目录>/<名称>.json
+BASELINE_DIR = "./output/bench_baselines"
+
+# 默认回归阈值：中位耗时变慢超过 10% 且置信区间整体高于 1 时判为回归
+DEFAULT_THRESHOLD = 0.10
+
+_NAME_PATTERN = re.compile(r"^[\w.\-]+$")
+
+# 一个用例的对比结果；status 为 regression / improvement / unchanged / new / missing
+# ci_low / ci_high 为耗时比（当前 / 基线）的置信区间，样本不足时为 None
+CaseComparison = namedtuple("CaseComparison", [
+    "name", "baseline_seconds", "current_seconds", "ratio", "ci_low", "ci_high", "threshold", "status",
+])
+
+
+def baseline_path(name: str, directory: str = BASELINE_DIR) -> str:
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"非法的基线名称：{name}（只允许字母、数字、下划线、点和连字符）")
+    return os.path.join(directory, f"{name}.json")
+
+
+def save_baseline(report: Dict[str, Any], name: str, directory: str = BASELINE_DIR) -> str:
+    """把基准报告保存为命名基线（同名基线会被覆盖），返回文件路径"""
+    path = baseline_path(name, directory)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(report, baseline_name=name), f, ensure_ascii=False, indent=2)
+    print(f"基线已保存：{path}")
+    return path
+
+
+def load_baseline(name: str, directory: str = BASELINE_DIR) -> Dict[str, Any]:
+    """按名称读取基线；name 也可以直接是某个报告 JSON 的路径"""
+    path = name if name.endswith(".json") and os.path.exists(name) else baseline_path(name, directory)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"基线不存在：{path}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _samples(result: Dict[str, Any]) -> List[float]:
+    # 第 1 版报告只有单次耗时
+    return result.get("samples") or [result["seconds"]]
+
+
+def _status(ratio: float, ci_low: Optional[float], ci_high: Optional[float], threshold: float) -> str:
+    if ratio > 1 + threshold and (ci_low is None or ci_low > 1):
+        return "regression"
+    if ratio < 1 / (1 + threshold) and (ci_high is None or ci_high < 1):
+        return "improvement"
+    return "unchanged"
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD, confidence: float = 0.95,
+                    thresholds: Optional[Mapping[str, float]] = None) -> List[CaseComparison]:
+    """
+    按用例名对比两份基准报告（各分析器与端到端用例分别判定）
+    回归：中位耗时之比超过 1 + 阈值，且比值的置信区间下限高于 1（波动范围内的变慢不算回归）；
+    只有单次样本时仅按阈值判定。thresholds 可为个别用例指定阈值
+    """
+    if baseline.get("corpus") != current.get("corpus"):
+        raise ValueError("基线与当前报告使用的语料参数不同，无法对比")
+    thresholds = thresholds or {}
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        name = result["name"]
+        case_threshold = thresholds.get(name, threshold)
+        current_samples = _samples(result)
+        if name not in baseline_results:
+            comparisons.append(CaseComparison(name, None, median(current_samples), None, None, None,
+                                              case_threshold, "new"))
+            continue
+        baseline_samples = _samples(baseline_results.pop(name))
+        ratio, ci_low, ci_high = ratio_ci(baseline_samples, current_samples, confidence)
+        comparisons.append(CaseComparison(
+            name, median(baseline_samples), median(current_samples), ratio, ci_low, ci_high,
+            case_threshold, _status(ratio, ci_low, ci_high, case_threshold),
+        ))
+    for name, result in baseline_results.items():
+        comparisons.append(CaseComparison(name, median(_samples(result)), None, None, None, None,
+                                          thresholds.get(name, threshold), "missing"))
+    return comparisons
+
+
+def has_regression(comparisons: List[CaseComparison]) -> bool:
+    return any(comparison.status == "regression" for comparison in comparisons)
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.4f}"
+
+
+def format_comparison(comparisons: List[CaseComparison]) -> str:
+    """对比结果的文本表格"""
+    lines = [f"{'用例':<36}{'基线(s)':>10}{'当前(s)':>10}{'比值':>8}  {'置信区间':<18}结论"]
+    for c in comparisons:
+        ratio = "-" if c.ratio is None else f"{c.ratio:.3f}"
+        interval = "-" if c.ci_low is None else f"[{c.ci_low:.3f}, {c.ci_high:.3f}]"
+        lines.append(f"{c.name:<36}{_format_seconds(c.baseline_seconds):>10}"
+                     f"{_format_seconds(c.current_seconds):>10}{ratio:>8}  {interval:<18}{c.status}")
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+import json
+import os
+import random
+import re
+import shutil
+from typing import Any, Dict, List
+
+# 生成参数写入语料根目录，参数相同时直接复用已生成的语料
+SPEC_FILE = "corpus.json"
+
+# 每个语料文件的代码块模板：{i} 为块序号，{name} 为随机标识符
+_IMPORTS = [
+    "import os\n", "import sys\n", "import json\n", "from typing import Any, Dict\n",
+    "import requests\n", "from collections import OrderedDict\n", "import numpy as np\n",
+]
+_BLOCKS = [
+    "def {name}_{i}(value, items=None):\n"
+    "    # 处理输入\n"
+    "    if value is None or not items:\n"
+    "        return []\n"
+    "    result = [item for item in items if item]\n"
+    "    for index, item in enumerate(result):\n"
+    "        if index % 2 == 0 and item:\n"
+    "            result[index] = item * 2  # 偶数位翻倍\n"
+    "    return result\n\n",
+
+    "class {Name}{i}:\n"
+    "    \"\"\"示例类 {i}\"\"\"\n\n"
+    "    def __init__(self, size):\n"
+    "        self.size = size\n\n"
+    "    def run(self):\n"
+    "        count = 0\n"
+    "        while count < self.size:\n"
+    "            try:\n"
+    "                count += 1\n"
+    "            except ValueError:\n"
+    "                break\n"
+    "        return count if count else None\n\n",
+
+    "{name}_{i} = {{\n"
+    "    'key_{i}': {i},\n"
+    "    'enabled': True,\n"
+    "}}\n\n",
+
+    "# TODO: 拆分 {name}_{i}\n"
+    "def {name}_{i}(data):\n"
+    "    total = 0\n"
+    "    for key, value in data.items():\n"
+    "        if isinstance(value, int) or isinstance(value, float):\n"
+    "            total += value\n"
+    "        elif value:\n"
+    "            total += len(value)\n"
+    "    return total\n\n",
+]
+_WORDS = ["alpha", "beta", "gamma", "delta", "parse", "load", "render", "handle", "merge", "build"]
+
+
+def _file_content(rng: random.Random, blocks: int) -> str:
+    parts = rng.sample(_IMPORTS, k=rng.randint(1, 4))
+    parts.append("\n")
+    for i in range(blocks):
+        name = rng.choice(_WORDS)
+        parts.append(rng.choice(_BLOCKS).format(i=i, name=name, Name=name.capitalize()))
+    return "".join(parts)
+
+
+def _block_counts(rng: random.Random, files: int, min_blocks: int, max_blocks: int) -> List[int]:
+    """对数均匀分布的文件大小：多数文件较小，少数文件很大（模拟生成代码、迁移文件）"""
+    low, high = max(1, min_blocks), max(min_blocks, max_blocks)
+    return [int(round(low * (high / low) ** rng.random())) for _ in range(files)]
+
+
+def _relative_paths(rng: random.Random, files: int, max_depth: int) -> List[str]:
+    paths = []
+    for index in range(files):
+        depth = rng.randint(0, max_depth)
+        dirs = [f"pkg{rng.randint(0, 7)}" for _ in range(depth)]
+        paths.append(os.path.join(*dirs, f"module_{index}.py"))
+    return paths
+
+
+def generate_corpus(root: str, files: int = 1000, projects: int = 1, versions: int = 2,
+                    min_blocks: int = 1, max_blocks: int = 200, max_depth: int = 4,
+                    change_rate: float = 0.1, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成可复现的合成语料：root/项目/版本/多层包目录/*.py，结构与 get_project_versions 的输入一致
+    files: 每个版本的文件数；每个新版本按 change_rate 修改一部分文件，其余内容不变
+    相同参数总是生成字节完全相同的语料；已存在且参数相同时直接返回，参数不同时删除旧语料后重新生成
+    返回语料说明（参数 + 总文件数 + 总字节数）
+    """
+    spec = {
+        "files": files, "projects": projects, "versions": versions, "min_blocks": min_blocks,
+        "max_blocks": max_blocks, "max_depth": max_depth, "change_rate": change_rate, "seed": seed,
+    }
+    spec_path = os.path.join(root, SPEC_FILE)
+    if os.path.exists(spec_path):
+        with open(spec_path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+        if {key: existing.get(key) for key in spec} == spec:
+            return existing
+        os.remove(spec_path)  # 重新生成中途失败时不留下与内容不符的说明
+    # 清掉之前按其他参数生成的项目目录，否则多出的文件会留在语料中
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            if re.fullmatch(r"project\d+", name) and os.path.isdir(os.path.join(root, name)):
+                shutil.rmtree(os.path.join(root, name))
+
+    total_files = total_bytes = 0
+    for project_index in range(projects):
+        rng = random.Random(f"{seed}-{project_index}")
+        paths = _relative_paths(rng, files, max_depth)
+        blocks = _block_counts(rng, files, min_blocks, max_blocks)
+        contents = [_file_content(rng, count) for count in blocks]
+        for version_index in range(versions):
+            if version_index > 0:
+                for index in range(files):
+                    if rng.random() < change_rate:
+                        contents[index] += f"# changed in {version_index}.0\n" + \
+                            _file_content(rng, max(1, blocks[index] // 10))
+            version_dir = os.path.join(root, f"project{project_index}", f"{version_index + 1}.0")
+            for rel_path, content in zip(paths, contents):
+                file_path = os.path.join(version_dir, rel_path)
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                data = content.encode("utf-8")
+                with open(file_path, "wb") as f:
+                    f.write(data)
+                total_files += 1
+                total_bytes += len(data)
+
+    spec.update({"total_files": total_files, "total_bytes": total_bytes})
+    with open(spec_path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+    return spec
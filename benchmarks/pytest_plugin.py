@@ -0,0 +1,67 @@
+"""
+pytest 插件：pytest benchmarks --bench [--bench-baseline NAME] [--bench-save NAME]
+每个基准用例对应一个测试，相对基线出现回归时该测试失败；不加 --bench 时全部跳过
+"""
+
+import pytest
+
+from .baseline import (BASELINE_DIR, DEFAULT_THRESHOLD, compare_reports, format_comparison, load_baseline,
+                       save_baseline)
+from .corpus import generate_corpus
+from .runner import case_name, default_cases, run_benchmarks, write_report
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks", "性能基准")
+    group.addoption("--bench", action="store_true", default=False, help="运行性能基准（默认跳过）")
+    group.addoption("--bench-baseline", metavar="NAME", help="与命名基线对比，回归的用例判为失败")
+    group.addoption("--bench-save", metavar="NAME", help="把本次结果保存为命名基线")
+    group.addoption("--bench-threshold", type=float, default=DEFAULT_THRESHOLD, help="回归阈值")
+    group.addoption("--bench-files", type=int, default=200, help="每个版本的文件数")
+    group.addoption("--bench-repeat", type=int, default=5, help="每个用例的重复次数")
+    group.addoption("--bench-corpus", default="./output/bench_corpus_pytest", help="合成语料目录")
+    group.addoption("--bench-baselines-dir", default=BASELINE_DIR, help="命名基线目录")
+    group.addoption("--bench-output", default="./output/benchmark_pytest.json", help="JSON 报告路径")
+
+
+def pytest_generate_tests(metafunc):
+    if "bench_case" in metafunc.fixturenames:
+        metafunc.parametrize("bench_case", [case_name(case, workers) for case, workers in default_cases()])
+
+
+@pytest.fixture(scope="session")
+def bench_report(request):
+    """整个会话只运行一次全部基准用例"""
+    config = request.config
+    if not config.getoption("--bench"):
+        pytest.skip("未启用 --bench")
+    # 基线有问题时尽早报错，不必先跑完基准
+    baseline_name = config.getoption("--bench-baseline")
+    if baseline_name:
+        config._bench_baseline = load_baseline(baseline_name, config.getoption("--bench-baselines-dir"))
+    corpus = config.getoption("--bench-corpus")
+    spec = generate_corpus(corpus, files=config.getoption("--bench-files"), versions=1)
+    report = run_benchmarks(corpus, spec, default_cases(), repeat=config.getoption("--bench-repeat"))
+    write_report(report, config.getoption("--bench-output"))
+    if config.getoption("--bench-save"):
+        save_baseline(report, config.getoption("--bench-save"), config.getoption("--bench-baselines-dir"))
+    return report
+
+
+@pytest.fixture(scope="session")
+def bench_comparisons(request, bench_report):
+    """用例名 -> CaseComparison"""
+    config = request.config
+    baseline = getattr(config, "_bench_baseline", None)
+    if baseline is None:
+        pytest.skip("未指定 --bench-baseline，只运行基准")
+    comparisons = compare_reports(baseline, bench_report, threshold=config.getoption("--bench-threshold"))
+    config._bench_comparisons = comparisons
+    return {comparison.name: comparison for comparison in comparisons}
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    comparisons = getattr(config, "_bench_comparisons", None)
+    if comparisons:
+        terminalreporter.section("性能基准对比")
+        terminalreporter.write_line(format_comparison(comparisons))
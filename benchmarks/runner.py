@@ -0,0 +1,162 @@
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from analyzers.registry import registered_analyzers, run_analyzers
+from pipeline.batch_processor import gil_enabled, process_all_projects, process_single_version
+from pipeline.file_walker import get_project_versions, get_python_files
+from .stats import median
+
+# 报告格式版本（字段变化时递增）
+REPORT_VERSION = 2
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """当前进程（或已结束的子进程中最大的）峰值常驻内存；平台不支持时为 None"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def _first_version_dir(corpus_root: str) -> str:
+    projects = get_project_versions(corpus_root)
+    return next(iter(next(iter(projects.values())).values()))
+
+
+def _read_files(paths: Sequence[str]) -> List[bytes]:
+    contents = []
+    for file_path in paths:
+        with open(file_path, "rb") as f:
+            contents.append(f.read())
+    return contents
+
+
+def _time_case(case: str, corpus_root: str, workers: int, repeat: int = 1) -> Dict[str, Any]:
+    """
+    在独立的子进程中把一个用例执行 repeat 次，返回每次耗时、处理的文件数 / 字节数与峰值内存
+    analyzer:<名称> 只计分析时间（文件预先读入内存），其余用例包含读取与遍历
+    process_all_projects_threads 为线程池模式，与 process_all_projects（进程池）对比
+    """
+    if case.startswith("analyzer:"):
+        contents = _read_files(get_python_files(_first_version_dir(corpus_root)))
+        name = case.split(":", 1)[1]
+
+        def run():
+            for data in contents:
+                try:
+                    run_analyzers(data, (name,))
+                except Exception:
+                    pass  # 与流水线一致：分析失败的文件跳过
+
+        files, size = len(contents), sum(len(data) for data in contents)
+    elif case == "process_single_version":
+        version_dir = _first_version_dir(corpus_root)
+        paths = get_python_files(version_dir)
+
+        def run():
+            process_single_version(version_dir)
+
+        files, size = len(paths), sum(os.path.getsize(path) for path in paths)
+    elif case in ("process_all_projects", "process_all_projects_threads"):
+        projects = get_project_versions(corpus_root)
+        paths = [path for versions in projects.values()
+                 for version_dir in versions.values() for path in get_python_files(version_dir)]
+        pool = "thread" if case.endswith("_threads") else "process"
+
+        def run():
+            process_all_projects(corpus_root, workers=workers, pool=pool)
+
+        files, size = len(paths), sum(os.path.getsize(path) for path in paths)
+    else:
+        raise ValueError(f"未知的基准用例：{case}")
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+
+    return {"samples": samples, "files": files, "bytes": size,
+            "peak_rss_bytes": peak_rss_bytes(), "children_peak_rss_bytes": peak_rss_bytes(children=True)}
+
+
+def case_name(case: str, workers: int = 1) -> str:
+    """报告中的用例名：process_all_projects 带上进程数"""
+    return case if not case.startswith("process_all") else f"{case}[workers={workers}]"
+
+
+def run_case(case: str, corpus_root: str, workers: int = 1, repeat: int = 1) -> Dict[str, Any]:
+    """
+    在全新的 spawn 子进程中执行用例，使每个用例的峰值内存互不影响
+    seconds 为 repeat 次耗时的中位数，吞吐量按中位数计算
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        result = executor.submit(_time_case, case, corpus_root, workers, repeat).result()
+    seconds = result["seconds"] = median(result["samples"])
+    result.update({
+        "name": case_name(case, workers),
+        "files_per_sec": round(result["files"] / seconds, 2) if seconds > 0 else None,
+        "mb_per_sec": round(result["bytes"] / 1e6 / seconds, 3) if seconds > 0 else None,
+    })
+    return result
+
+
+def default_cases(workers: Sequence[int] = (1,), pools: Sequence[str] = ("process",)) -> List[tuple]:
+    """
+    默认用例：每个已注册的分析器、process_single_version、各进程数下的 process_all_projects
+    pools 含 thread 时，对大于 1 的进程数另加同样线程数的线程池用例
+    """
+    cases = [(f"analyzer:{name}", 1) for name in registered_analyzers()]
+    cases.append(("process_single_version", 1))
+    for count in workers:
+        if "process" in pools:
+            cases.append(("process_all_projects", count))
+        if "thread" in pools and count > 1:
+            cases.append(("process_all_projects_threads", count))
+    return cases
+
+
+def run_benchmarks(corpus_root: str, corpus_spec: Dict[str, Any],
+                   cases: Optional[Sequence[tuple]] = None, repeat: int = 1) -> Dict[str, Any]:
+    """执行一组 (用例, 进程数)，每个用例重复 repeat 次，返回可写入 JSON 的报告"""
+    results = []
+    for case, workers in cases if cases is not None else default_cases():
+        result = run_case(case, corpus_root, workers, repeat)
+        print(f"  {result['name']}: {result['seconds']:.3f}s，{result['files_per_sec']} 文件/秒，"
+              f"{result['mb_per_sec']} MB/秒")
+        results.append(result)
+    return {
+        "report_version": REPORT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "gil_enabled": gil_enabled(),
+        },
+        "corpus": corpus_spec,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def write_report(report: Dict[str, Any], output_path: str) -> None:
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"基准报告已写入：{output_path}")
@@ -0,0 +1,55 @@
+import random
+from typing import Optional, Sequence, Tuple
+
+# 自助法重采样次数与固定种子（相同样本总是得到相同的置信区间）
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 0
+
+
+def median(samples: Sequence[float]) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        raise ValueError("样本为空")
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _quantile(ordered: Sequence[float], q: float) -> float:
+    """已排序序列的线性插值分位数"""
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def median_ci(samples: Sequence[float], confidence: float = 0.95,
+              resamples: int = BOOTSTRAP_RESAMPLES, seed: int = BOOTSTRAP_SEED) -> Tuple[float, float]:
+    """中位数的自助法（百分位）置信区间；单个样本时区间退化为该样本"""
+    if len(samples) < 2:
+        return median(samples), median(samples)
+    rng = random.Random(seed)
+    count = len(samples)
+    estimates = sorted(median(rng.choices(samples, k=count)) for _ in range(resamples))
+    alpha = (1 - confidence) / 2
+    return _quantile(estimates, alpha), _quantile(estimates, 1 - alpha)
+
+
+def ratio_ci(baseline: Sequence[float], current: Sequence[float], confidence: float = 0.95,
+             resamples: int = BOOTSTRAP_RESAMPLES,
+             seed: int = BOOTSTRAP_SEED) -> Tuple[float, Optional[float], Optional[float]]:
+    """
+    当前 / 基线中位耗时之比及其自助法置信区间（两组样本分别重采样）
+    任一方只有一个样本时无法估计波动，区间为 (None, None)
+    """
+    ratio = median(current) / median(baseline)
+    if len(baseline) < 2 or len(current) < 2:
+        return ratio, None, None
+    rng = random.Random(seed)
+    estimates = sorted(
+        median(rng.choices(current, k=len(current))) / median(rng.choices(baseline, k=len(baseline)))
+        for _ in range(resamples)
+    )
+    alpha = (1 - confidence) / 2
+    return ratio, _quantile(estimates, alpha), _quantile(estimates, 1 - alpha)
@@ -0,0 +1,12 @@
+import pytest
+
+
+def test_no_regression(bench_case, bench_comparisons):
+    """测试该基准用例相对基线没有性能回归"""
+    comparison = bench_comparisons.get(bench_case)
+    if comparison is None or comparison.status == "new":
+        pytest.skip(f"基线中没有用例 {bench_case}")
+    assert comparison.status != "regression", (
+        f"{bench_case} 变慢 {comparison.ratio - 1:.1%}（阈值 {comparison.threshold:.0%}，"
+        f"置信区间 {comparison.ci_low} ~ {comparison.ci_high}）"
+    )
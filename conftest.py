@@ -0,0 +1 @@
+pytest_plugins = ["benchmarks.pytest_plugin"]
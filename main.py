@@ -1,15 +1,176 @@
-from pipeline.batch_processor import process_all_projects
-from pipeline.csv_exporter import export_to_csv
+import argparse
+import os
+
+from pipeline.batch_processor import iter_all_projects
+from pipeline.columnar_exporter import convert_rows_file, export_file_metrics
+from pipeline.csv_exporter import StreamingExporter
+from pipeline.file_walker import FileManifest, get_project_versions
+from pipeline.metrics_cache import MetricsCache
+from pipeline.metrics_store import MetricsStore
+from pipeline.profiling import enable_profiling, finish_profiling
+from pipeline.progress import ProgressReporter
+from pipeline.prometheus import PipelineMetrics
+from pipeline.sharding import (merge_shard_stores, merge_shards, parse_shard, plan_shards, shard_path,
+                               shard_skip, shard_summary, write_plan)
+from pipeline.tracing import disable_tracing, enable_tracing, format_summary, write_chrome_trace
+from pipeline.git_source import iter_git_tags
+from pipeline.git_history import iter_git_history
 
 CONFIG = {
     "project_root": "./data",
-    "output_csv": "./output/project_metrics.csv"
+    "output_csv": "./output/project_metrics.csv",  # 以 .jsonl 结尾时输出 JSON Lines
+    "output_format": None,  # "csv" / "jsonl"，None 时按扩展名判断
+    "resume": False,  # True（或 --resume）时从上次中断处继续：按检查点跳过已导出的 (项目, 版本)；运行完成后删除检查点
+    "workers": 1,  # >1 时并行分析文件
+    "pool": "auto",  # 并行方式："process" 进程池 / "thread" 线程池 / "auto" 自由线程 CPython 上用线程池，否则用进程池
+    "readers": 0,  # >0 时用这么多个读取线程预取文件字节，读取与分析重叠进行（网络盘、冷缓存时明显更快，如 4）
+    "cache_path": None,  # 设为路径（如 ./output/metrics_cache.sqlite）时启用单文件指标缓存
+    "cache_max_entries": 500_000,
+    "manifest_path": None,  # 设为路径（如 ./output/file_manifest.json）时持久化文件 stat 清单，再次运行时未变的文件无需读取
+    "store_path": None,  # 设为路径（如 ./output/file_metrics.sqlite）时把逐文件结果写入可查询的 SQLite 指标库
+    "columnar_dir": None,  # 设为目录（如 ./output/columnar）时额外导出按项目分区的列式文件（需要 pyarrow）
+    "columnar_format": "parquet",  # "parquet" / "arrow"
+    "progress_interval": None,  # 设为秒数（如 10）时定期输出吞吐量 / 预计剩余时间 / 工作进程利用率
+    "progress_path": None,  # 设为路径（如 ./output/progress.jsonl）时把每次的进度快照追加为一行 JSON
+    "metrics_textfile": None,  # 设为路径（如 /var/lib/node_exporter/textfile/codequality.prom）时定期写出 Prometheus 指标
+    "metrics_port": None,  # 设为端口号时在 127.0.0.1 上提供 /metrics
+    "metrics_interval": 15,
+    "profile_dir": None,  # 设为目录（如 ./output/profile）时用 cProfile 剖析主进程与所有工作进程，合并后输出热点函数报告
+    "profile_top": 30,
+    "trace_path": None,  # 设为路径（如 ./output/trace.json）时记录各阶段耗时，导出 Chrome trace 并打印最慢的阶段与文件
+    "trace_memory": False,  # True 时用 tracemalloc 统计各阶段 / 各文件的峰值内存并列出分配最多的文件（明显变慢，仅用于排查）
+    "state_dir": None,  # 设为目录（如 ./output/incremental_state）启用增量模式
+    "git_repos": None,  # 设为 {项目名: 本地仓库路径} 时直接分析仓库标签，不读取 project_root
+    "git_tag_pattern": None,  # 只分析匹配的标签，如 "v*"
+    "git_history_ref": None  # 设为分支名（如 "main"）时对 git_repos 逐提交分析，每个提交输出一行
 }
 
-def main():
+def parse_args(argv=None):
+    """命令行参数覆盖 CONFIG 中的同名配置"""
+    parser = argparse.ArgumentParser(description="代码质量演化分析流水线")
+    parser.add_argument("--profile", nargs="?", const="./output/profile", metavar="DIR",
+                        help="剖析主进程与所有工作进程，合并结果并写出热点函数报告（默认目录 ./output/profile）")
+    parser.add_argument("--profile-top", type=int, help="报告中列出的函数个数")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断的运行继续，跳过检查点中已导出的版本（运行完成后检查点会被删除）")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="只分析 N 个分片中的第 i 个（按估计字节数确定性分配），输出写到带分片后缀的文件")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help="合并 N 个分片的输出（及指标库），结果与单机运行相同")
+    return parser.parse_args(argv)
+
+
+def merge_outputs(count):
+    """合并 --shard 1/N ... N/N 的输出到 CONFIG 中的路径"""
+    rows = merge_shards(CONFIG["output_csv"], count, fmt=CONFIG["output_format"])
+    if not rows:
+        return
+    print(f"已合并 {count} 个分片的 {rows} 个版本：{CONFIG['output_csv']}")
+    if CONFIG["store_path"]:
+        merge_shard_stores(CONFIG["store_path"], count)
+        print(f"已合并 {count} 个分片的指标库：{CONFIG['store_path']}")
+    if CONFIG["columnar_dir"]:
+        convert_rows_file(CONFIG["output_csv"], os.path.join(CONFIG["columnar_dir"], "versions"),
+                          fmt=CONFIG["columnar_format"])
+        if CONFIG["store_path"]:
+            with MetricsStore(CONFIG["store_path"]) as store:
+                export_file_metrics(store, os.path.join(CONFIG["columnar_dir"], "files"),
+                                    fmt=CONFIG["columnar_format"])
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        CONFIG["profile_dir"] = args.profile
+    if args.profile_top:
+        CONFIG["profile_top"] = args.profile_top
+    if args.resume:
+        CONFIG["resume"] = True
+    if args.merge_shards:
+        merge_outputs(args.merge_shards)
+        return
+    shard = args.shard
+    if shard is not None:
+        if CONFIG["git_repos"]:
+            raise ValueError("--shard 只支持按 project_root 分析，不支持 git_repos")
+        # 各分片写各自的输出、清单、指标库与增量状态，可在多台机器或同一台机器的多个进程上并行运行
+        for name in ("output_csv", "manifest_path", "store_path", "state_dir"):
+            if CONFIG[name]:
+                CONFIG[name] = shard_path(CONFIG[name], shard)
+        CONFIG["columnar_dir"] = None  # 列式文件在合并时导出
+
     print("开始执行数据流水线")
-    all_metrics = process_all_projects(CONFIG["project_root"])
-    export_to_csv(all_metrics, CONFIG["output_csv"])
+    if CONFIG["profile_dir"]:
+        enable_profiling(CONFIG["profile_dir"])
+    if CONFIG["trace_path"] or CONFIG["trace_memory"]:
+        enable_tracing(memory=CONFIG["trace_memory"])
+    cache = None
+    if CONFIG["cache_path"]:
+        cache = MetricsCache(CONFIG["cache_path"], max_entries=CONFIG["cache_max_entries"])
+    metrics = None
+    if CONFIG["metrics_textfile"] or CONFIG["metrics_port"] is not None:
+        # 只需要指标时不保留逐条计时记录，内存占用不随运行时间增长
+        metrics = PipelineMetrics(cache).attach(enable_tracing(keep=False))
+        metrics.start(CONFIG["metrics_textfile"], CONFIG["metrics_port"], CONFIG["metrics_interval"])
+    manifest = FileManifest(CONFIG["manifest_path"])
+    store = MetricsStore(CONFIG["store_path"]) if CONFIG["store_path"] else None
+    exporter = StreamingExporter(CONFIG["output_csv"], fmt=CONFIG["output_format"], resume=CONFIG["resume"])
+    if exporter.done:
+        print(f"从检查点恢复，跳过已导出的 {len(exporter.done)} 个版本")
+    progress = None
+    if CONFIG["progress_interval"]:
+        progress = ProgressReporter(CONFIG["progress_path"], interval=CONFIG["progress_interval"]).start()
+    exported = False
+    try:
+        skip = set(exporter.done)
+        if shard is not None:
+            plan = plan_shards(get_project_versions(CONFIG["project_root"]), manifest, shard.count)
+            write_plan(CONFIG["output_csv"], plan, shard)
+            for index, units, size in shard_summary(plan):
+                marker = "（本分片）" if index == shard.index else ""
+                print(f"分片 {index}/{shard.count}：{units} 个版本，{size / 1e6:.2f} MB{marker}")
+            skip |= shard_skip(plan, shard)
+        if CONFIG["git_repos"] and CONFIG["git_history_ref"]:
+            for project_name, repo_path in CONFIG["git_repos"].items():
+                exporter.write_rows(iter_git_history(repo_path, project_name, CONFIG["git_history_ref"],
+                                                     workers=CONFIG["workers"], cache=cache, skip=skip))
+        elif CONFIG["git_repos"]:
+            exporter.write_rows(iter_git_tags(CONFIG["git_repos"], CONFIG["git_tag_pattern"],
+                                              workers=CONFIG["workers"], cache=cache, skip=skip))
+        else:
+            exporter.write_rows(iter_all_projects(CONFIG["project_root"], workers=CONFIG["workers"],
+                                                  cache=cache, state_dir=CONFIG["state_dir"], skip=skip,
+                                                  manifest=manifest, store=store, progress=progress,
+                                                  readers=CONFIG["readers"], pool=CONFIG["pool"]))
+        # 分片的输出即使为空也保留，合并时按计划检查各分片负责的版本
+        exported = exporter.finish(keep_empty=shard is not None)
+    finally:
+        if progress is not None:
+            progress.close()
+        exporter.close()
+        manifest.save()
+        if store is not None:
+            store.close()
+        if cache is not None:
+            print(f"缓存命中：{cache.hits}，未命中：{cache.misses}")
+            cache.close()
+        if metrics is not None:
+            metrics.close()
+        finish_profiling(CONFIG["profile_top"])
+        tracer = disable_tracing()
+        if tracer is not None and tracer.keep:
+            if CONFIG["trace_path"]:
+                write_chrome_trace(tracer.events, CONFIG["trace_path"])
+            print(format_summary(tracer.events, peak_bytes=tracer.peak_bytes if tracer.memory else None))
+    if exported:
+        print(f"数据已导出到：{CONFIG['output_csv']}")
+    if exported and CONFIG["columnar_dir"]:
+        convert_rows_file(CONFIG["output_csv"], os.path.join(CONFIG["columnar_dir"], "versions"),
+                          fmt=CONFIG["columnar_format"])
+        if store is not None:
+            with store:  # 按需重新打开指标库，导出后关闭
+                export_file_metrics(store, os.path.join(CONFIG["columnar_dir"], "files"),
+                                    fmt=CONFIG["columnar_format"])
     print("流水线执行完成")
 
 if __name__ == "__main__":
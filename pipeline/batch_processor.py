@@ -1,70 +1,186 @@
-from typing import Dict, List, Any
-from .file_walker import get_python_files, get_project_versions
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from .file_walker import FileManifest, get_python_files, get_project_versions
 import os
+import sys
 
 
-from analyzers.loc import calculate_loc                  # LOC + 注释率
-from analyzers.complexity import calculate_complexity    # 圈复杂度
-from analyzers.dependency import analyze_dependencies    # 依赖分析（注意函数名！）
+from analyzers.engine import analyze_source             # 单次遍历：LOC + 复杂度 + 依赖
+from .metrics_cache import MetricsCache, content_key
+from .metrics_store import DETAIL_SECTIONS, details_from_metrics, failed_details
+from .incremental import VersionState, process_version_incremental, state_path
+from .prefetch import DEFAULT_DEPTH, Prefetched, prefetch
+from .profiling import profiling_dir, run_profiled
+from .scheduler import WorkerLoad, in_order, plan_batches, run_measured
+from .shared_results import Handle as SharedHandle, SharedResults, numpy_available, write_records
+from .progress import ProgressReporter, run_timed
+from .tracing import memory_tracing_enabled, merge_traced, run_captured, run_traced, span, tracing_enabled
 
-def process_single_version(version_dir: str) -> Dict[str, Any]:
-    """处理单个版本：整合所有指标，生成版本级汇总数据"""
-    py_files = get_python_files(version_dir)
-    if not py_files:
-        return {
-            "loc": 0,
-            "comment_rate": 0.0,
-            "avg_complexity": 0.0,
-            "total_imports": 0,
-            "avg_import_count": 0.0
-        }
+if TYPE_CHECKING:
+    from .metrics_store import MetricsStore
+
+# 版本汇总需要的指标分组
+VERSION_SECTIONS = ('loc', 'complexity', 'dependency')
+
+# 单文件紧凑结果：(code_lines, comment_rate, complexity, total_imports, import_count)
+FileMetrics = Tuple[int, float, int, int, int]
+
+# 并行分析的执行方式：process 进程池；thread 线程池（自由线程 CPython 上可用满多核，免去结果的 pickle）；
+# auto 在自由线程解释器上用线程池，启用 GIL 时用进程池
+POOLS = ('process', 'thread', 'auto')
+
+
+def gil_enabled() -> bool:
+    """当前解释器是否启用了 GIL（3.13 之前的版本总是启用）"""
+    check = getattr(sys, '_is_gil_enabled', None)
+    return True if check is None else check()
+
+
+def resolve_pool(pool: str) -> str:
+    """把 auto 解析为 process 或 thread；在启用 GIL 的解释器上强制使用线程池时给出提示"""
+    if pool not in POOLS:
+        raise ValueError(f"未知的执行方式：{pool}（可选：{', '.join(POOLS)}）")
+    if pool == 'auto':
+        return 'process' if gil_enabled() else 'thread'
+    if pool == 'thread' and gil_enabled():
+        print("提示：当前解释器启用了 GIL，线程池模式只能重叠读取与分析，分析本身无法用满多核")
+    return pool
+
+
+def analyze_content(data: bytes, details: bool = False) -> tuple:
+    """
+    分析一个文件的原始字节，返回 (紧凑指标元组, 错误信息)
+    语法错误时指标照常返回、错误信息为复杂度分析的报错；分析抛出异常时指标为 None
+    details=True 时同一次分析还给出指标库的明细：(紧凑指标元组, 错误信息, 明细)
+    """
+    try:
+        # 一次遍历得到所有指标（结果与各分析函数一致）
+        with span("analyze"):
+            metrics = analyze_source(data, DETAIL_SECTIONS if details else VERSION_SECTIONS)
+    except Exception as e:
+        return (None, str(e), failed_details(str(e))) if details else (None, str(e))
+
+    loc_dict = metrics['loc']
+    complexity_dict = metrics['complexity']
+    dep_dict = metrics['dependency']
+
+    # 从字典提取数值
+    record = (
+        loc_dict.get('code_lines', 0),
+        loc_dict.get('comment_rate', 0.0),
+        complexity_dict.get('cyclomatic_complexity', 0.0),
+        dep_dict.get('total_imports', 0),
+        dep_dict.get('import_count', 0),
+    )
+    if details:
+        return record, complexity_dict.get('error'), details_from_metrics(metrics)
+    return record, complexity_dict.get('error')
+
+
+def _analyze_path(file_path: str, known_key: Optional[str] = None,
+                  cache: Optional[MetricsCache] = None, details: bool = False):
+    """
+    读取并分析单个文件，返回 (紧凑指标元组, 内容键, 新缓存条目)
+    命中缓存时新缓存条目为 None；读取失败时内容键也为 None
+    known_key: 文件清单按 stat 判定未变时给出的内容键，命中缓存则不再读取文件
+    details: 写入指标库时为 True，总是计算内容键，新条目带上明细（见 analyze_content）
+    """
+    with span("file", file=file_path):
+        return _read_and_analyze(file_path, known_key, cache, details)
+
+
+def _read_and_analyze(file_path: str, known_key: Optional[str], cache: Optional[MetricsCache],
+                      details: bool = False):
+    if cache is not None and known_key is not None:
+        entry = cache.get(known_key)
+        if entry is not None:
+            record, error = entry
+            if record is None:
+                print(f"处理文件 {file_path} 失败: {error}")
+            return record, known_key, None
+
+    try:
+        with span("read") as read_span, open(file_path, 'rb') as f:
+            data = f.read()
+            read_span.annotate(bytes=len(data))
+    except Exception as e:
+        print(f"处理文件 {file_path} 失败: {str(e)}")
+        return None, None, None
+
+    key = new_entry = None
+    entry = None
+    if cache is not None or details:
+        key = content_key(data)
+    if cache is not None:
+        entry = cache.get(key)
+    if entry is None:
+        entry = new_entry = analyze_content(data, details)
+
+    record, error = entry[:2]
+    if record is None:
+        print(f"处理文件 {file_path} 失败: {error}")
+    return record, key, new_entry
+
+
+def analyze_file(file_path: str, cache: Optional[MetricsCache] = None,
+                 manifest: Optional[FileManifest] = None,
+                 store: Optional["MetricsStore"] = None) -> Optional[FileMetrics]:
+    """分析单个文件，返回紧凑的指标元组；读取或分析失败时返回 None（传入 store 时暂存明细）"""
+    known_key = manifest.get_key(file_path) if manifest is not None and cache is not None else None
+    return _keep_result(_analyze_path(file_path, known_key, cache, store is not None), cache, file_path, manifest,
+                        store)
 
+
+def _keep_result(result, cache: Optional[MetricsCache], file_path: str,
+                 manifest: Optional[FileManifest], store: Optional["MetricsStore"] = None) -> Optional[FileMetrics]:
+    """主进程中查询过缓存的结果：写入新缓存条目，并把内容键记入清单"""
+    record, key, new_entry = result
+    if cache is not None and new_entry is not None:
+        cache.put(key, *new_entry[:2])
+    _keep_details(store, file_path, key, new_entry)
+    if manifest is not None and key is not None:
+        manifest.set_key(file_path, key)
+    return record
+
+
+def _keep_details(store: Optional["MetricsStore"], file_path: str, key: Optional[str], new_entry) -> None:
+    """把内容键与新条目带回的明细暂存到指标库，记录该版本时直接写入"""
+    if store is not None and key is not None:
+        store.add_analyzed(file_path, key, new_entry[2] if new_entry is not None and len(new_entry) > 2 else None)
+
+
+def summarize_file_metrics(records: Iterable[Optional[FileMetrics]]) -> Dict[str, Any]:
+    """把按文件顺序排列的紧凑结果汇总为版本级指标（跳过失败的文件）"""
     # 初始化汇总变量（与返回指标对应）
     total_code_lines = 0
     total_comment_rate = 0.0
     total_complexity = 0.0
-    total_imports = 0          
-    total_import_count = 0     
+    total_imports = 0
+    total_import_count = 0
     valid_file_count = 0
 
-    for file_path in py_files:
-        try:
-            # 1. 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                file_content = f.read()
-
-            # 2. 调用所有函数，获取字典结果
-            loc_dict = calculate_loc(file_content)
-            complexity_dict = calculate_complexity(file_content)
-            dep_dict = analyze_dependencies(file_content)
-
-            # 3. 从字典提取数值
-            code_lines = loc_dict.get('code_lines', 0)
-            comment_rate = loc_dict.get('comment_rate', 0.0)
-            
-            complexity = complexity_dict.get('cyclomatic_complexity', 0.0)
-           
-            imports = dep_dict.get('total_imports', 0)
-            import_count = dep_dict.get('import_count', 0)
-
-            # 4. 累加汇总（文件 → 版本）
-            total_code_lines += code_lines
-            total_comment_rate += comment_rate
-            total_complexity += complexity
-            total_imports += imports
-            total_import_count += import_count
-            valid_file_count += 1
-
-        except Exception as e:
-            print(f"处理文件 {file_path} 失败: {str(e)}")
+    # 累加汇总（文件 → 版本）
+    for record in records:
+        if record is None:
             continue
+        code_lines, comment_rate, complexity, imports, import_count = record
+        total_code_lines += code_lines
+        total_comment_rate += comment_rate
+        total_complexity += complexity
+        total_imports += imports
+        total_import_count += import_count
+        valid_file_count += 1
 
-    # 5. 计算版本级平均值（避免除以 0）
+    # 计算版本级平均值（避免除以 0）
     avg_comment = round(total_comment_rate / valid_file_count, 4) if valid_file_count > 0 else 0.0
     avg_complex = round(total_complexity / valid_file_count, 4) if valid_file_count > 0 else 0.0
     avg_import = round(total_import_count / valid_file_count, 4) if valid_file_count > 0 else 0.0
 
-    # 6. 返回版本级最终指标（与 CSV 列名对应）
+    # 返回版本级最终指标（与 CSV 列名对应）
     return {
         "loc": total_code_lines,          # 版本总代码行数
         "comment_rate": avg_comment,     # 版本平均注释率
@@ -73,22 +189,539 @@ def process_single_version(version_dir: str) -> Dict[str, Any]:
         "avg_import_count": avg_import   # 版本文件平均 import 语句数
     }
 
-def process_all_projects(project_root: str) -> List[Dict[str, Any]]:
-    """批量处理 3 项目 × 5 版本，生成最终数据列表"""
+
+def process_single_version(version_dir: str, cache: Optional[MetricsCache] = None,
+                           manifest: Optional[FileManifest] = None,
+                           progress: Optional[ProgressReporter] = None,
+                           readers: int = 0, store: Optional["MetricsStore"] = None) -> Dict[str, Any]:
+    """
+    处理单个版本：整合所有指标，生成版本级汇总数据（传入 cache 时复用相同内容文件的结果）
+    传入 manifest 时文件列表取自清单，stat 未变的文件按已知内容键查缓存
+    传入 progress 时逐文件计入进度（调用方负责 begin_version / end_version）
+    readers > 0 时由这么多个读取线程预取文件，分析当前文件的同时读取后面的文件
+    传入 store 时分析的同时得到指标库的明细并暂存（由调用方 record_version 写入）
+    """
+    py_files = manifest.scan(version_dir) if manifest is not None else get_python_files(version_dir)
+    if not py_files:
+        return {
+            "loc": 0,
+            "comment_rate": 0.0,
+            "avg_complexity": 0.0,
+            "total_imports": 0,
+            "avg_import_count": 0.0
+        }
+
+    if readers > 0:
+        records = _analyze_streamed(py_files, cache, manifest, readers=readers, store=store)
+    else:
+        records = (analyze_file(file_path, cache, manifest, store) for file_path in py_files)
+    if progress is not None:
+        records = progress.track(records)
+    metrics = summarize_file_metrics(records)
+    if cache is not None:
+        cache.flush()
+    return metrics
+
+
+def process_all_projects(project_root: str, workers: int = 1,
+                         chunksize: Optional[int] = None,
+                         cache: Optional[MetricsCache] = None,
+                         state_dir: Optional[str] = None,
+                         manifest: Optional[FileManifest] = None,
+                         store: Optional["MetricsStore"] = None,
+                         progress: Optional[ProgressReporter] = None,
+                         readers: int = 0, pool: str = 'process') -> List[Dict[str, Any]]:
+    """
+    批量处理 3 项目 × 5 版本，生成最终数据列表
+    workers > 1 时使用进程池并行分析文件，行顺序与结果和串行完全一致
+    传入 cache 时，内容相同的文件在所有版本、所有项目间只分析一次
+    传入 state_dir 时启用增量模式：每个版本只分析相对上一版本新增或修改的文件
+    传入持久化的 manifest 时，再次运行可按 stat 判定未变的文件，不读取内容
+    传入 store 时把每个版本的逐文件结果写入 SQLite 指标库
+    传入 progress 时报告吞吐量、各项目预计完成时间与工作进程利用率
+    readers > 0 时使用两段式流水线：读取线程预取文件字节，进程池（workers > 1）或主进程只做分析，
+    在途的文件数与批次数都有上限，内存占用不随文件总数增长
+    pool: workers > 1 时的执行方式（见 POOLS）；线程池模式总是由主进程预取文件、查询缓存
+    """
+    return list(iter_all_projects(project_root, workers, chunksize, cache, state_dir,
+                                  manifest=manifest, store=store, progress=progress, readers=readers,
+                                  pool=pool))
+
+
+def iter_all_projects(project_root: str, workers: int = 1,
+                      chunksize: Optional[int] = None,
+                      cache: Optional[MetricsCache] = None,
+                      state_dir: Optional[str] = None,
+                      skip: Optional[Set[Tuple[str, str]]] = None,
+                      manifest: Optional[FileManifest] = None,
+                      store: Optional["MetricsStore"] = None,
+                      progress: Optional[ProgressReporter] = None,
+                      readers: int = 0, pool: str = 'process') -> Iterator[Dict[str, Any]]:
+    """
+    与 process_all_projects 相同，但每完成一个版本就产出一行，便于边处理边导出
+    skip: 已完成的 (项目名, 版本名)，这些版本不再处理也不产出
+    """
+    threads = resolve_pool(pool) == 'thread' and workers > 1
     projects = get_project_versions(project_root)
-    all_results = []
+    skip = skip or set()
+    # 没有传入时使用仅在内存中的清单，保证每个版本目录只遍历一次
+    manifest = manifest if manifest is not None else FileManifest()
+    if progress is not None:
+        progress.plan(projects, manifest, skip)
+    if state_dir is not None:
+        rows = _iter_projects_incremental(projects, state_dir, workers, cache, skip, manifest, progress, readers,
+                                          threads, store)
+    elif workers > 1:
+        rows = _iter_projects_parallel(projects, workers, chunksize, cache, skip, manifest, progress, readers,
+                                       threads, store)
+    else:
+        rows = _iter_projects_serial(projects, cache, skip, manifest, progress, readers, store)
+    if store is None:
+        return rows
+    return _record_versions(rows, projects, store, manifest)
+
 
+def _record_versions(rows: Iterator[Dict[str, Any]], projects: Dict[str, Dict[str, str]],
+                     store: "MetricsStore", manifest: FileManifest) -> Iterator[Dict[str, Any]]:
+    """每产出一行前，先把该版本的逐文件结果（分析时暂存的明细）写入指标库"""
+    for row in rows:
+        version_dir = projects[row["project_name"]][row["version"]]
+        store.record_version(row["project_name"], row["version"], version_dir,
+                             manifest.scan(version_dir), manifest)
+        yield row
+
+
+def _iter_projects_serial(projects: Dict[str, Dict[str, str]], cache: Optional[MetricsCache],
+                          skip: Set[Tuple[str, str]], manifest: FileManifest,
+                          progress: Optional[ProgressReporter] = None,
+                          readers: int = 0, store: Optional["MetricsStore"] = None) -> Iterator[Dict[str, Any]]:
     for project_name, versions in projects.items():
         print(f"开始处理项目：{project_name}")
         for version_name, version_dir in versions.items():
+            if (project_name, version_name) in skip:
+                continue
             print(f"  - 处理版本：{version_name}")
-            metrics = process_single_version(version_dir)
+            _begin_version(progress, project_name, version_name, manifest.scan(version_dir), manifest)
+            with span("version", project=project_name, version=version_name):
+                metrics = process_single_version(version_dir, cache, manifest, progress, readers, store)
+            if progress is not None:
+                progress.end_version()
             # 拼接项目名、版本名、文件数 + 指标数据
-            row = {
+            yield {
                 "project_name": project_name,
                 "version": version_name,
-                "file_count": len(get_python_files(version_dir)),
+                "file_count": len(manifest.scan(version_dir)),
                 **metrics
             }
-            all_results.append(row)
-    return all_results
+
+
+def _collect_result(result, cache: Optional[MetricsCache], file_path: str,
+                    manifest: Optional[FileManifest],
+                    store: Optional["MetricsStore"] = None) -> Optional[FileMetrics]:
+    """主进程侧：把子进程的新结果写入缓存（命中则只刷新访问时间），并把内容键记入清单"""
+    record, key, new_entry = result
+    _keep_details(store, file_path, key, new_entry)
+    if manifest is not None and key is not None:
+        manifest.set_key(file_path, key)
+    if cache is not None and key is not None:
+        if new_entry is None:
+            cache.hits += 1
+            cache.touch(key)
+        else:
+            cache.misses += 1
+            cache.put(key, *new_entry[:2])
+    return record
+
+
+def _iter_projects_parallel(projects: Dict[str, Dict[str, str]], workers: int,
+                            chunksize: Optional[int], cache: Optional[MetricsCache],
+                            skip: Set[Tuple[str, str]], manifest: FileManifest,
+                            progress: Optional[ProgressReporter] = None,
+                            readers: int = 0, threads: bool = False,
+                            store: Optional["MetricsStore"] = None) -> Iterator[Dict[str, Any]]:
+    """
+    并行版本：每个版本内按文件大小从大到小分块提交（小文件按字节数打包，每块最多 chunksize 个文件），
+    版本之间按遍历顺序衔接，取回结果后按文件顺序逐版本汇总，结束时报告各工作进程的负载
+    子进程只读查询缓存，新结果由主进程统一写入缓存
+    有 NumPy 时各文件的指标由子进程直接写入共享内存缓冲区（只带回内容键与错误信息），按版本向量化汇总
+    readers > 0 时由主进程的读取线程预取文件、查询缓存，子进程只分析未命中的文件内容
+    threads=True 时用线程池代替进程池（总是预取，缓存只在主线程访问）
+    """
+    if threads:
+        readers = max(readers, 1)
+    units = []
+    all_files = []
+    for project_name, versions in projects.items():
+        for version_name, version_dir in versions.items():
+            if (project_name, version_name) in skip:
+                continue
+            with span("plan", project=project_name, version=version_name):
+                py_files = manifest.scan(version_dir)
+            units.append((project_name, version_name, py_files))
+            all_files.extend(py_files)
+
+    if chunksize is None:
+        chunksize = _default_chunksize(len(all_files), workers)
+    # 只在版本内重排：大文件在版本开始时就提交，版本之间不等待，结果仍能逐版本产出
+    sizes = _file_sizes(all_files, manifest)
+    batches = []
+    offset = 0
+    for _, _, py_files in units:
+        batches.extend(plan_batches(sizes[offset:offset + len(py_files)], workers, chunksize, offset))
+        offset += len(py_files)
+    load = WorkerLoad('线程' if threads else '进程')
+
+    if cache is not None:
+        cache.conn  # 先在主进程建好数据库，避免子进程并发建表
+
+    shared = SharedResults(len(all_files)) if numpy_available() else None
+    # 先关闭进程池，再释放共享缓冲区
+    with shared if shared is not None else nullcontext(), _new_executor(workers, progress, threads) as executor:
+        if readers > 0:
+            records = _analyze_streamed(all_files, cache, manifest, executor, batches, 2 * workers, readers,
+                                        progress, load, shared, store)
+        else:
+            known_keys = _known_keys(all_files, cache, manifest)
+            results = _map_paths(executor, all_files, known_keys, cache, batches, sizes, 2 * workers, load,
+                                 progress, shared, store is not None)
+            records = (_collect_result(result, cache, file_path, manifest, store)
+                       for file_path, result in zip(all_files, results))
+        current_project = None
+        start = 0
+        for project_name, version_name, py_files in units:
+            if project_name != current_project:
+                print(f"开始处理项目：{project_name}")
+                current_project = project_name
+            print(f"  - 处理版本：{version_name}")
+            _begin_version(progress, project_name, version_name, py_files, manifest)
+            with span("version", project=project_name, version=version_name):
+                version_records = islice(records, len(py_files))
+                if progress is not None:
+                    version_records = progress.track(version_records)
+                if shared is None:
+                    metrics = summarize_file_metrics(version_records)
+                else:
+                    # 取完本版本的结果（写缓存、清单与进度）后，指标已全部在缓冲区中
+                    deque(version_records, maxlen=0)
+                    metrics = shared.summarize(start, start + len(py_files))
+                start += len(py_files)
+                if cache is not None:
+                    cache.flush()
+            if progress is not None:
+                progress.end_version()
+            yield {
+                "project_name": project_name,
+                "version": version_name,
+                "file_count": len(py_files),
+                **metrics
+            }
+    print(load.format())
+
+
+def _begin_version(progress: Optional[ProgressReporter], project_name: str, version_name: str,
+                   py_files: List[str], manifest: FileManifest) -> None:
+    if progress is not None:
+        progress.begin_version(project_name, version_name, [manifest.size(path) for path in py_files])
+
+
+def _new_executor(workers: int, progress: Optional[ProgressReporter] = None, threads: bool = False) -> Executor:
+    """报告进度时使用记录工作者忙碌时间的进程池；threads=True 时为线程池"""
+    if progress is not None:
+        return progress.worker_pool(workers, threads)
+    if threads:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze")
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _default_chunksize(file_count: int, workers: int) -> int:
+    # 每块文件数的上限：每个进程大约分到 4 块（小文件还会按字节数进一步拆分）
+    return max(1, min(256, file_count // (workers * 4)))
+
+
+def _file_sizes(paths: List[str], manifest: Optional[FileManifest]) -> List[int]:
+    """遍历时记录的文件大小（没有清单时取 stat，取不到按 0 计）"""
+    if manifest is not None:
+        return [manifest.size(file_path) for file_path in paths]
+    sizes = []
+    for file_path in paths:
+        try:
+            sizes.append(os.path.getsize(file_path))
+        except OSError:
+            sizes.append(0)
+    return sizes
+
+
+def _worker_task(func: Callable, progress: Optional[ProgressReporter] = None,
+                 threads: bool = False) -> Tuple[Callable, bool]:
+    """
+    包装提交给进程池的任务，返回 (任务, 结果是否需经 merge_traced 取回)
+    启用计时时子进程的计时记录随结果带回，在取回结果时并入主进程；
+    启用剖析时每个工作进程剖析自己执行的分析任务；报告进度时累计工作进程的忙碌时间
+    线程池中的任务同样把计时记录随结果带回，由主线程在所属版本的 span 内并入；
+    cProfile 只剖析主线程，线程中的分析任务不计入剖析结果
+    """
+    if progress is not None:
+        func = partial(run_timed, func)
+    if threads:
+        return (partial(run_captured, func), True) if tracing_enabled() else (func, False)
+    if profiling_dir() is not None:
+        func = partial(run_profiled, profiling_dir(), func)
+    if not tracing_enabled():
+        return func, False
+    return partial(run_traced, memory_tracing_enabled(), func), True
+
+
+def _submit_bounded(batches: Iterable[List[int]], submit: Callable[[List[int]], Any],
+                    max_inflight: int) -> Iterator[Tuple[List[int], Any]]:
+    """按顺序提交各块，同时在途的块不超过 max_inflight，按提交顺序产出 (块, submit 的返回值)"""
+    inflight = deque()
+    for batch in batches:
+        inflight.append((batch, submit(batch)))
+        if len(inflight) >= max_inflight:
+            yield inflight.popleft()
+    while inflight:
+        yield inflight.popleft()
+
+
+def _measured_result(future: Future, traced: bool, load: WorkerLoad, size: int) -> list:
+    """取回一块任务的结果，并把耗时计入执行它的工作进程"""
+    value = future.result()
+    pid, seconds, entries = merge_traced(value) if traced else value
+    load.add(pid, seconds, len(entries), size)
+    return entries
+
+
+def _analyze_path_batch(paths: List[str], known_keys: List[Optional[str]], indices: Optional[List[int]] = None,
+                        cache: Optional[MetricsCache] = None, shared: Optional[SharedHandle] = None,
+                        details: bool = False) -> list:
+    results = [_analyze_path(file_path, known_key, cache, details) for file_path, known_key in zip(paths, known_keys)]
+    if shared is None:
+        return results
+    # 指标写入共享缓冲区的第 indices 行，只带回内容键与新条目的错误信息（及明细）
+    write_records(shared, indices, (record for record, _, _ in results))
+    return [(None, key, None if new_entry is None else (None,) + new_entry[1:]) for _, key, new_entry in results]
+
+
+def _restore_entry(shared: SharedResults, index: int, result, cache: Optional[MetricsCache]):
+    """需要写入缓存的新条目从共享缓冲区取回指标"""
+    record, key, new_entry = result
+    if cache is not None and new_entry is not None:
+        new_entry = (shared.record(index),) + new_entry[1:]
+    return record, key, new_entry
+
+
+def _map_paths(executor: ProcessPoolExecutor, paths: List[str], known_keys: List[Optional[str]],
+               cache: Optional[MetricsCache], batches: List[List[int]], sizes: List[int],
+               max_batches: int, load: WorkerLoad,
+               progress: Optional[ProgressReporter] = None,
+               shared: Optional[SharedResults] = None, details: bool = False) -> Iterator[Any]:
+    """
+    在进程池中读取并分析文件：按 batches 的顺序逐块提交，按文件顺序产出结果
+    传入 shared 时 paths 的下标即缓冲区的行号，产出的结果中指标为 None（已写入缓冲区）
+    """
+    handle = shared.handle if shared is not None else None
+    task, traced = _worker_task(partial(run_measured, partial(_analyze_path_batch, cache=cache, shared=handle,
+                                                              details=details)), progress)
+
+    def submit(batch):
+        return executor.submit(task, [paths[index] for index in batch], [known_keys[index] for index in batch],
+                               batch if shared is not None else None)
+
+    def finished():
+        for batch, future in _submit_bounded(batches, submit, max_batches):
+            entries = _measured_result(future, traced, load, sum(sizes[index] for index in batch))
+            if shared is not None:
+                entries = [_restore_entry(shared, index, result, cache) for index, result in zip(batch, entries)]
+            yield from zip(batch, entries)
+
+    return in_order(finished())
+
+
+def _analyze_batch(files: List[Tuple[str, bytes]], indices: Optional[List[int]] = None,
+                   shared: Optional[SharedHandle] = None, details: bool = False) -> List[tuple]:
+    """工作进程侧：分析一批已读取的文件内容；传入 shared 时指标写入缓冲区，只带回错误信息（及明细）"""
+    entries = []
+    for file_path, data in files:
+        with span("file", file=file_path):
+            entries.append(analyze_content(data, details))
+    if shared is None:
+        return entries
+    write_records(shared, indices, (entry[0] for entry in entries))
+    return [(None,) + entry[1:] for entry in entries]
+
+
+def _prefetched_result(item: Prefetched, new_entry=None):
+    """预取结果与分析结果合并为 (紧凑指标元组, 内容键, 新缓存条目)，与 _analyze_path 的返回一致"""
+    if item.error is not None:
+        print(f"处理文件 {item.path} 失败: {item.error}")
+        return None, None, None
+    record, error = (new_entry if new_entry is not None else item.entry)[:2]
+    if record is None:
+        print(f"处理文件 {item.path} 失败: {error}")
+    return record, item.key, new_entry
+
+
+def _analyze_prefetched_serial(items: Iterable[Prefetched], details: bool = False) -> Iterator[Tuple[str, Any]]:
+    """在主进程中逐个分析预取的文件，产出 (文件路径, 结果)"""
+    for item in items:
+        with span("file", file=item.path):
+            result = _prefetched_result(item, analyze_content(item.data, details) if item.data is not None else None)
+        yield item.path, result
+
+
+def _analyze_prefetched(items: Iterable[Prefetched], executor: Executor,
+                        batches: List[List[int]], max_batches: int, load: WorkerLoad,
+                        progress: Optional[ProgressReporter] = None,
+                        shared: Optional[SharedResults] = None,
+                        details: bool = False) -> Iterator[Tuple[int, Tuple[str, Any]]]:
+    """
+    items 按 batches 展开后的顺序到达；逐块把未命中缓存的文件内容提交给进程池，
+    同时在途的块不超过 max_batches，产出 (文件下标, (文件路径, 结果))
+    传入 shared 时子进程把指标写入缓冲区，命中缓存或读取失败的文件由主进程写入
+    """
+    handle = shared.handle if shared is not None else None
+    task, traced = _worker_task(partial(run_measured, partial(_analyze_batch, shared=handle, details=details)),
+                                progress, isinstance(executor, ThreadPoolExecutor))
+    items = iter(items)
+
+    def submit(batch):
+        batch_items = list(islice(items, len(batch)))
+        files = [(item.path, item.data) for item in batch_items if item.data is not None]
+        indices = None
+        if shared is not None:
+            indices = [index for index, item in zip(batch, batch_items) if item.data is not None]
+        future = executor.submit(task, files, indices) if files else None
+        size = sum(len(data) for _, data in files)
+        # 内容已发送给子进程，不再持有
+        return [item._replace(data=b"") if item.data is not None else item for item in batch_items], size, future
+
+    for batch, (batch_items, size, future) in _submit_bounded(batches, submit, max_batches):
+        entries = iter(_measured_result(future, traced, load, size) if future is not None else ())
+        for index, item in zip(batch, batch_items):
+            if item.data is not None:
+                new_entry = next(entries)
+                if shared is not None:
+                    new_entry = (shared.record(index),) + new_entry[1:]
+                yield index, (item.path, _prefetched_result(item, new_entry))
+                continue
+            with span("file", file=item.path):
+                result = _prefetched_result(item)
+            if shared is not None:
+                shared.set(index, result[0])
+            yield index, (item.path, result)
+
+
+def _analyze_streamed(paths: List[str], cache: Optional[MetricsCache], manifest: Optional[FileManifest],
+                      executor: Optional[Executor] = None,
+                      batches: Optional[List[List[int]]] = None, max_batches: int = 2,
+                      readers: int = 1, progress: Optional[ProgressReporter] = None,
+                      load: Optional[WorkerLoad] = None,
+                      shared: Optional[SharedResults] = None,
+                      store: Optional["MetricsStore"] = None) -> Iterator[Optional[FileMetrics]]:
+    """
+    两段式流水线：读取线程预取文件字节并查询缓存，进程池（没有时为主进程）分析未命中的内容，
+    按文件顺序产出紧凑结果。文件按 batches 的顺序预取和提交，预取最多领先 depth 个文件，
+    进程池中最多 max_batches 块
+    """
+    known_keys = _known_keys(paths, cache, manifest)
+    if executor is None:
+        items = prefetch(paths, known_keys, cache, readers, keys=store is not None)
+        results = _analyze_prefetched_serial(items, store is not None)
+    else:
+        order = [index for batch in batches for index in batch]
+        depth = max(DEFAULT_DEPTH, 2 * max(map(len, batches), default=0))
+        items = prefetch([paths[index] for index in order], [known_keys[index] for index in order],
+                         cache, readers, depth, keys=store is not None)
+        results = in_order(_analyze_prefetched(items, executor, batches, max_batches,
+                                               load if load is not None else WorkerLoad(), progress, shared,
+                                               store is not None))
+    for file_path, result in results:
+        yield _keep_result(result, cache, file_path, manifest, store)
+
+
+def _known_keys(paths: List[str], cache: Optional[MetricsCache],
+                manifest: Optional[FileManifest]) -> List[Optional[str]]:
+    """清单中已知的内容键（只有使用缓存时才有意义）"""
+    if cache is None or manifest is None:
+        return [None] * len(paths)
+    return [manifest.get_key(file_path) for file_path in paths]
+
+
+def _analyze_paths(paths: List[str], cache: Optional[MetricsCache],
+                   executor: Optional[Executor], workers: int,
+                   manifest: Optional[FileManifest] = None,
+                   progress: Optional[ProgressReporter] = None,
+                   readers: int = 0, load: Optional[WorkerLoad] = None,
+                   store: Optional["MetricsStore"] = None) -> List[Optional[FileMetrics]]:
+    """按顺序分析一组文件（有进程池时按文件大小调度并行分析，readers > 0 或使用线程池时预取文件）"""
+    if isinstance(executor, ThreadPoolExecutor):
+        readers = max(readers, 1)
+    if executor is None:
+        if readers > 0:
+            return list(_analyze_streamed(paths, cache, manifest, readers=readers, store=store))
+        return [analyze_file(file_path, cache, manifest, store) for file_path in paths]
+    load = load if load is not None else WorkerLoad()
+    sizes = _file_sizes(paths, manifest)
+    batches = plan_batches(sizes, workers, _default_chunksize(len(paths), workers))
+    if readers > 0:
+        return list(_analyze_streamed(paths, cache, manifest, executor, batches, 2 * workers, readers,
+                                      progress, load, store=store))
+    results = _map_paths(executor, paths, _known_keys(paths, cache, manifest), cache, batches, sizes,
+                         2 * workers, load, progress, details=store is not None)
+    return [_collect_result(result, cache, file_path, manifest, store) for file_path, result in zip(paths, results)]
+
+
+def _iter_projects_incremental(projects: Dict[str, Dict[str, str]], state_dir: str,
+                               workers: int, cache: Optional[MetricsCache],
+                               skip: Set[Tuple[str, str]], manifest: FileManifest,
+                               progress: Optional[ProgressReporter] = None,
+                               readers: int = 0, threads: bool = False,
+                               store: Optional["MetricsStore"] = None) -> Iterator[Dict[str, Any]]:
+    """
+    增量版本：每个版本以自身上次保存的状态（没有时以前一个版本的状态）为基准，
+    只分析清单中新增或修改的文件，并保存本版本的逐文件结果供下次使用
+    跳过的版本不会加载到内存，下一个版本需要时从其保存的状态文件读取
+    """
+    executor = _new_executor(workers, progress, threads) if workers > 1 else None
+    if executor is not None and cache is not None:
+        cache.conn  # 先在主进程建好数据库，避免子进程并发建表
+    load = WorkerLoad('线程' if threads else '进程')
+    analyze_paths = partial(_analyze_paths, cache=cache, executor=executor, workers=workers, manifest=manifest,
+                            progress=progress, readers=readers, load=load, store=store)
+
+    try:
+        for project_name, versions in projects.items():
+            print(f"开始处理项目：{project_name}")
+            previous: Optional[VersionState] = None
+            previous_path: Optional[str] = None
+            for version_name, version_dir in versions.items():
+                path = state_path(state_dir, project_name, version_name)
+                if (project_name, version_name) in skip:
+                    previous, previous_path = None, path
+                    continue
+                print(f"  - 处理版本：{version_name}")
+                _begin_version(progress, project_name, version_name, manifest.scan(version_dir), manifest)
+                with span("version", project=project_name, version=version_name):
+                    py_files = manifest.scan(version_dir)
+                    if previous is None and previous_path is not None:
+                        previous = VersionState.load(previous_path)
+                    baseline = VersionState.load(path) or previous
+                    state = process_version_incremental(version_dir, py_files, baseline, analyze_paths, manifest)
+                    state.save(path)
+                    if cache is not None:
+                        cache.flush()
+                if progress is not None:
+                    progress.end_version()  # 增量模式只分析变化的文件，按整个版本计入
+                previous, previous_path = state, path
+
+                yield {
+                    "project_name": project_name,
+                    "version": version_name,
+                    "file_count": len(py_files),
+                    **state.metrics()
+                }
+        if executor is not None:
+            print(load.format())
+    finally:
+        if executor is not None:
+            executor.shutdown()
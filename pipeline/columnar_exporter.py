@@ -0,0 +1,153 @@
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from .csv_exporter import FIXED_FIELDNAMES
+
+if TYPE_CHECKING:
+    from .metrics_store import MetricsStore
+
+# 支持的列式格式 -> pyarrow.dataset 格式名
+COLUMNAR_FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+
+# 文件扩展名（读取时据此判断格式）
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# 按项目分区（hive 风格目录：project_name=flask/part-0.parquet）
+PARTITION_COLUMN = "project_name"
+
+# 逐文件明细每批读取的行数
+FILE_BATCH_ROWS = 65_536
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise ImportError("列式导出需要 pyarrow，请先执行 pip install pyarrow") from e
+    return pyarrow
+
+
+def version_schema():
+    """版本级指标的列类型（列与 FIXED_FIELDNAMES 相同）"""
+    pa = _require_pyarrow()
+    types = {
+        "project_name": pa.string(),
+        "version": pa.string(),
+        "file_count": pa.int64(),
+        "loc": pa.int64(),
+        "comment_rate": pa.float64(),
+        "avg_complexity": pa.float64(),
+        "total_imports": pa.int64(),
+        "avg_import_count": pa.float64(),
+    }
+    return pa.schema([(name, types[name]) for name in FIXED_FIELDNAMES])
+
+
+def file_schema():
+    """逐文件明细的列类型（列与指标库 file_metrics 视图相同）"""
+    pa = _require_pyarrow()
+    from .metrics_store import DETAIL_COLUMNS
+
+    sql_types = {"INTEGER": pa.int64(), "REAL": pa.float64(), "TEXT": pa.string()}
+    return pa.schema(
+        [("project_name", pa.string()), ("version", pa.string()), ("path", pa.string()),
+         ("content_key", pa.string()), ("size", pa.int64())]
+        + [(name, sql_types[sql_type]) for name, section, sql_type in DETAIL_COLUMNS]
+        + [("error", pa.string())]
+    )
+
+
+def _write_dataset(data, schema, output_dir: str, fmt: str) -> None:
+    """按项目分区写出（覆盖同名分区中已有的文件），使用 zstd 压缩"""
+    pa = _require_pyarrow()
+    ds = pa.dataset
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"不支持的列式格式：{fmt}")
+    file_format = ds.ParquetFileFormat() if fmt == "parquet" else ds.IpcFileFormat()
+    file_options = file_format.make_write_options(compression="zstd")
+    ds.write_dataset(
+        data, output_dir, schema=schema, format=file_format, file_options=file_options,
+        partitioning=ds.partitioning(pa.schema([schema.field(PARTITION_COLUMN)]), flavor="hive"),
+        basename_template="part-{i}" + FORMAT_EXTENSIONS[fmt],
+        existing_data_behavior="delete_matching",
+    )
+
+
+def export_to_columnar(data: List[Dict[str, Any]], output_dir: str, fmt: str = "parquet") -> None:
+    """将版本级结果按项目分区导出为 Parquet 或 Arrow IPC"""
+    if not data:
+        print("无数据可导出")
+        return
+    pa = _require_pyarrow()
+    schema = version_schema()
+    table = pa.Table.from_pylist([{name: row.get(name) for name in schema.names} for row in data],
+                                 schema=schema)
+    _write_dataset(table, schema, output_dir, fmt)
+    print(f"数据已导出到：{output_dir}")
+
+
+def convert_rows_file(input_path: str, output_dir: str, fmt: str = "parquet") -> None:
+    """
+    把 export_to_csv / StreamingExporter 写出的 CSV 或 JSON Lines 转为列式格式
+    直接由 pyarrow 按列类型解析，不经过 Python 字典
+    """
+    pa = _require_pyarrow()
+    schema = version_schema()
+    if input_path.endswith((".jsonl", ".ndjson")):
+        import pyarrow.json as pa_json
+        table = pa_json.read_json(input_path, parse_options=pa_json.ParseOptions(explicit_schema=schema))
+    else:
+        import pyarrow.csv as pa_csv
+        table = pa_csv.read_csv(input_path, convert_options=pa_csv.ConvertOptions(column_types=schema))
+    if table.num_rows == 0:
+        print("无数据可导出")
+        return
+    _write_dataset(table.select(schema.names), schema, output_dir, fmt)
+    print(f"数据已导出到：{output_dir}")
+
+
+def export_file_metrics(store: "MetricsStore", output_dir: str, fmt: str = "parquet",
+                        batch_rows: int = FILE_BATCH_ROWS) -> None:
+    """把指标库中的逐文件明细分批读出并按项目分区导出，内存占用与总行数无关"""
+    pa = _require_pyarrow()
+    schema = file_schema()
+    store.conn  # 确保库与视图已建好
+    # pyarrow 在自己的线程中消费批次，单独开一个只读连接
+    conn = sqlite3.connect(store.path, check_same_thread=False)
+
+    def batches() -> Iterator[Any]:
+        cursor = conn.execute(
+            f"SELECT {', '.join(schema.names)} FROM file_metrics ORDER BY project_name, version, path"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            )
+
+    try:
+        _write_dataset(batches(), schema, output_dir, fmt)
+    finally:
+        conn.close()
+    print(f"逐文件明细已导出到：{output_dir}")
+
+
+def detect_format(path: str) -> Optional[str]:
+    """按扩展名或目录内容判断列式格式；CSV 等其他文件返回 None"""
+    if os.path.isdir(path):
+        for _, _, files in os.walk(path):
+            for file_name in files:
+                for fmt, extension in FORMAT_EXTENSIONS.items():
+                    if file_name.endswith(extension):
+                        return fmt
+        return None
+    for fmt, extension in FORMAT_EXTENSIONS.items():
+        if path.endswith(extension):
+            return fmt
+    return None
@@ -1,22 +1,178 @@
 import csv
+import io
+import json
 import os
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .tracing import span
+
+# 输出列（CSV 与 JSON Lines 共用）
+FIXED_FIELDNAMES = [
+    "project_name", "version", "file_count",
+    "loc", "comment_rate", "avg_complexity", "total_imports", "avg_import_count"
+]
+
 
 def export_to_csv(data: List[Dict], output_path: str) -> None:
     """将结果导出为CSV文件"""
     if not data:
         print("无数据可导出")
         return
-    
+
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fixed_fieldnames = [
-        "project_name", "version", "file_count",
-        "loc", "comment_rate", "avg_complexity", "total_imports", "avg_import_count"
-    ]
-    
+    fixed_fieldnames = FIXED_FIELDNAMES
+
     with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
         writer = csv.DictWriter(f, fieldnames=fixed_fieldnames)
         writer.writeheader()
         writer.writerows(data)
-    
-    print(f"数据已导出到：{output_path}")
\ No newline at end of file
+
+    print(f"数据已导出到：{output_path}")
+
+
+class StreamingExporter:
+    """
+    边处理边导出：每个版本完成后立即追加一行（CSV 或 JSON Lines），
+    并在检查点文件中记录已完成的 (项目, 版本) 及写完后的文件偏移。
+    重启时先把输出截断到最后一个检查点的偏移（丢弃写了一半的行），
+    done 中的版本可直接跳过，继续追加；全部写完后调用 finish() 删除检查点。
+    """
+
+    def __init__(self, output_path: str, fmt: Optional[str] = None,
+                 checkpoint_path: Optional[str] = None, resume: bool = True):
+        self.output_path = output_path
+        self.fmt = _resolve_format(output_path, fmt)
+        self.checkpoint_path = checkpoint_path or _default_checkpoint_path(output_path)
+        self.done: Set[Tuple[str, str]] = set()
+        self._buffer = io.StringIO()
+        self._csv_writer = csv.writer(self._buffer, lineterminator="\r\n")
+
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        offset = checkpoint_size = 0
+        if resume:
+            self.done, offset, checkpoint_size = _read_checkpoint(self.checkpoint_path)
+
+        # 检查点同样截断到最后一个完整行之后，继续追加的记录不会接在写了一半的行后面
+        with open(self.checkpoint_path, "ab") as f:
+            f.truncate(checkpoint_size)
+
+        # 截断到最后一个完整行之后（新文件则创建）
+        with open(output_path, "ab") as f:
+            f.truncate(offset)
+        self._file = open(output_path, "ab")
+        self._checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+        if offset == 0 and self.fmt == "csv":
+            self._file.write(self._csv_line(FIXED_FIELDNAMES, bom=True))
+            self._file.flush()
+
+    def _csv_line(self, values: Iterable[Any], bom: bool = False) -> bytes:
+        # 与 export_to_csv 的 csv.DictWriter 相同的方言（excel，\r\n 行尾）与 utf-8-sig 编码
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._csv_writer.writerow(values)
+        line = self._buffer.getvalue()
+        return ("\ufeff" + line if bom else line).encode("utf-8")
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        """追加一行并记录检查点"""
+        with span("export", project=row["project_name"], version=row["version"]):
+            if self.fmt == "csv":
+                self._file.write(self._csv_line(row.get(name, "") for name in FIXED_FIELDNAMES))
+            else:
+                record = {name: row.get(name) for name in FIXED_FIELDNAMES}
+                self._file.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._file.flush()
+
+            key = (row["project_name"], row["version"])
+            self.done.add(key)
+            self._checkpoint.write(json.dumps({
+                "project_name": key[0], "version": key[1], "offset": self._file.tell()
+            }, ensure_ascii=False) + "\n")
+            self._checkpoint.flush()
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for row in rows:
+            self.write_row(row)
+            count += 1
+        return count
+
+    def finish(self, keep_empty: bool = False) -> bool:
+        """
+        全部版本已写完：关闭文件并删除检查点，返回是否导出了数据
+        检查点只用于从中断处继续，完整的输出不再需要它；否则下次恢复运行会跳过所有版本、保留旧的结果
+        与 export_to_csv 一致，没有任何版本时提示“无数据可导出”并删除只有表头的输出（keep_empty=True 时保留）
+        """
+        self.close()
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        if self.done or keep_empty:
+            return True
+        os.remove(self.output_path)
+        print("无数据可导出")
+        return False
+
+    def close(self) -> None:
+        self._file.close()
+        self._checkpoint.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_exported_rows(output_path: str, fmt: Optional[str] = None,
+                       checkpoint_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    读回 StreamingExporter 写出的行（CSV 的值为字符串，JSON Lines 保持原类型）
+    有检查点时按其偏移截断写了一半的行：只返回检查点记录过的完整行
+    """
+    fmt = _resolve_format(output_path, fmt)
+    checkpoint_path = checkpoint_path or _default_checkpoint_path(output_path)
+    with open(output_path, "rb") as f:
+        data = f.read()
+    if os.path.exists(checkpoint_path):
+        data = data[:_read_checkpoint(checkpoint_path)[1]]
+    text = data.decode("utf-8-sig")
+    if fmt == "jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return list(csv.DictReader(io.StringIO(text, newline="")))
+
+
+def _resolve_format(output_path: str, fmt: Optional[str]) -> str:
+    """导出格式：未指定时 .jsonl / .ndjson 为 JSON Lines，其余为 CSV"""
+    fmt = fmt or ("jsonl" if output_path.endswith((".jsonl", ".ndjson")) else "csv")
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    return fmt
+
+
+def _default_checkpoint_path(output_path: str) -> str:
+    return output_path + ".checkpoint.jsonl"
+
+
+def _read_checkpoint(checkpoint_path: str) -> Tuple[Set[Tuple[str, str]], int, int]:
+    """
+    读取检查点，返回 (已完成的 (项目, 版本), 最后一个完整版本写完后的文件偏移, 完整检查点行的总字节数)
+    没有检查点时为 (空集, 0, 0)
+    """
+    done, offset, size = set(), 0, 0
+    if not os.path.exists(checkpoint_path):
+        return done, offset, size
+    with open(checkpoint_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # 写了一半的检查点行
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            done.add((entry["project_name"], entry["version"]))
+            offset = entry["offset"]
+            size += len(line)
+    return done, offset, size
@@ -1,15 +1,128 @@
+import json
 import os
-from typing import List
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .tracing import span
+
+# 文件 stat 快照：(大小, 修改时间 ns, inode)；stat 失败时为 (-1, 0, 0)
+FileStat = Tuple[int, int, int]
+
+# 修改时间距今不足该值的文件不记录内容键（同一时间粒度内再次修改时 stat 可能不变）
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def scan_python_files(root_dir: str) -> Dict[str, FileStat]:
+    """
+    用 os.scandir 遍历目录，返回 Python 文件绝对路径 -> stat 快照
+    过滤规则与遍历顺序和 os.walk 版的 get_python_files 完全一致（不进入目录符号链接）
+    """
+    with span("walk", dir=root_dir):
+        return _scan(root_dir)
+
+
+def _scan(root_dir: str) -> Dict[str, FileStat]:
+    python_files = {}
+    stack = [root_dir]
+    while stack:
+        top = stack.pop()
+        try:
+            scandir_it = os.scandir(top)
+        except OSError:
+            continue
+        dirs = []
+        with scandir_it:
+            for entry in scandir_it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if not entry.name.startswith('.') and entry.name not in ('__pycache__', 'tests'):
+                        dirs.append(entry)
+                elif entry.name.endswith('.py') and not entry.name.startswith('.'):
+                    try:
+                        st = entry.stat()
+                        file_stat = (st.st_size, st.st_mtime_ns, st.st_ino)
+                    except OSError:
+                        file_stat = (-1, 0, 0)
+                    python_files[os.path.abspath(entry.path)] = file_stat
+        # 先处理当前目录的文件，再按顺序深入子目录
+        for entry in reversed(dirs):
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if not is_symlink:
+                stack.append(entry.path)
+    return python_files
+
 
 def get_python_files(root_dir: str) -> List[str]:
     """遍历指定目录，获取所有Python文件路径（过滤无关目录）"""
-    python_files = []
-    for root, dirs, files in os.walk(root_dir):
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('__pycache__', 'tests')]
-        for file in files:
-            if file.endswith('.py') and not file.startswith('.'):
-                python_files.append(os.path.abspath(os.path.join(root, file)))
-    return python_files
+    return list(scan_python_files(root_dir))
+
+
+class FileManifest:
+    """
+    版本目录的文件清单：每个 Python 文件的 stat 快照与内容键
+    同一次运行内每个版本目录只遍历一次；传入 path 时清单在运行之间持久化，
+    再次运行时 stat 未变的文件直接复用上次的内容键，无需读取文件内容
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        # 版本目录 -> {文件绝对路径: [大小, 修改时间 ns, inode, 内容键]}
+        self._dirs: Dict[str, Dict[str, list]] = {}
+        self._files: Dict[str, list] = {}
+        self._scanned = set()
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._dirs = json.load(f)["dirs"]
+
+    def scan(self, version_dir: str) -> List[str]:
+        """返回版本目录下的 Python 文件（顺序同 get_python_files），本次运行内只遍历一次"""
+        version_dir = os.path.abspath(version_dir)
+        if version_dir not in self._scanned:
+            previous = self._dirs.get(version_dir, {})
+            entries = {}
+            for file_path, file_stat in scan_python_files(version_dir).items():
+                old = previous.get(file_path)
+                key = old[3] if old is not None and tuple(old[:3]) == file_stat else None
+                entries[file_path] = [*file_stat, key]
+            self._dirs[version_dir] = entries
+            self._files.update(entries)
+            self._scanned.add(version_dir)
+        return list(self._dirs[version_dir])
+
+    def size(self, file_path: str) -> int:
+        return self._files[file_path][0]
+
+    def get_key(self, file_path: str) -> Optional[str]:
+        """stat 与上次记录一致时返回已知的内容键，否则返回 None"""
+        entry = self._files.get(file_path)
+        return entry[3] if entry is not None else None
+
+    def set_key(self, file_path: str, key: str) -> None:
+        """记录读取文件后算出的内容键（修改时间过近的文件不记录）"""
+        entry = self._files.get(file_path)
+        if entry is None or entry[0] < 0:
+            return
+        if entry[1] >= time.time_ns() - RACY_WINDOW_NS:
+            return
+        entry[3] = key
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dirs": self._dirs}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
 
 def get_project_versions(project_root: str) -> dict:
     """获取所有项目的版本目录（3个项目×5个版本）"""
@@ -0,0 +1,141 @@
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .batch_processor import FileMetrics
+from .git_source import GitBlobReader, analyze_missing_blobs, is_analyzed_path
+from .incremental import VersionState
+from .metrics_cache import MetricsCache
+
+# 提交中的一处改动：(仓库内路径, 新 blob SHA；删除时为 None)
+Change = Tuple[str, Optional[str]]
+
+# 新模式为这些值时不是普通文件（符号链接、子模块），按删除处理
+_NON_FILE_MODES = (b"120000", b"160000")
+
+
+def iter_commit_changes(repo_path: str, ref: str = "HEAD") -> Iterator[Tuple[str, List[Change]]]:
+    """
+    用一个 git log 进程按时间顺序（第一父提交链）流式读取每个提交相对第一父提交的树差异，
+    只保留会被分析的 Python 文件
+    """
+    proc = subprocess.Popen(
+        ["git", "-C", repo_path, "log", "--reverse", "--first-parent", "--root",
+         "--diff-merges=first-parent", "--raw", "--no-renames", "--no-abbrev", "-z",
+         "--format=format:%H%x00", ref],
+        stdout=subprocess.PIPE
+    )
+    commit, changes, meta = None, [], None
+    for token in _iter_tokens(proc.stdout):
+        if meta is not None:
+            # 上一个 token 是 ":旧模式 新模式 旧SHA 新SHA 状态"，本 token 是路径
+            path = token.decode("utf-8", errors="surrogateescape")
+            if is_analyzed_path(path):
+                _, new_mode, _, new_sha, status = meta[1:].split()
+                if status == b"D" or new_mode in _NON_FILE_MODES:
+                    changes.append((path, None))
+                else:
+                    changes.append((path, new_sha.decode("ascii")))
+            meta = None
+            continue
+        token = token.lstrip(b"\n")
+        if not token:
+            continue
+        if token.startswith(b":"):
+            meta = token
+        else:
+            if commit is not None:
+                yield commit, changes
+            commit, changes = token.decode("ascii"), []
+    if commit is not None:
+        yield commit, changes
+    proc.stdout.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"git log 执行失败：{repo_path} {ref}")
+
+
+def _iter_tokens(stream, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """按 \\0 切分流式输出"""
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        *tokens, pending = (pending + chunk).split(b"\0")
+        yield from tokens
+    if pending:
+        yield pending
+
+
+def process_git_history(repo_path: str, project_name: str, ref: str = "HEAD",
+                        workers: int = 1, cache: Optional[MetricsCache] = None,
+                        batch_commits: int = 2000) -> List[Dict[str, Any]]:
+    """
+    逐提交分析仓库历史：每个提交只分析树差异中变化的 blob，
+    版本级累计值在上一个提交的基础上加减变化文件的贡献；
+    每个提交输出一行，列与 export_to_csv 相同（version 列为提交 SHA）
+    提交按 batch_commits 分批：先并行分析整批中所有新 blob，再按顺序回放
+    """
+    return list(iter_git_history(repo_path, project_name, ref, workers, cache, batch_commits))
+
+
+def iter_git_history(repo_path: str, project_name: str, ref: str = "HEAD",
+                     workers: int = 1, cache: Optional[MetricsCache] = None,
+                     batch_commits: int = 2000,
+                     skip: Optional[Set[Tuple[str, str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    与 process_git_history 相同，但每回放完一批提交就产出这批的行
+    skip 中的 (项目名, 提交 SHA) 不再产出；累计值依赖完整历史，这些提交仍会回放
+    """
+    skip = skip or set()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    memo: Dict[str, Tuple[Optional[FileMetrics], Optional[str]]] = {}
+    state = VersionState()
+    print(f"开始处理项目：{project_name}")
+    try:
+        with GitBlobReader(repo_path) as reader:
+            batch: List[Tuple[str, List[Change]]] = []
+            for commit in iter_commit_changes(repo_path, ref):
+                batch.append(commit)
+                if len(batch) >= batch_commits:
+                    yield from _replay(batch, state, reader, memo, cache, executor, project_name, skip)
+                    batch = []
+            yield from _replay(batch, state, reader, memo, cache, executor, project_name, skip)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _replay(batch: List[Tuple[str, List[Change]]], state: VersionState, reader: GitBlobReader,
+            memo: Dict[str, Tuple[Optional[FileMetrics], Optional[str]]],
+            cache: Optional[MetricsCache], executor: Optional[ProcessPoolExecutor],
+            project_name: str, skip: Set[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+    """分析一批提交引入的新 blob，然后按顺序更新累计值并产出每个提交的一行"""
+    new_shas = [sha for commit, changes in batch for path, sha in changes if sha is not None]
+    analyze_missing_blobs(new_shas, reader, memo, cache, executor)
+    if cache is not None:
+        cache.flush()
+
+    for commit, changes in batch:
+        for path, sha in changes:
+            if path in state.files:
+                state.remove(path)
+            if sha is None:
+                continue
+            record, error = memo[sha]
+            if record is None:
+                print(f"处理文件 {commit[:12]}:{path} 失败: {error}")
+            state.add(path, (-1, sha, record))
+        if (project_name, commit) in skip:
+            continue
+        yield {
+            "project_name": project_name,
+            "version": commit,
+            "file_count": len(state.files),
+            **state.metrics()
+        }
+
+    # memo 只保留当前树中仍存在的 blob，不随历史长度增长；更早的 blob 再次出现（如回退）时从缓存取回或重新分析
+    live = {entry[1] for entry in state.files.values()}
+    for sha in [sha for sha in memo if sha not in live]:
+        del memo[sha]
@@ -0,0 +1,188 @@
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .batch_processor import FileMetrics, analyze_content, summarize_file_metrics
+from .metrics_cache import MetricsCache
+from .profiling import profiling_dir, run_profiled
+
+# 与 file_walker.get_python_files 相同的过滤规则
+EXCLUDED_DIRS = ('__pycache__', 'tests')
+
+# ls-tree 条目：(仓库内路径, blob SHA, 大小)
+BlobEntry = Tuple[str, str, int]
+
+
+class GitBlobReader:
+    """
+    常驻的 git cat-file --batch 进程，按 SHA 直接从对象库读取 blob，无需检出
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._proc = subprocess.Popen(
+            ["git", "-C", repo_path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def read(self, sha: str) -> bytes:
+        """读取一个 blob 的原始字节"""
+        self._proc.stdin.write(sha.encode("ascii") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"对象不存在：{sha}")
+        data = self._proc.stdout.read(int(header[2]))
+        self._proc.stdout.read(1)  # 每个对象后面跟一个换行符
+        return data
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            # fork 出的进程池子进程会继承 stdin 管道，cat-file 可能永远等不到 EOF；
+            # 所有请求都已同步读完，直接结束这个只读进程
+            self._proc.kill()
+            self._proc.wait()
+        self._proc.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _git(repo_path: str, *args: str) -> bytes:
+    return subprocess.run(["git", "-C", repo_path, *args], capture_output=True, check=True).stdout
+
+
+def list_tags(repo_path: str, pattern: Optional[str] = None) -> List[str]:
+    """列出仓库的标签（与 get_project_versions 一样按名称排序）"""
+    args = ["tag", "--list"] + ([pattern] if pattern else [])
+    return sorted(_git(repo_path, *args).decode("utf-8").split())
+
+
+def list_python_blobs(repo_path: str, rev: str) -> List[BlobEntry]:
+    """列出某个提交/标签下需要分析的 Python 文件（过滤规则与 get_python_files 一致）"""
+    blobs = []
+    for item in _git(repo_path, "ls-tree", "-r", "-l", "-z", rev).split(b"\0"):
+        if not item:
+            continue
+        meta, path = item.split(b"\t", 1)
+        mode, obj_type, sha, size = meta.split()
+        # 跳过子模块与符号链接
+        if obj_type != b"blob" or mode == b"120000":
+            continue
+        path = path.decode("utf-8", errors="surrogateescape")
+        if is_analyzed_path(path):
+            blobs.append((path, sha.decode("ascii"), int(size)))
+    return blobs
+
+
+def is_analyzed_path(path: str) -> bool:
+    """仓库内路径是否会被 get_python_files 选中"""
+    *dirs, name = path.split("/")
+    if not name.endswith(".py") or name.startswith("."):
+        return False
+    return not any(d.startswith(".") or d in EXCLUDED_DIRS for d in dirs)
+
+
+def analyze_missing_blobs(shas: Iterable[str], reader: GitBlobReader,
+                          memo: Dict[str, Tuple[Optional[FileMetrics], Optional[str]]],
+                          cache: Optional[MetricsCache] = None,
+                          executor: Optional[ProcessPoolExecutor] = None,
+                          batch_size: int = 1000) -> None:
+    """
+    确保每个 blob 的结果都在 memo 中。blob SHA 就是内容键：
+    先查本次运行的 memo，再查持久缓存，都未命中的 blob 才从对象库读取并分析；
+    分批读取，内存中同时最多只有 batch_size 个文件的内容；读取失败的 blob 记为 (None, 错误信息)
+    分析中途抛出异常（如进程池崩溃）时，memo 中只有已完成的 (指标, 错误信息)，可在捕获后重试
+    """
+    missing, queued = [], set()
+    for sha in shas:
+        if sha in memo or sha in queued:
+            continue
+        entry = cache.get(sha) if cache is not None else None
+        if entry is None:
+            missing.append(sha)
+            queued.add(sha)  # 去重只在本地进行，memo 中只放分析完的结果
+        else:
+            memo[sha] = entry
+
+    for start in range(0, len(missing), batch_size):
+        batch, contents = [], []
+        for sha in missing[start:start + batch_size]:
+            try:
+                contents.append(reader.read(sha))
+            except (KeyError, OSError) as e:
+                memo[sha] = (None, str(e))  # 读取失败不写入缓存，下次运行重新读取
+                continue
+            batch.append(sha)
+        if executor is None:
+            entries = map(analyze_content, contents)
+        else:
+            analyze = analyze_content
+            if profiling_dir() is not None:
+                analyze = partial(run_profiled, profiling_dir(), analyze_content)
+            entries = executor.map(analyze, contents, chunksize=16)
+        for sha, entry in zip(batch, entries):
+            memo[sha] = entry
+            if cache is not None:
+                cache.put(sha, *entry)
+
+
+def analyze_blobs(blobs: List[BlobEntry], reader: GitBlobReader,
+                  memo: Dict[str, Tuple[Optional[FileMetrics], Optional[str]]],
+                  cache: Optional[MetricsCache] = None,
+                  executor: Optional[ProcessPoolExecutor] = None,
+                  label: str = "") -> List[Optional[FileMetrics]]:
+    """按顺序分析一组 blob，相同 blob 只读取、分析一次"""
+    analyze_missing_blobs((sha for path, sha, size in blobs), reader, memo, cache, executor)
+
+    records = []
+    for path, sha, size in blobs:
+        record, error = memo[sha]
+        if record is None:
+            print(f"处理文件 {label}{path} 失败: {error}")
+        records.append(record)
+    return records
+
+
+def process_git_tags(repos: Dict[str, str], tag_pattern: Optional[str] = None,
+                     workers: int = 1, cache: Optional[MetricsCache] = None) -> List[Dict[str, Any]]:
+    """
+    直接从 git 对象库分析各项目的标签，无需导出到 ./data/<project>/<version>
+    repos: 项目名 -> 本地仓库路径；返回的行与 process_all_projects 相同
+    """
+    return list(iter_git_tags(repos, tag_pattern, workers, cache))
+
+
+def iter_git_tags(repos: Dict[str, str], tag_pattern: Optional[str] = None,
+                  workers: int = 1, cache: Optional[MetricsCache] = None,
+                  skip: Optional[Set[Tuple[str, str]]] = None) -> Iterator[Dict[str, Any]]:
+    """与 process_git_tags 相同，但每完成一个标签就产出一行；skip 中的 (项目名, 标签) 不再处理"""
+    skip = skip or set()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    memo: Dict[str, Tuple[Optional[FileMetrics], Optional[str]]] = {}
+    try:
+        for project_name, repo_path in repos.items():
+            print(f"开始处理项目：{project_name}")
+            with GitBlobReader(repo_path) as reader:
+                for tag in list_tags(repo_path, tag_pattern):
+                    if (project_name, tag) in skip:
+                        continue
+                    print(f"  - 处理版本：{tag}")
+                    blobs = list_python_blobs(repo_path, tag)
+                    records = analyze_blobs(blobs, reader, memo, cache, executor, label=f"{tag}:")
+                    if cache is not None:
+                        cache.flush()
+                    yield {
+                        "project_name": project_name,
+                        "version": tag,
+                        "file_count": len(blobs),
+                        **summarize_file_metrics(records)
+                    }
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,166 @@
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from analyzers import __version__ as ANALYZER_VERSION
+
+from .file_walker import FileManifest
+from .metrics_cache import content_key
+
+# 清单条目：(文件大小, 内容键, 紧凑指标元组或 None)
+FileEntry = Tuple[int, Optional[str], Optional[tuple]]
+
+
+class VersionState:
+    """
+    单个版本的逐文件分析结果与版本级累计值
+    累计值全部用整数保存（注释率按千分之一计，calculate_loc 的注释率本身保留 3 位小数），
+    增删文件时直接加减对应贡献，结果与文件顺序无关
+    """
+
+    def __init__(self, files: Optional[Dict[str, FileEntry]] = None):
+        self.files: Dict[str, FileEntry] = {}
+        self.total_code_lines = 0
+        self.total_comment_milli = 0
+        self.total_complexity = 0
+        self.total_imports = 0
+        self.total_import_count = 0
+        self.valid_file_count = 0
+        for rel_path, entry in (files or {}).items():
+            self.add(rel_path, entry)
+
+    def add(self, rel_path: str, entry: FileEntry) -> None:
+        self.files[rel_path] = entry
+        self._apply(entry[2], 1)
+
+    def remove(self, rel_path: str) -> None:
+        entry = self.files.pop(rel_path)
+        self._apply(entry[2], -1)
+
+    def _apply(self, record: Optional[tuple], sign: int) -> None:
+        if record is None:
+            return
+        code_lines, comment_rate, complexity, imports, import_count = record
+        self.total_code_lines += sign * code_lines
+        self.total_comment_milli += sign * round(comment_rate * 1000)
+        self.total_complexity += sign * complexity
+        self.total_imports += sign * imports
+        self.total_import_count += sign * import_count
+        self.valid_file_count += sign
+
+    def copy(self) -> "VersionState":
+        state = VersionState()
+        state.files = dict(self.files)
+        state.__dict__.update({k: v for k, v in self.__dict__.items() if k != "files"})
+        return state
+
+    def metrics(self) -> Dict[str, float]:
+        """版本级指标（与 summarize_file_metrics 的返回值对应）"""
+        valid_file_count = self.valid_file_count
+        total_comment_rate = self.total_comment_milli / 1000
+        avg_comment = round(total_comment_rate / valid_file_count, 4) if valid_file_count > 0 else 0.0
+        avg_complex = round(self.total_complexity / valid_file_count, 4) if valid_file_count > 0 else 0.0
+        avg_import = round(self.total_import_count / valid_file_count, 4) if valid_file_count > 0 else 0.0
+        return {
+            "loc": self.total_code_lines,
+            "comment_rate": avg_comment,
+            "avg_complexity": avg_complex,
+            "total_imports": self.total_imports,
+            "avg_import_count": avg_import
+        }
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"analyzer_version": ANALYZER_VERSION, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["VersionState"]:
+        """读取版本状态；不存在或由其他版本的分析器写出时返回 None（按没有状态处理，全部重新分析）"""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("analyzer_version") != ANALYZER_VERSION:
+            return None
+        return cls({
+            rel_path: (size, key, tuple(record) if record is not None else None)
+            for rel_path, (size, key, record) in data["files"].items()
+        })
+
+
+def state_path(state_dir: str, project_name: str, version_name: str) -> str:
+    """版本状态文件的存放位置"""
+    return os.path.join(state_dir, project_name, f"{version_name}.json")
+
+
+def relative_path(version_dir: str, file_path: str) -> str:
+    """清单中的路径：相对版本目录，统一使用 / 分隔"""
+    return os.path.relpath(file_path, version_dir).replace(os.sep, "/")
+
+
+def build_manifest(version_dir: str, py_files: Iterable[str],
+                   file_manifest: Optional[FileManifest] = None) -> Dict[str, Tuple[int, Optional[str]]]:
+    """
+    生成版本清单：相对路径 -> (文件大小, 内容键)；读取失败的文件内容键为 None
+    传入 file_manifest 时，stat 未变的文件直接使用已知内容键，不读取内容
+    """
+    manifest = {}
+    for file_path in py_files:
+        if file_manifest is not None:
+            key = file_manifest.get_key(file_path)
+            if key is not None:
+                manifest[relative_path(version_dir, file_path)] = (file_manifest.size(file_path), key)
+                continue
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            manifest[relative_path(version_dir, file_path)] = (-1, None)
+            continue
+        key = content_key(data)
+        manifest[relative_path(version_dir, file_path)] = (len(data), key)
+        if file_manifest is not None:
+            file_manifest.set_key(file_path, key)
+    return manifest
+
+
+def diff_manifests(previous: Dict[str, FileEntry],
+                   manifest: Dict[str, Tuple[int, Optional[str]]]) -> Tuple[List[str], List[str], List[str]]:
+    """对比新旧清单，返回 (新增, 修改, 删除) 的相对路径列表"""
+    added, changed = [], []
+    for rel_path, (size, key) in manifest.items():
+        old = previous.get(rel_path)
+        if old is None:
+            added.append(rel_path)
+        elif key is None or old[0] != size or old[1] != key:
+            changed.append(rel_path)
+    removed = [rel_path for rel_path in previous if rel_path not in manifest]
+    return added, changed, removed
+
+
+def process_version_incremental(version_dir: str, py_files: List[str],
+                                previous: Optional[VersionState],
+                                analyze_paths: Callable[[List[str]], Iterable[Optional[tuple]]],
+                                file_manifest: Optional[FileManifest] = None) -> VersionState:
+    """
+    增量处理一个版本：只分析相对上一版本新增或修改的文件，
+    版本累计值在上一版本的基础上加减这些文件的贡献得到
+    analyze_paths: 接收绝对路径列表，按顺序返回紧凑指标元组
+    """
+    manifest = build_manifest(version_dir, py_files, file_manifest)
+    state = previous.copy() if previous is not None else VersionState()
+    added, changed, removed = diff_manifests(state.files, manifest)
+
+    for rel_path in changed + removed:
+        state.remove(rel_path)
+
+    to_analyze = added + changed
+    abs_paths = {relative_path(version_dir, file_path): file_path for file_path in py_files}
+    records = analyze_paths([abs_paths[rel_path] for rel_path in to_analyze])
+    for rel_path, record in zip(to_analyze, records):
+        size, key = manifest[rel_path]
+        state.add(rel_path, (size, key, record))
+    return state
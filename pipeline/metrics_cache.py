@@ -0,0 +1,167 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Iterable, Optional, Tuple
+
+from analyzers import __version__ as ANALYZER_VERSION
+
+# 缓存条目：(紧凑指标元组或 None, 错误信息或 None)
+#   - 指标为 None：分析时抛出异常（如源码含空字节），错误信息为异常文本
+#   - 指标非 None 且有错误信息：语法错误文件（复杂度按 1 计），不必再次解析
+CacheEntry = Tuple[Optional[tuple], Optional[str]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_metrics_cache (
+    content_key      TEXT    NOT NULL,
+    analyzer_version TEXT    NOT NULL,
+    code_lines       INTEGER,
+    comment_rate     REAL,
+    complexity       INTEGER,
+    total_imports    INTEGER,
+    import_count     INTEGER,
+    error            TEXT,
+    last_used        INTEGER NOT NULL,
+    PRIMARY KEY (content_key, analyzer_version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cache_last_used ON file_metrics_cache (last_used);
+"""
+
+
+def content_key(data: bytes) -> str:
+    """内容哈希，与 git 的 blob SHA 算法一致，git 后端可直接用 blob SHA 作为键"""
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class MetricsCache:
+    """
+    按内容寻址的单文件指标缓存（SQLite）
+    键为 内容哈希 + 分析器版本，相同内容的文件在所有版本、所有项目间只分析一次；
+    条目数超过 max_entries 时按最近使用时间淘汰。
+    写入先缓冲在内存中，flush() 时一次事务提交；对象可被 pickle 发送到子进程只读使用。
+    """
+
+    def __init__(self, path: str, max_entries: int = 500_000,
+                 analyzer_version: str = ANALYZER_VERSION, flush_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.analyzer_version = analyzer_version
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pending = {}
+        self._touched = set()
+
+    def __getstate__(self):
+        # 只传递配置，子进程按需重新打开连接
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "analyzer_version": self.analyzer_version,
+            "flush_every": self.flush_every,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """查询缓存，未命中返回 None"""
+        entry = self._pending.get(key)
+        if entry is None:
+            row = self.conn.execute(
+                "SELECT code_lines, comment_rate, complexity, total_imports, import_count, error "
+                "FROM file_metrics_cache WHERE content_key = ? AND analyzer_version = ?",
+                (key, self.analyzer_version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            record = None if row[0] is None else tuple(row[:5])
+            entry = (record, row[5])
+        self.hits += 1
+        self.touch(key)
+        return entry
+
+    def put(self, key: str, record: Optional[tuple], error: Optional[str] = None) -> None:
+        """写入一条分析结果（包括失败结果）"""
+        self._pending[key] = (record, error)
+        if len(self._pending) + len(self._touched) >= self.flush_every:
+            self.flush()
+
+    def touch(self, key: str) -> None:
+        """标记条目最近被使用（在 flush 时批量更新）"""
+        self._touched.add(key)
+
+    def flush(self) -> None:
+        """提交缓冲的写入与访问时间，并在超出容量时淘汰最久未用的条目"""
+        if not self._pending and not self._touched:
+            return
+        now = time.time_ns()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO file_metrics_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_to_row(key, self.analyzer_version, record, error, now)
+                 for key, (record, error) in self._pending.items())
+            )
+            self.conn.executemany(
+                "UPDATE file_metrics_cache SET last_used = ? "
+                "WHERE content_key = ? AND analyzer_version = ?",
+                ((now, key, self.analyzer_version) for key in self._touched - self._pending.keys())
+            )
+            self._evict()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        count = self.conn.execute("SELECT COUNT(*) FROM file_metrics_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        # 旧版本分析器的条目永远不会再命中，优先淘汰
+        self.conn.execute(
+            "DELETE FROM file_metrics_cache WHERE analyzer_version != ?", (self.analyzer_version,)
+        )
+        excess -= self.conn.execute("SELECT changes()").fetchone()[0]
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM file_metrics_cache WHERE content_key IN ("
+                "SELECT content_key FROM file_metrics_cache ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM file_metrics_cache").fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+
+def _to_row(key: str, analyzer_version: str, record: Optional[tuple],
+            error: Optional[str], now: int) -> tuple:
+    values: Iterable = record if record is not None else (None,) * 5
+    return (key, analyzer_version, *values, error, now)
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from analyzers import __version__ as ANALYZER_VERSION
+from analyzers.engine import analyze_source
+from .file_walker import FileManifest
+from .incremental import relative_path
+from .metrics_cache import content_key
+
+# 逐文件明细列：(列名, 所属分析结果, SQL 类型)；列表类结果以 JSON 文本保存
+DETAIL_COLUMNS: Sequence[Tuple[str, str, str]] = (
+    ("total_lines", "loc", "INTEGER"),
+    ("code_lines", "loc", "INTEGER"),
+    ("comment_lines", "loc", "INTEGER"),
+    ("inline_comment_lines", "loc", "INTEGER"),
+    ("blank_lines", "loc", "INTEGER"),
+    ("comment_rate", "loc", "REAL"),
+    ("total_comments", "comments", "INTEGER"),
+    ("todo_count", "comments", "INTEGER"),
+    ("fixme_count", "comments", "INTEGER"),
+    ("comment_density", "comments", "REAL"),
+    ("cyclomatic_complexity", "complexity", "INTEGER"),
+    ("decision_points", "complexity", "INTEGER"),
+    ("if_count", "complexity", "INTEGER"),
+    ("for_count", "complexity", "INTEGER"),
+    ("while_count", "complexity", "INTEGER"),
+    ("try_count", "complexity", "INTEGER"),
+    ("except_count", "complexity", "INTEGER"),
+    ("import_count", "dependency", "INTEGER"),
+    ("from_import_count", "dependency", "INTEGER"),
+    ("total_imports", "dependency", "INTEGER"),
+    ("module_count", "dependency", "INTEGER"),
+    ("external_lib_count", "dependency", "INTEGER"),
+    ("dependency_score", "dependency", "INTEGER"),
+    ("modules", "dependency", "TEXT"),
+    ("external_libs", "dependency", "TEXT"),
+)
+
+NUMERIC_COLUMNS = tuple(name for name, section, sql_type in DETAIL_COLUMNS if sql_type != "TEXT")
+
+# 明细需要的指标分组（流水线写入指标库时一次分析同时得到版本汇总与明细）
+DETAIL_SECTIONS = tuple(dict.fromkeys(section for name, section, sql_type in DETAIL_COLUMNS))
+
+# 明细与错误信息：(明细列 -> 值, 错误信息)；分析抛出异常时明细全部为 None
+Details = Tuple[Dict[str, Any], Optional[str]]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS file_contents (
+    content_key      TEXT NOT NULL,
+    analyzer_version TEXT NOT NULL,
+    {", ".join(f"{name} {sql_type}" for name, section, sql_type in DETAIL_COLUMNS)},
+    error            TEXT,
+    PRIMARY KEY (content_key, analyzer_version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS version_files (
+    project_name     TEXT NOT NULL,
+    version          TEXT NOT NULL,
+    path             TEXT NOT NULL,
+    content_key      TEXT,
+    size             INTEGER,
+    analyzer_version TEXT NOT NULL,
+    PRIMARY KEY (project_name, version, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_version_files_project ON version_files (project_name);
+CREATE INDEX IF NOT EXISTS idx_version_files_version ON version_files (version);
+CREATE INDEX IF NOT EXISTS idx_version_files_path ON version_files (path);
+CREATE INDEX IF NOT EXISTS idx_version_files_content ON version_files (content_key);
+-- 每个记录过的版本一行（包括没有文件的版本），使 version_metrics 与 CSV 的行一一对应
+CREATE TABLE IF NOT EXISTS versions (
+    project_name     TEXT NOT NULL,
+    version          TEXT NOT NULL,
+    PRIMARY KEY (project_name, version)
+) WITHOUT ROWID;
+-- 补齐加入 versions 表之前创建的库
+INSERT OR IGNORE INTO versions SELECT DISTINCT project_name, version FROM version_files;
+
+CREATE VIEW IF NOT EXISTS file_metrics AS
+SELECT v.project_name, v.version, v.path, v.content_key, v.size,
+       {", ".join(f"c.{name}" for name, section, sql_type in DETAIL_COLUMNS)}, c.error
+FROM version_files v
+LEFT JOIN file_contents c
+       ON c.content_key = v.content_key AND c.analyzer_version = v.analyzer_version;
+
+-- 与 CSV 相同的版本级定义：读取或分析失败的文件计入文件数，不参与累计与平均；没有文件的版本各项为 0
+DROP VIEW IF EXISTS version_metrics;
+CREATE VIEW version_metrics AS
+SELECT v.project_name, v.version,
+       COUNT(f.path)                                         AS file_count,
+       COALESCE(SUM(f.code_lines), 0)                        AS loc,
+       COALESCE(ROUND(AVG(f.comment_rate), 4), 0.0)          AS comment_rate,
+       COALESCE(ROUND(AVG(f.cyclomatic_complexity), 4), 0.0) AS avg_complexity,
+       COALESCE(SUM(f.total_imports), 0)                     AS total_imports,
+       COALESCE(ROUND(AVG(f.import_count), 4), 0.0)          AS avg_import_count
+FROM versions v
+LEFT JOIN file_metrics f ON f.project_name = v.project_name AND f.version = v.version
+GROUP BY v.project_name, v.version;
+"""
+
+
+def analyze_details(data: bytes) -> Details:
+    """完整分析一个文件，返回 (明细列 -> 值, 错误信息)；分析抛出异常时明细全部为 None"""
+    try:
+        metrics = analyze_source(data, DETAIL_SECTIONS)
+    except Exception as e:
+        return failed_details(str(e))
+    return details_from_metrics(metrics)
+
+
+def details_from_metrics(metrics: Dict[str, Dict[str, Any]]) -> Details:
+    """从包含 DETAIL_SECTIONS 的分析结果中取出明细列"""
+    details = {}
+    for name, section, sql_type in DETAIL_COLUMNS:
+        value = metrics[section].get(name, [] if sql_type == "TEXT" else 0)
+        details[name] = json.dumps(value, ensure_ascii=False) if sql_type == "TEXT" else value
+    return details, metrics["complexity"].get("error")
+
+
+def failed_details(error: str) -> Details:
+    return {name: None for name, section, sql_type in DETAIL_COLUMNS}, error
+
+
+class MetricsStore:
+    """
+    逐文件指标库（SQLite）
+    file_contents 按内容键保存完整的分析结果，相同内容只分析一次；
+    version_files 记录每个 (项目, 版本) 下的文件及其内容键；
+    视图 file_metrics 用于逐文件下钻，视图 version_metrics 给出与 CSV 相同的版本级汇总
+    流水线分析文件时顺带算出的明细先经 add_analyzed 暂存，record_version 直接写入，不再读取、分析一次
+    """
+
+    def __init__(self, path: str, analyzer_version: str = ANALYZER_VERSION):
+        self.path = path
+        self.analyzer_version = analyzer_version
+        self._conn = None
+        self._pending: Dict[str, Tuple[str, Optional[Details]]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _has_content(self, key: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM file_contents WHERE content_key = ? AND analyzer_version = ?",
+            (key, self.analyzer_version)
+        ).fetchone() is not None
+
+    def add_analyzed(self, file_path: str, key: str, details: Optional[Details] = None) -> None:
+        """
+        暂存流水线分析某个文件时得到的内容键与明细（命中缓存、没有算明细时 details 为 None），
+        供随后记录该版本的 record_version 使用
+        """
+        self._pending[file_path] = (key, details)
+
+    def record_version(self, project_name: str, version_name: str, version_dir: str,
+                       py_files: List[str], manifest: Optional[FileManifest] = None) -> None:
+        """
+        记录一个版本的全部文件（替换该版本之前的记录）
+        流水线已暂存的文件直接使用其内容键与明细；传入 manifest 时 stat 未变的文件按已知内容键记录；
+        只有库中还没有、也没有暂存明细的内容（如流水线按缓存命中）才读取并完整分析
+        """
+        files, contents = [], {}
+        for file_path in py_files:
+            key, details = self._pending.pop(file_path, (None, None))
+            if key is None and manifest is not None:
+                key = manifest.get_key(file_path)
+            if details is not None and key not in contents and not self._has_content(key):
+                contents[key] = details
+            if key is not None and (key in contents or self._has_content(key)):
+                size = manifest.size(file_path) if manifest is not None else os.path.getsize(file_path)
+                files.append((relative_path(version_dir, file_path), key, size))
+                continue
+            try:
+                with open(file_path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                files.append((relative_path(version_dir, file_path), None, None))
+                continue
+            key = content_key(data)
+            if manifest is not None:
+                manifest.set_key(file_path, key)
+            if key not in contents and not self._has_content(key):
+                contents[key] = analyze_details(data)
+            files.append((relative_path(version_dir, file_path), key, len(data)))
+
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO file_contents VALUES ({', '.join('?' * (len(DETAIL_COLUMNS) + 3))})",
+                ((key, self.analyzer_version, *details.values(), error)
+                 for key, (details, error) in contents.items())
+            )
+            self.conn.execute("INSERT OR IGNORE INTO versions VALUES (?, ?)", (project_name, version_name))
+            self.conn.execute("DELETE FROM version_files WHERE project_name = ? AND version = ?",
+                              (project_name, version_name))
+            self.conn.executemany(
+                "INSERT INTO version_files VALUES (?, ?, ?, ?, ?, ?)",
+                ((project_name, version_name, rel_path, key, size, self.analyzer_version)
+                 for rel_path, key, size in files)
+            )
+
+    def merge_from(self, path: str) -> None:
+        """
+        并入另一个指标库（如多机分片各自的库）：内容按内容键去重，
+        对方库中出现的版本以对方的文件列表为准（与 record_version 一样整体替换）
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"指标库不存在：{path}")
+        self.conn.execute("ATTACH DATABASE ? AS shard", (path,))
+        try:
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO file_contents SELECT * FROM shard.file_contents")
+                self.conn.execute("INSERT OR IGNORE INTO versions SELECT * FROM shard.versions")
+                self.conn.execute(
+                    "DELETE FROM version_files WHERE (project_name, version) IN "
+                    "(SELECT DISTINCT project_name, version FROM shard.version_files)"
+                )
+                self.conn.execute("INSERT INTO version_files SELECT * FROM shard.version_files")
+        finally:
+            self.conn.execute("DETACH DATABASE shard")
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return self.conn.execute(sql, params).fetchall()
+
+    def version_metrics(self) -> List[Dict[str, Any]]:
+        """版本级汇总（列与 export_to_csv 相同）"""
+        cursor = self.conn.execute("SELECT * FROM version_metrics ORDER BY project_name, version")
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def file_deltas(self, project_name: str, old_version: str, new_version: str,
+                    column: str = "cyclomatic_complexity", limit: int = 20) -> List[tuple]:
+        """
+        两个版本间某项指标变化最大的文件：[(路径, 旧值, 新值, 变化量)]
+        新增或删除的文件按 0 计
+        """
+        if column not in NUMERIC_COLUMNS:
+            raise ValueError(f"不支持的指标列：{column}")
+        return self.query(
+            f"""
+            WITH old AS (SELECT path, {column} AS value FROM file_metrics WHERE project_name = ? AND version = ?),
+                 new AS (SELECT path, {column} AS value FROM file_metrics WHERE project_name = ? AND version = ?),
+                 paths AS (SELECT path FROM old UNION SELECT path FROM new)
+            SELECT paths.path, COALESCE(old.value, 0), COALESCE(new.value, 0),
+                   COALESCE(new.value, 0) - COALESCE(old.value, 0) AS delta
+            FROM paths
+            LEFT JOIN old ON old.path = paths.path
+            LEFT JOIN new ON new.path = paths.path
+            ORDER BY ABS(delta) DESC, paths.path
+            LIMIT ?
+            """,
+            (project_name, old_version, project_name, new_version, limit)
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
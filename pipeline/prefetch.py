@@ -0,0 +1,73 @@
+"""
+读取预取：线程池提前读取文件字节，读取与分析重叠进行
+网络挂载或冷缓存的检出目录上，逐个文件"读取 → 分析"会让 CPU 等待磁盘；
+预取阶段在后台线程中读取并计算内容键（文件读取与 SHA-1 计算都会释放 GIL），
+同时在途的文件数有上限，内存占用不随文件总数增长。
+"""
+
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from .metrics_cache import content_key
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .metrics_cache import CacheEntry, MetricsCache
+
+# 预取结果（按文件顺序产出）：
+#   entry 非 None：缓存命中，不需要分析（按清单已知的内容键命中时不读取文件，data 为 None）
+#   error 非 None：读取失败
+#   否则 data 为文件字节，待分析
+Prefetched = namedtuple("Prefetched", "path key data entry error")
+
+DEFAULT_READERS = 4
+DEFAULT_DEPTH = 256
+
+
+def _read(file_path: str, need_key: bool) -> Tuple[bytes, Optional[str]]:
+    with span("read", file=file_path) as read_span, open(file_path, 'rb') as f:
+        data = f.read()
+        read_span.annotate(bytes=len(data))
+    return data, content_key(data) if need_key else None
+
+
+def _resolve(file_path: str, known_key: Optional[str], entry: Optional["CacheEntry"],
+             future: Optional[Future], cache: Optional["MetricsCache"]) -> Prefetched:
+    """主线程侧：取回读取结果并按内容键查缓存（缓存连接只在主线程使用）"""
+    if future is None:
+        return Prefetched(file_path, known_key, None, entry, None)
+    try:
+        data, key = future.result()
+    except Exception as e:
+        return Prefetched(file_path, None, None, None, str(e))
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            return Prefetched(file_path, key, None, entry, None)
+    return Prefetched(file_path, key, data, None, None)
+
+
+def prefetch(paths: List[str], known_keys: List[Optional[str]], cache: Optional["MetricsCache"] = None,
+             readers: int = DEFAULT_READERS, depth: int = DEFAULT_DEPTH,
+             keys: bool = False) -> Iterator[Prefetched]:
+    """
+    按 paths 的顺序产出 Prefetched；后台最多同时有 depth 个文件在读取或等待取走
+    known_keys: 文件清单按 stat 判定未变时给出的内容键，命中缓存则不再读取文件
+    keys: 不使用缓存时也计算内容键（写入指标库时需要）
+    提前停止迭代时取消尚未开始的读取
+    """
+    depth = max(1, depth)
+    pool = ThreadPoolExecutor(max_workers=max(1, readers), thread_name_prefix="prefetch")
+    pending = deque()
+    try:
+        for file_path, known_key in zip(paths, known_keys):
+            entry = cache.get(known_key) if cache is not None and known_key is not None else None
+            future = None if entry is not None else pool.submit(_read, file_path, keys or cache is not None)
+            pending.append((file_path, known_key, entry, future))
+            if len(pending) >= depth:
+                yield _resolve(*pending.popleft(), cache)
+        while pending:
+            yield _resolve(*pending.popleft(), cache)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,111 @@
+"""
+跨进程的 cProfile 性能剖析
+主进程和每个工作进程各自剖析（工作进程只在执行分析任务时开启），
+工作进程退出时把结果写入剖析目录，流水线结束后合并为一个 pstats 文件并生成热点函数报告。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+from multiprocessing import util
+from typing import Any, Callable, List, Optional
+
+MERGED_FILE = "merged.prof"
+REPORT_FILE = "report.txt"
+
+_profile_dir: Optional[str] = None
+_profiler: Optional[cProfile.Profile] = None  # 主进程的剖析器
+_profiler_pid: Optional[int] = None
+_worker_profiler: Optional[cProfile.Profile] = None  # 工作进程的剖析器
+_worker_pid: Optional[int] = None
+
+
+def enable_profiling(profile_dir: str) -> None:
+    """开始剖析当前（主）进程；之后提交给进程池的分析任务在工作进程中一并剖析"""
+    global _profile_dir, _profiler, _profiler_pid
+    os.makedirs(profile_dir, exist_ok=True)
+    for name in os.listdir(profile_dir):  # 清掉上次运行留下的工作进程结果
+        if name.startswith("worker-") and name.endswith(".prof"):
+            os.remove(os.path.join(profile_dir, name))
+    _profile_dir = profile_dir
+    _profiler, _profiler_pid = cProfile.Profile(), os.getpid()
+    _profiler.enable()
+
+
+def profiling_dir() -> Optional[str]:
+    """启用剖析时的输出目录（未启用时为 None）"""
+    return _profile_dir
+
+
+def _dump_worker(profiler: cProfile.Profile, path: str) -> None:
+    profiler.dump_stats(path)
+
+
+def run_profiled(profile_dir: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """在工作进程中剖析一次任务；该进程第一次执行时登记退出时写出结果"""
+    global _worker_profiler, _worker_pid
+    pid = os.getpid()
+    if _worker_pid != pid:
+        if _profiler is not None and _profiler_pid != pid:
+            _profiler.disable()  # fork 继承了主进程正在运行的剖析器
+        _worker_profiler, _worker_pid = cProfile.Profile(), pid
+        util.Finalize(None, _dump_worker, args=(_worker_profiler, os.path.join(profile_dir, f"worker-{pid}.prof")),
+                      exitpriority=10)
+    _worker_profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _worker_profiler.disable()
+
+
+def merge_profiles(paths: List[str]) -> Optional[pstats.Stats]:
+    stats = None
+    for path in paths:
+        if stats is None:
+            stats = pstats.Stats(path)
+        else:
+            stats.add(path)
+    return stats
+
+
+def format_report(stats: pstats.Stats, top: int = 30) -> str:
+    """热点函数报告：按自身耗时、累计耗时排序的前 top 个函数，以及 analyzers 包内的函数"""
+    stream = io.StringIO()
+    stats.stream = stream
+    for title, sort_key, restrictions in (
+        (f"按自身耗时排序的前 {top} 个函数", "tottime", (top,)),
+        (f"按累计耗时排序的前 {top} 个函数", "cumulative", (top,)),
+        (f"analyzers 包内按累计耗时排序的前 {top} 个函数", "cumulative", (r"analyzers[/\\]", top)),
+    ):
+        stream.write(f"==== {title} ====\n")
+        stats.sort_stats(sort_key).print_stats(*restrictions)
+    return stream.getvalue()
+
+
+def finish_profiling(top: int = 30) -> Optional[str]:
+    """
+    停止剖析，合并主进程与所有工作进程的结果，写出 merged.prof 与 report.txt
+    返回报告文件路径（未启用剖析时为 None）。应在进程池关闭之后调用，工作进程此时已写出结果
+    """
+    global _profile_dir, _profiler, _profiler_pid
+    if _profile_dir is None:
+        return None
+    profile_dir, profiler = _profile_dir, _profiler
+    _profile_dir = _profiler = _profiler_pid = None
+    profiler.disable()
+    main_path = os.path.join(profile_dir, "main.prof")
+    profiler.dump_stats(main_path)
+
+    workers = sorted(name for name in os.listdir(profile_dir) if name.startswith("worker-") and name.endswith(".prof"))
+    stats = merge_profiles([main_path] + [os.path.join(profile_dir, name) for name in workers])
+    stats.dump_stats(os.path.join(profile_dir, MERGED_FILE))
+    report_path = os.path.join(profile_dir, REPORT_FILE)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(f"合并了主进程与 {len(workers)} 个工作进程的剖析结果\n")
+        if workers:
+            f.write("（主进程等待工作进程结果的时间记在 lock.acquire 上）\n")
+        f.write("\n")
+        f.write(format_report(stats, top))
+    print(f"性能剖析报告已写入：{report_path}（合并的 pstats：{os.path.join(profile_dir, MERGED_FILE)}）")
+    return report_path
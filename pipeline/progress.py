@@ -0,0 +1,252 @@
+"""
+运行进度：文件数 / 字节数吞吐量、各项目预计完成时间、工作进程利用率
+计数只在主进程取回每个文件的结果时累加两个整数；速率、ETA 的计算与输出由后台线程定时完成，
+每次输出一行进度，并向快照文件追加一行 JSON（JSON Lines）。
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .file_walker import FileManifest
+
+# 工作者侧：共享的忙碌时间数组与本工作者的槽位（按线程保存，线程池中的各线程互不干扰）
+_worker = threading.local()
+
+
+def _init_worker_clock(busy, next_slot) -> None:
+    with next_slot.get_lock():
+        _worker.slot = next_slot.value
+        next_slot.value += 1
+    _worker.busy = busy
+
+
+def run_timed(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """在工作进程（或线程）中执行任务并把耗时累加到自己的槽位（每个工作者只写自己的槽位，无需加锁）"""
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        busy = getattr(_worker, "busy", None)
+        if busy is not None:
+            busy[_worker.slot] += time.perf_counter() - start
+
+
+class WorkerClock:
+    """进程池（或线程池）中各工作者的累计忙碌时间"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.busy = multiprocessing.RawArray("d", workers)
+        self.next_slot = multiprocessing.Value("i", 0)
+        self.started = time.monotonic()
+
+    def executor(self, threads: bool = False) -> Executor:
+        if threads:
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analyze",
+                                      initializer=_init_worker_clock, initargs=(self.busy, self.next_slot))
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker_clock,
+                                   initargs=(self.busy, self.next_slot))
+
+    def utilization(self) -> Optional[float]:
+        elapsed = time.monotonic() - self.started
+        if elapsed <= 0:
+            return None
+        return min(1.0, sum(self.busy) / (self.workers * elapsed))
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "未知"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}时{seconds % 3600 // 60}分"
+    if seconds >= 60:
+        return f"{seconds // 60}分{seconds % 60}秒"
+    return f"{seconds}秒"
+
+
+class ProgressReporter:
+    """
+    流水线进度报告器：
+        progress = ProgressReporter("./output/progress.jsonl", interval=10)
+        with progress:
+            rows = list(iter_all_projects(root, progress=progress))
+    plan() 统计待处理的文件总数与字节数；begin_version / end_version 之间用 track() 按文件计数
+    （未逐文件计数的版本在 end_version 时按整个版本计入）
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, interval: float = 10.0, stream=None):
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stdout
+        self.started = time.monotonic()
+        self.files_done = 0
+        self.bytes_done = 0
+        self.files_total = 0
+        self.bytes_total = 0
+        # 项目 -> {版本: (文件数, 字节数)}；各项目完成的文件数 / 字节数
+        self._planned: Dict[str, Dict[str, Tuple[int, int]]] = OrderedDict()
+        self._project_done: Dict[str, List[int]] = {}
+        self._version: Optional[Tuple[str, str]] = None
+        self._version_start = (0, 0)
+        self._sizes: List[int] = []
+        self.worker_clock: Optional[WorkerClock] = None
+        self._last = (self.started, 0, 0)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 计数（主线程） ----
+
+    def plan(self, projects: Dict[str, Dict[str, str]], manifest: "FileManifest",
+             skip: Optional[Set[Tuple[str, str]]] = None) -> None:
+        """遍历所有待处理版本（结果由清单缓存，之后不会重复遍历），统计总量"""
+        skip = skip or set()
+        for project_name, versions in projects.items():
+            planned = self._planned.setdefault(project_name, OrderedDict())
+            self._project_done.setdefault(project_name, [0, 0])
+            for version_name, version_dir in versions.items():
+                if (project_name, version_name) in skip:
+                    continue
+                paths = manifest.scan(version_dir)
+                size = sum(max(0, manifest.size(path)) for path in paths)
+                planned[version_name] = (len(paths), size)
+                self.files_total += len(paths)
+                self.bytes_total += size
+
+    def begin_version(self, project_name: str, version_name: str, sizes: Iterable[int] = ()) -> None:
+        """sizes: 本版本各文件的大小（与 track 的顺序一致），用于逐文件累加字节数"""
+        self._version = (project_name, version_name)
+        self._version_start = (self.files_done, self.bytes_done)
+        self._sizes = list(sizes)
+
+    def track(self, items: Iterable[Any]) -> Iterator[Any]:
+        """逐个产出 items，同时把对应文件计入进度"""
+        sizes = self._sizes
+        for index, item in enumerate(items):
+            self.files_done += 1
+            if index < len(sizes):
+                self.bytes_done += max(0, sizes[index])
+            yield item
+
+    def end_version(self) -> None:
+        """把当前版本按计划的文件数 / 字节数计满（缓存命中、增量跳过的文件也算完成）"""
+        if self._version is None:
+            return
+        project_name, version_name = self._version
+        files, size = self._planned.get(project_name, {}).get(version_name, (0, 0))
+        self.files_done = self._version_start[0] + files
+        self.bytes_done = self._version_start[1] + size
+        done = self._project_done.setdefault(project_name, [0, 0])
+        done[0] += files
+        done[1] += size
+        self._version = None
+
+    def worker_pool(self, workers: int, threads: bool = False) -> Executor:
+        """创建记录工作者忙碌时间的进程池（threads=True 时为线程池；提交的任务需用 run_timed 包装）"""
+        self.worker_clock = WorkerClock(workers)
+        return self.worker_clock.executor(threads)
+
+    # ---- 快照（后台线程） ----
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self.started
+        files_done, bytes_done = self.files_done, self.bytes_done
+        last_time, last_files, last_bytes = self._last
+        window = now - last_time
+        self._last = (now, files_done, bytes_done)
+        bytes_rate = bytes_done / elapsed if elapsed > 0 else 0.0
+
+        projects = OrderedDict()
+        remaining_before = 0  # 按处理顺序，排在前面的项目剩余的字节数
+        current = self._version
+        for project_name, versions in self._planned.items():
+            done_files, done_bytes = self._project_done.get(project_name, [0, 0])
+            if current is not None and current[0] == project_name:
+                done_files += files_done - self._version_start[0]
+                done_bytes += bytes_done - self._version_start[1]
+            total_files = sum(files for files, _ in versions.values())
+            total_bytes = sum(size for _, size in versions.values())
+            remaining_before += max(0, total_bytes - done_bytes)
+            projects[project_name] = {
+                "files_done": done_files, "files_total": total_files,
+                "bytes_done": done_bytes, "bytes_total": total_bytes,
+                "current_version": current[1] if current is not None and current[0] == project_name else None,
+                # 项目按顺序处理：完成时间包含前面项目的剩余工作量
+                "eta_seconds": round(remaining_before / bytes_rate, 1) if bytes_rate > 0 else None,
+            }
+
+        remaining = max(0, self.bytes_total - bytes_done)
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_seconds": round(elapsed, 3),
+            "files_done": files_done, "files_total": self.files_total,
+            "bytes_done": bytes_done, "bytes_total": self.bytes_total,
+            "files_per_sec": round(files_done / elapsed, 2) if elapsed > 0 else 0.0,
+            "bytes_per_sec": round(bytes_rate, 1),
+            "recent_files_per_sec": round((files_done - last_files) / window, 2) if window > 0 else 0.0,
+            "recent_bytes_per_sec": round((bytes_done - last_bytes) / window, 1) if window > 0 else 0.0,
+            "eta_seconds": round(remaining / bytes_rate, 1) if bytes_rate > 0 else None,
+            "workers": self.worker_clock.workers if self.worker_clock is not None else 1,
+            "worker_utilization": (round(self.worker_clock.utilization(), 3)
+                                   if self.worker_clock is not None else None),
+            "projects": projects,
+        }
+
+    def format_line(self, snap: Dict[str, Any]) -> str:
+        percent = snap["bytes_done"] / snap["bytes_total"] * 100 if snap["bytes_total"] else 0.0
+        line = (f"进度 {percent:.1f}%：{snap['files_done']}/{snap['files_total']} 个文件，"
+                f"{snap['bytes_done'] / 1e6:.1f}/{snap['bytes_total'] / 1e6:.1f} MB，"
+                f"{snap['recent_files_per_sec']} 文件/秒，{snap['recent_bytes_per_sec'] / 1e6:.2f} MB/秒，"
+                f"预计剩余 {_format_duration(snap['eta_seconds'])}")
+        if snap["worker_utilization"] is not None:
+            line += f"，工作进程利用率 {snap['worker_utilization']:.0%}"
+        return line
+
+    def report(self) -> Dict[str, Any]:
+        """输出一行进度并向快照文件追加一条记录"""
+        snap = self.snapshot()
+        print(self.format_line(snap), file=self.stream)
+        if self.snapshot_path:
+            with open(self.snapshot_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(snap, ensure_ascii=False) + "\n")
+        return snap
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def start(self) -> "ProgressReporter":
+        if self.snapshot_path:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            open(self.snapshot_path, "w").close()  # 每次运行重新开始
+        self.started = time.monotonic()
+        self._last = (self.started, self.files_done, self.bytes_done)
+        self._thread = threading.Thread(target=self._run, name="progress-reporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        """停止后台线程并输出最终进度"""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.report()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
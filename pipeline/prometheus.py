@@ -0,0 +1,241 @@
+"""
+Prometheus 文本格式的运行指标（不依赖 prometheus_client）
+指标来自计时 span（pipeline.tracing 的监听器），因此工作进程中的分析器耗时也会随结果带回并计入；
+可定期写成 node_exporter textfile collector 读取的 .prom 文件，也可在本地端口上提供 /metrics。
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .tracing import SpanEvent, Tracer
+
+if TYPE_CHECKING:
+    from .metrics_cache import MetricsCache
+
+NAMESPACE = "codequality"
+
+# 耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, labels: LabelValues = ()) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        values = self.values or ({(): 0} if not self.labelnames else {})
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累计，最后一个为 +Inf）, 总和, 次数]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class PipelineMetrics:
+    """
+    流水线指标：
+        metrics = PipelineMetrics(cache=cache).attach(enable_tracing(keep=False))
+        metrics.start(textfile="/var/lib/node_exporter/codequality.prom", port=None)
+        ...
+        metrics.close()
+    """
+
+    def __init__(self, cache: Optional["MetricsCache"] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.cache = cache
+        self._lock = threading.Lock()
+        prefix = NAMESPACE
+        self.files = Counter(f"{prefix}_files_processed_total", "已处理的 Python 文件数（含缓存命中）")
+        self.bytes_read = Counter(f"{prefix}_bytes_read_total", "读取的源码字节数")
+        self.read_failures = Counter(f"{prefix}_read_failures_total", "读取失败的文件数")
+        self.parse_failures = Counter(f"{prefix}_parse_failures_total",
+                                      "ast.parse 语法错误的文件数（缓存命中的文件不重复解析）")
+        self.versions = Counter(f"{prefix}_versions_processed_total", "已处理的版本数", ("project",))
+        self.analyzer_seconds = Histogram(f"{prefix}_analyzer_duration_seconds", "单个文件上各分析器的耗时",
+                                          ("analyzer",), buckets)
+        self.stage_seconds = Histogram(f"{prefix}_stage_duration_seconds", "各阶段（读取、解析、单个文件等）的耗时",
+                                       ("stage",), buckets)
+        self.started = time.time()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.textfile: Optional[str] = None
+        self.interval = 15.0
+
+    def attach(self, tracer: Tracer) -> "PipelineMetrics":
+        tracer.listeners.append(self.observe)
+        return self
+
+    def observe(self, event: SpanEvent) -> None:
+        """计时 span 的监听器：把一条记录计入各项指标"""
+        seconds = event.dur_ns / 1e9
+        with self._lock:
+            if event.cat == "analyzer":
+                self.analyzer_seconds.observe(seconds, (event.name.split(":", 1)[-1],))
+                return
+            self.stage_seconds.observe(seconds, (event.name,))
+            if event.name == "file":
+                self.files.inc()
+            elif event.name == "read":
+                if event.error is not None:
+                    self.read_failures.inc()
+                else:
+                    self.bytes_read.inc(event.context.get("bytes", 0))
+            elif event.name == "ast.parse" and event.error is not None:
+                self.parse_failures.inc()
+            elif event.name == "version":
+                self.versions.inc(labels=(str(event.context.get("project", "")),))
+
+    def _cache_metrics(self) -> Iterable[str]:
+        if self.cache is None:
+            return []
+        prefix = NAMESPACE
+        return [
+            f"# HELP {prefix}_cache_hits_total 单文件指标缓存命中次数",
+            f"# TYPE {prefix}_cache_hits_total counter",
+            f"{prefix}_cache_hits_total {self.cache.hits}",
+            f"# HELP {prefix}_cache_misses_total 单文件指标缓存未命中次数",
+            f"# TYPE {prefix}_cache_misses_total counter",
+            f"{prefix}_cache_misses_total {self.cache.misses}",
+        ]
+
+    def render(self) -> str:
+        """Prometheus 文本格式（exposition format 0.0.4）"""
+        prefix = NAMESPACE
+        lines = [
+            f"# HELP {prefix}_run_start_time_seconds 本次运行的开始时间（Unix 时间戳）",
+            f"# TYPE {prefix}_run_start_time_seconds gauge",
+            f"{prefix}_run_start_time_seconds {_number(round(self.started, 3))}",
+            f"# HELP {prefix}_last_update_time_seconds 指标最近一次输出的时间（Unix 时间戳）",
+            f"# TYPE {prefix}_last_update_time_seconds gauge",
+            f"{prefix}_last_update_time_seconds {_number(round(time.time(), 3))}",
+        ]
+        with self._lock:
+            for metric in (self.files, self.bytes_read, self.read_failures, self.parse_failures, self.versions,
+                           self.analyzer_seconds, self.stage_seconds):
+                lines.extend(metric.render())
+        lines.extend(self._cache_metrics())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """写成 textfile collector 读取的文件（先写临时文件再改名，collector 不会读到一半的内容）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> int:
+        """在本地端口提供 /metrics（port=0 时自动选择端口），返回实际端口"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server.server_address[1]
+
+    def start(self, textfile: Optional[str] = None, port: Optional[int] = None,
+              interval: float = 15.0) -> "PipelineMetrics":
+        """textfile: 每 interval 秒重写一次的 .prom 文件；port: 提供 /metrics 的本地端口"""
+        self.textfile, self.interval = textfile, interval
+        if port is not None:
+            port = self.serve(port)
+            print(f"指标服务：http://127.0.0.1:{port}/metrics")
+        if textfile:
+            self.write_textfile(textfile)
+            self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write_textfile(self.textfile)
+
+    def close(self) -> None:
+        """停止定期写出并写最后一次；关闭 HTTP 服务"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.textfile:
+            self.write_textfile(self.textfile)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,123 @@
+"""
+按文件大小调度进程池任务
+按遍历顺序分块提交时，少数巨大的文件（生成的迁移脚本、内置的第三方库）可能在最后才被某个进程分到，
+其余进程空等；这里按遍历时得到的文件大小，先提交最大的文件，小文件按字节数打包成块，
+并统计各工作进程实际分到的工作量，报告负载是否均衡。
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# 小文件打包时每块的字节数范围（按 总字节数 / (进程数 × 16) 取值后截断到该范围内）
+MIN_BATCH_BYTES = 16 * 1024
+MAX_BATCH_BYTES = 1 << 20
+
+
+def batch_target(total_bytes: int, workers: int) -> int:
+    """每块的目标字节数：每个进程大约分到 16 块，兼顾尾部延迟与进程间通信开销"""
+    return max(MIN_BATCH_BYTES, min(MAX_BATCH_BYTES, total_bytes // (max(1, workers) * 16)))
+
+
+def plan_batches(sizes: Sequence[int], workers: int, max_files: int = 256,
+                 offset: int = 0) -> List[List[int]]:
+    """
+    把文件分成提交给进程池的块，返回各块的文件下标（加上 offset），按提交顺序排列
+    文件按大小从大到小排列（大小相同时保持遍历顺序）；不小于目标字节数的文件单独成块，
+    其余文件依次装入当前块，直到块的字节数达到目标或文件数达到 max_files
+    """
+    target = batch_target(sum(max(0, size) for size in sizes), workers)
+    order = sorted(range(len(sizes)), key=lambda index: -sizes[index])
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    batch_bytes = 0
+    for index in order:
+        size = max(0, sizes[index])
+        if size >= target:
+            batches.append([offset + index])
+            continue
+        batch.append(offset + index)
+        batch_bytes += size
+        if batch_bytes >= target or len(batch) >= max_files:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def worker_id() -> int:
+    """工作进程的进程号；在线程池中运行时为线程号"""
+    if threading.current_thread() is threading.main_thread():
+        return os.getpid()
+    return threading.get_native_id()
+
+
+def run_measured(func: Callable, *args: Any, **kwargs: Any) -> Tuple[int, float, Any]:
+    """在工作进程（或线程）中执行一块任务，返回 (进程号或线程号, 耗时秒数, 结果)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return worker_id(), time.perf_counter() - start, result
+
+
+def in_order(indexed: Iterable[Tuple[int, Any]], start: int = 0) -> Iterator[Any]:
+    """按下标顺序产出乱序到达的 (下标, 结果)；下标须从 start 开始连续，只缓存尚不能产出的结果"""
+    pending: Dict[int, Any] = {}
+    next_index = start
+    for index, value in indexed:
+        pending[index] = value
+        while next_index in pending:
+            yield pending.pop(next_index)
+            next_index += 1
+
+
+class WorkerLoad:
+    """各工作进程（线程池模式下为各线程）实际分到的工作量（块数、文件数、字节数、忙碌时间）"""
+
+    def __init__(self, kind: str = "进程"):
+        self.kind = kind
+        # 进程号（线程号） -> [块数, 文件数, 字节数, 忙碌秒数]
+        self.workers: Dict[int, List[float]] = {}
+        self.longest = (0.0, 0)  # 耗时最长的块：(秒数, 字节数)
+
+    def add(self, pid: int, seconds: float, files: int, size: int) -> None:
+        load = self.workers.setdefault(pid, [0, 0, 0, 0.0])
+        load[0] += 1
+        load[1] += files
+        load[2] += size
+        load[3] += seconds
+        if seconds > self.longest[0]:
+            self.longest = (seconds, size)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        imbalance：最忙进程的忙碌时间 / 平均忙碌时间（1.0 表示完全均衡）
+        efficiency：平均忙碌时间 / 最忙进程的忙碌时间，即按最忙进程计算的并行效率
+        """
+        busy = [load[3] for load in self.workers.values()]
+        mean = sum(busy) / len(busy) if busy else 0.0
+        peak = max(busy, default=0.0)
+        return {
+            "workers": len(self.workers),
+            "batches": sum(int(load[0]) for load in self.workers.values()),
+            "files": sum(int(load[1]) for load in self.workers.values()),
+            "bytes": sum(int(load[2]) for load in self.workers.values()),
+            "busy_seconds": {pid: round(load[3], 3) for pid, load in sorted(self.workers.items())},
+            "imbalance": round(peak / mean, 3) if mean > 0 else None,
+            "efficiency": round(mean / peak, 3) if peak > 0 else None,
+            "longest_batch_seconds": round(self.longest[0], 3),
+        }
+
+    def format(self) -> str:
+        summary = self.summary()
+        if not summary["workers"]:
+            return f"工作{self.kind}负载：没有提交给{self.kind}池的任务"
+        lines = [f"工作{self.kind}负载：{summary['workers']} 个{self.kind}，"
+                 f"{summary['batches']} 块，{summary['files']} 个文件，"
+                 f"最忙 / 平均忙碌时间 = {summary['imbalance']}，"
+                 f"耗时最长的块 {summary['longest_batch_seconds']} 秒（{self.longest[1] / 1e6:.2f} MB）"]
+        for pid, (batches, files, size, seconds) in sorted(self.workers.items()):
+            lines.append(f"  - {self.kind} {pid}：{int(batches)} 块，{int(files)} 个文件，"
+                         f"{size / 1e6:.2f} MB，忙碌 {seconds:.2f} 秒")
+        return "\n".join(lines)
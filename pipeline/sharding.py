@@ -0,0 +1,156 @@
+"""
+多机分片：把 (项目, 版本) 按估计字节数确定性地分到 N 个分片，各分片独立运行，最后合并输出
+分配只取决于各版本的文件大小与名称（与目录遍历顺序无关），同一份检出在任何机器上得到相同的分片；
+每个分片在输出旁写一份分片计划，合并时按计划检查所有分片是否完整，并按单机运行的行顺序写出。
+"""
+
+import json
+import os
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .csv_exporter import StreamingExporter, read_exported_rows
+from .file_walker import FileManifest
+from .metrics_store import MetricsStore
+
+# index 从 1 开始：--shard 1/4 ... --shard 4/4
+ShardSpec = namedtuple("ShardSpec", "index count")
+
+Unit = Tuple[str, str]
+
+PLAN_SUFFIX = ".plan.json"
+
+
+def parse_shard(text: str) -> ShardSpec:
+    """解析 "i/N" 形式的分片参数"""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/N：{text}") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"分片序号应在 1 到 {count} 之间：{text}")
+    return ShardSpec(index, count)
+
+
+def shard_path(path: str, shard: ShardSpec) -> str:
+    """分片的输出路径：./output/project_metrics.csv -> ./output/project_metrics.shard-1-of-4.csv"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard.index}-of-{shard.count}{ext}"
+
+
+def unit_sizes(projects: Dict[str, Dict[str, str]], manifest: FileManifest) -> "OrderedDict[Unit, int]":
+    """各 (项目, 版本) 的估计字节数（遍历时记录的文件大小之和），按处理顺序排列"""
+    sizes = OrderedDict()
+    for project_name, versions in projects.items():
+        for version_name, version_dir in versions.items():
+            sizes[(project_name, version_name)] = sum(max(0, manifest.size(path))
+                                                      for path in manifest.scan(version_dir))
+    return sizes
+
+
+def assign_shards(sizes: Dict[Unit, int], count: int) -> Dict[Unit, int]:
+    """
+    按字节数从大到小依次分给当前总字节数最小的分片（相同时取序号小的），
+    返回 单元 -> 分片序号（从 1 开始）；
+    字节数相同的单元按 (项目, 版本) 排序，结果与 sizes 的顺序无关
+    """
+    loads = [0] * count
+    assignment = {}
+    for unit in sorted(sizes, key=lambda unit: (-sizes[unit], unit)):
+        shard = min(range(count), key=lambda index: (loads[index], index))
+        loads[shard] += sizes[unit]
+        assignment[unit] = shard + 1
+    return assignment
+
+
+def plan_shards(projects: Dict[str, Dict[str, str]], manifest: FileManifest,
+                count: int) -> Dict[str, Any]:
+    """分片计划：所有单元按处理顺序排列，附估计字节数与所属分片"""
+    sizes = unit_sizes(projects, manifest)
+    assignment = assign_shards(sizes, count)
+    return {
+        "shards": count,
+        "units": [[project_name, version_name, size, assignment[(project_name, version_name)]]
+                  for (project_name, version_name), size in sizes.items()],
+    }
+
+
+def shard_skip(plan: Dict[str, Any], shard: ShardSpec) -> Set[Unit]:
+    """不属于本分片的单元（作为 iter_all_projects 的 skip）"""
+    return {(project_name, version_name) for project_name, version_name, _, index in plan["units"]
+            if index != shard.index}
+
+
+def shard_summary(plan: Dict[str, Any]) -> List[Tuple[int, int, int]]:
+    """各分片的 (序号, 单元数, 估计字节数)"""
+    totals = [[0, 0] for _ in range(plan["shards"])]
+    for _, _, size, index in plan["units"]:
+        totals[index - 1][0] += 1
+        totals[index - 1][1] += size
+    return [(index + 1, units, size) for index, (units, size) in enumerate(totals)]
+
+
+def write_plan(output_path: str, plan: Dict[str, Any], shard: ShardSpec) -> str:
+    """把分片计划写在分片输出旁边，返回计划文件路径"""
+    path = output_path + PLAN_SUFFIX
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"shard": shard.index, **plan}, f, ensure_ascii=False)
+    return path
+
+
+def load_plan(output_path: str) -> Dict[str, Any]:
+    path = output_path + PLAN_SUFFIX
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"找不到分片计划：{path}（该分片尚未运行？）")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _assignment(plan: Dict[str, Any]) -> Dict[Unit, int]:
+    return {(project_name, version_name): index for project_name, version_name, _, index in plan["units"]}
+
+
+def merge_shards(output_path: str, count: int, fmt: Optional[str] = None) -> int:
+    """
+    合并 N 个分片的输出，按单机运行的行顺序写到 output_path，返回行数
+    各分片的计划不一致，或有分片缺少其负责的版本时报错，不写出不完整的结果
+    """
+    shards = [ShardSpec(index, count) for index in range(1, count + 1)]
+    plans = [load_plan(shard_path(output_path, shard)) for shard in shards]
+    assignment = _assignment(plans[0])
+    for shard, plan in zip(shards, plans):
+        if plan["shards"] != count or _assignment(plan) != assignment:
+            raise ValueError(f"分片 {shard.index}/{count} 的计划与分片 1/{count} 不一致，"
+                             "请确认各分片分析的是同一份数据")
+
+    rows = {}
+    for shard in shards:
+        for row in read_exported_rows(shard_path(output_path, shard), fmt):
+            unit = (row["project_name"], row["version"])
+            if assignment.get(unit) == shard.index:
+                rows[unit] = row
+    missing = [f"{project_name}/{version_name}（分片 {index}）"
+               for project_name, version_name, _, index in plans[0]["units"]
+               if (project_name, version_name) not in rows]
+    if missing:
+        raise ValueError(f"分片输出缺少 {len(missing)} 个版本：{', '.join(missing[:10])}")
+
+    with StreamingExporter(output_path, fmt=fmt, resume=False) as exporter:
+        count = exporter.write_rows(rows[(project_name, version_name)]
+                                    for project_name, version_name, _, _ in plans[0]["units"])
+        exporter.finish()
+    return count
+
+
+def merge_shard_stores(store_path: str, count: int) -> None:
+    """把 N 个分片各自的逐文件指标库并入 store_path"""
+    paths = [shard_path(store_path, ShardSpec(index, count)) for index in range(1, count + 1)]
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"找不到分片指标库：{path}")
+    with MetricsStore(store_path) as store:
+        for path in paths:
+            store.merge_from(path)
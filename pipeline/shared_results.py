@@ -0,0 +1,127 @@
+"""
+进程池结果的共享内存缓冲区
+每个文件对应一行定长记录（NumPy 结构化数组，放在 multiprocessing.shared_memory 中），
+工作进程把紧凑指标直接写入自己负责的行，只把错误信息与缓存需要的内容键带回主进程；
+主进程按版本取出连续的行，用向量化归约汇总，不必逐文件反序列化、逐个累加。
+"""
+
+import sys
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 没有 NumPy 时进程池照常以元组带回结果
+    np = None
+
+# 每个文件一行：ok 为 False 表示读取或分析失败（不参与汇总），其余列与紧凑指标元组一一对应
+RESULT_FIELDS = (
+    ("ok", "?"),
+    ("code_lines", "<i8"),
+    ("comment_rate", "<f8"),
+    ("complexity", "<i8"),
+    ("total_imports", "<i8"),
+    ("import_count", "<i8"),
+)
+RESULT_DTYPE = np.dtype(list(RESULT_FIELDS)) if np is not None else None
+
+# 缓冲区句柄：(共享内存名称, 文件数)，随任务发送给工作进程
+Handle = Tuple[str, int]
+
+# 本进程已打开的缓冲区：名称 -> (SharedMemory, 数组)；工作进程每个缓冲区只打开一次
+_attached: Dict[str, Tuple[Any, Any]] = {}
+
+
+def numpy_available() -> bool:
+    """是否可以使用共享内存缓冲区（需要 NumPy）"""
+    return np is not None
+
+
+def attach(handle: Handle):
+    """按句柄取得缓冲区数组（工作进程中第一次使用时打开共享内存）"""
+    name, count = handle
+    entry = _attached.get(name)
+    if entry is None:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)  # 由主进程负责释放
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+        entry = _attached[name] = (shm, np.ndarray((count,), RESULT_DTYPE, buffer=shm.buf))
+    return entry[1]
+
+
+def set_record(array, index: int, record: Optional[tuple]) -> None:
+    """把一个文件的紧凑指标元组写入第 index 行；record 为 None 时标记为失败"""
+    if record is None:
+        array[index] = (False, 0, 0.0, 0, 0, 0)
+    else:
+        array[index] = (True, *record)
+
+
+def write_records(handle: Handle, indices: Iterable[int], records: Iterable[Optional[tuple]]) -> None:
+    """工作进程侧：把一批文件的结果写入各自的行"""
+    array = attach(handle)
+    for index, record in zip(indices, records):
+        set_record(array, index, record)
+
+
+def summarize_rows(rows) -> Dict[str, Any]:
+    """
+    向量化汇总一个版本的行，结果与 summarize_file_metrics 逐位一致：
+    整数列用 int64 求和；注释率用 cumsum 按文件顺序逐个累加，与逐个相加的舍入相同
+    """
+    valid = rows[rows["ok"]]
+    count = len(valid)
+    if count == 0:
+        return {"loc": 0, "comment_rate": 0.0, "avg_complexity": 0.0, "total_imports": 0,
+                "avg_import_count": 0.0}
+    return {
+        "loc": int(valid["code_lines"].sum()),
+        "comment_rate": round(float(valid["comment_rate"].cumsum()[-1]) / count, 4),
+        "avg_complexity": round(float(valid["complexity"].sum()) / count, 4),
+        "total_imports": int(valid["total_imports"].sum()),
+        "avg_import_count": round(float(valid["import_count"].sum()) / count, 4),
+    }
+
+
+class SharedResults:
+    """
+    主进程持有的结果缓冲区：创建共享内存、按版本汇总、用完后释放
+    须在使用它的进程池关闭之后再 close（用 with 时先退出进程池）
+    """
+
+    def __init__(self, count: int):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, count * RESULT_DTYPE.itemsize))
+        self.array = np.ndarray((count,), RESULT_DTYPE, buffer=self._shm.buf)
+        self.array["ok"] = False
+        self.handle: Handle = (self._shm.name, count)
+        # 线程池中的任务按句柄直接取到同一个数组
+        _attached[self._shm.name] = (self._shm, self.array)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def set(self, index: int, record: Optional[tuple]) -> None:
+        set_record(self.array, index, record)
+
+    def record(self, index: int) -> Optional[tuple]:
+        """取回第 index 行的紧凑指标元组（写入缓存时使用），失败的文件为 None"""
+        row = self.array[index]
+        if not row["ok"]:
+            return None
+        return (int(row["code_lines"]), float(row["comment_rate"]), int(row["complexity"]),
+                int(row["total_imports"]), int(row["import_count"]))
+
+    def summarize(self, start: int, stop: int) -> Dict[str, Any]:
+        return summarize_rows(self.array[start:stop])
+
+    def close(self) -> None:
+        if self.array is None:
+            return
+        _attached.pop(self._shm.name, None)
+        self.array = None  # 先释放对共享内存的引用，否则无法关闭
+        self._shm.close()
+        self._shm.unlink()
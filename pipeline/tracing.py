@@ -0,0 +1,369 @@
+"""
+轻量的分阶段计时
+流水线在遍历、读取、分析、各分析器、ast.parse、导出等位置打点（span），
+记录按文件 / 版本 / 项目归属，可导出为 Chrome trace（chrome://tracing、Perfetto 可直接打开）
+或汇总为最慢的阶段与文件表格。未启用时 span() 只返回一个共享的空对象。
+enable_tracing(memory=True) 时额外用 tracemalloc 记录每个 span 的峰值内存与净分配（开销较大，仅用于排查内存问题）。
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from analyzers.registry import set_span_factory
+
+# 一段计时记录：耗时均为纳秒；self_ns 为扣除同线程子 span 后的自身耗时
+# context 为归属信息（project / version / file 等），由外层 span 继承而来
+# 启用内存统计时：peak_bytes 为 span 内 traced 内存相对进入时的最高增量，alloc_bytes 为退出时的净增量；否则为 None
+# error: span 内抛出异常时为异常类型名（如 ast.parse 的 SyntaxError）
+SpanEvent = namedtuple("SpanEvent", ["name", "cat", "start_ns", "dur_ns", "self_ns", "pid", "tid", "context",
+                                     "peak_bytes", "alloc_bytes", "error"], defaults=(None, None, None))
+
+_tracer: Optional["Tracer"] = None
+
+
+class _NullSpan:
+    """未启用时 span() 返回的共享对象"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def annotate(self, **context: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "context", "start", "frame")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, context: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.context = context
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        parent = stack[-1][0] if stack else {}
+        # [归属信息（没有新的归属信息时直接共享外层的字典）, 子 span 耗时, 进入时内存, 已观察到的峰值]
+        self.frame = [{**parent, **self.context} if self.context else parent, 0, 0, 0]
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # 重置峰值前先把外层到目前为止的峰值记到外层的 frame 上
+            self.tracer._observe_peak(stack, peak)
+            tracemalloc.reset_peak()
+            self.frame[2] = self.frame[3] = current
+        stack.append(self.frame)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.start
+        tracer = self.tracer
+        stack = tracer._stack()
+        stack.pop()
+        if stack:
+            stack[-1][1] += duration
+        peak_bytes = alloc_bytes = None
+        if tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.frame[3])
+            tracer._observe_peak(stack, peak)
+            peak_bytes, alloc_bytes = peak - self.frame[2], current - self.frame[2]
+        tracer._record(SpanEvent(self.name, self.cat, self.start, duration, duration - self.frame[1],
+                                 tracer.pid, threading.get_ident(), self.frame[0], peak_bytes, alloc_bytes,
+                                 exc_type.__name__ if exc_type is not None else None))
+        return False
+
+    def annotate(self, **context: Any) -> None:
+        """在 span 内补充只有执行后才知道的信息（如读取的字节数）"""
+        self.frame[0] = {**self.frame[0], **context}
+
+
+class Tracer:
+    """
+    收集一个进程内的计时记录（每个线程各自维护嵌套关系）
+    memory=True 时启动 tracemalloc；tracemalloc 按进程统计，多线程同时运行时各 span 的内存只是近似值
+    keep=False 时不保留记录，只交给 listeners（如长时间运行时只需要汇总指标）
+    """
+
+    def __init__(self, memory: bool = False, keep: bool = True):
+        self.pid = os.getpid()
+        self.events: List[SpanEvent] = []
+        self.memory = memory
+        self.keep = keep
+        self.listeners: List[Callable[[SpanEvent], None]] = []
+        self.peak_bytes = 0  # 整个进程观察到的 traced 内存峰值
+        self._local = threading.local()
+        self._started_tracemalloc = memory and not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+
+    def _record(self, event: SpanEvent) -> None:
+        captured = getattr(self._local, "captured", None)
+        if captured is not None:  # run_captured 中的线程：记录随结果带回，由主线程并入
+            captured.append(event)
+            return
+        if self.keep:
+            self.events.append(event)
+        for listener in self.listeners:
+            listener(event)
+
+    def _observe_peak(self, stack: list, peak: int) -> None:
+        if stack:
+            stack[-1][3] = max(stack[-1][3], peak)
+        self.peak_bytes = max(self.peak_bytes, peak)
+
+    def stop(self) -> None:
+        if self.memory:
+            self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, cat: str = "stage", **context: Any) -> _Span:
+        return _Span(self, name, cat, context)
+
+    def current_context(self) -> Dict[str, Any]:
+        stack = self._stack()
+        return stack[-1][0] if stack else {}
+
+    def drain(self) -> List[SpanEvent]:
+        events, self.events = self.events, []
+        return events
+
+    def merge(self, events: Iterable[SpanEvent]) -> None:
+        """并入子进程的记录，补上当前所在 span 的归属信息（如子进程不知道的项目、版本）"""
+        context = self.current_context()
+        if context:
+            events = (event._replace(context={**context, **event.context}) for event in events)
+        if not self.listeners and self.keep:
+            self.events.extend(events)
+            return
+        for event in events:
+            self._record(event)
+
+
+def enable_tracing(memory: bool = False, keep: bool = True) -> Tracer:
+    """在当前进程启用计时（已启用时返回现有的 Tracer）；memory=True 时同时统计内存"""
+    global _tracer
+    if _tracer is None or _tracer.pid != os.getpid():  # fork 出的子进程不沿用父进程的记录
+        _tracer = Tracer(memory, keep)
+        set_span_factory(_tracer.span)
+    return _tracer
+
+
+def disable_tracing() -> Optional[Tracer]:
+    """关闭计时，返回收集到记录的 Tracer（未启用时为 None）"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    set_span_factory(None)
+    if tracer is not None:
+        tracer.stop()
+    return tracer
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def memory_tracing_enabled() -> bool:
+    return _tracer is not None and _tracer.memory
+
+
+def span(name: str, cat: str = "stage", **context: Any):
+    """计时上下文：with span("read", file=path): ...；未启用时几乎没有开销"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, cat, **context)
+
+
+def run_traced(memory: bool, func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, List[SpanEvent]]:
+    """在子进程中执行 func 并计时，返回 (结果, 本次的计时记录)，供主进程 merge_traced 并入"""
+    tracer = enable_tracing(memory)
+    result = func(*args, **kwargs)
+    return result, tracer.drain()
+
+
+def run_captured(func: Callable, *args: Any, **kwargs: Any) -> Tuple[Any, List[SpanEvent]]:
+    """
+    在线程池的工作线程中执行 func，返回 (结果, 本线程这次的计时记录)；
+    记录不直接写入 Tracer，而是像子进程一样由主线程 merge_traced 并入，补上项目、版本等归属信息
+    """
+    tracer = _tracer
+    if tracer is None:
+        return func(*args, **kwargs), []
+    tracer._local.captured = []
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        events, tracer._local.captured = tracer._local.captured, None
+    return result, events
+
+
+def merge_traced(traced: Tuple[Any, List[SpanEvent]]) -> Any:
+    """主进程侧：并入 run_traced / run_captured 带回的记录，返回原始结果"""
+    result, events = traced
+    if _tracer is not None:
+        _tracer.merge(events)
+    return result
+
+
+def _trace_args(event: SpanEvent) -> Dict[str, Any]:
+    args = event.context
+    if event.peak_bytes is not None:
+        args = {**args, "peak_bytes": event.peak_bytes, "alloc_bytes": event.alloc_bytes}
+    if event.error is not None:
+        args = {**args, "error": event.error}
+    return args
+
+
+def chrome_trace(events: Iterable[SpanEvent]) -> Dict[str, Any]:
+    """Chrome trace event 格式（完整事件 ph=X，时间单位微秒）"""
+    return {
+        "displayTimeUnit": "ms",
+        "traceEvents": [
+            {"name": event.name, "cat": event.cat, "ph": "X", "ts": event.start_ns / 1000,
+             "dur": event.dur_ns / 1000, "pid": event.pid, "tid": event.tid, "args": _trace_args(event)}
+            for event in events
+        ],
+    }
+
+
+def write_chrome_trace(events: Iterable[SpanEvent], output_path: str) -> None:
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(events), f, ensure_ascii=False)
+    print(f"计时记录已写入：{output_path}")
+
+
+def stage_summary(events: Iterable[SpanEvent]) -> List[Dict[str, Any]]:
+    """
+    按阶段名汇总：次数、总耗时、自身耗时、平均与最大耗时（秒），按自身耗时降序
+    有内存记录时另给出该阶段单次的最大峰值内存增量 peak_bytes（否则为 None）
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        stage = stages.get(event.name)
+        if stage is None:
+            stage = stages[event.name] = {"stage": event.name, "count": 0, "total": 0, "self": 0, "max": 0,
+                                          "peak": None}
+        stage["count"] += 1
+        stage["total"] += event.dur_ns
+        stage["self"] += event.self_ns
+        stage["max"] = max(stage["max"], event.dur_ns)
+        if event.peak_bytes is not None:
+            stage["peak"] = max(stage["peak"] or 0, event.peak_bytes)
+    rows = []
+    for stage in stages.values():
+        rows.append({
+            "stage": stage["stage"],
+            "count": stage["count"],
+            "total_seconds": stage["total"] / 1e9,
+            "self_seconds": stage["self"] / 1e9,
+            "mean_seconds": stage["total"] / stage["count"] / 1e9,
+            "max_seconds": stage["max"] / 1e9,
+            "peak_bytes": stage["peak"],
+        })
+    return sorted(rows, key=lambda row: row["self_seconds"], reverse=True)
+
+
+def group_totals(events: Iterable[SpanEvent], key: str) -> Dict[Any, Dict[str, float]]:
+    """
+    按归属信息（"project" / "version" / "file" 等）汇总各阶段的自身耗时（秒）
+    版本的归属值为 (项目名, 版本名)，避免不同项目的同名版本混在一起
+    """
+    totals: Dict[Any, Dict[str, float]] = {}
+    for event in events:
+        if key not in event.context:
+            continue
+        group = (event.context.get("project"), event.context["version"]) if key == "version" \
+            else event.context[key]
+        stages = totals.setdefault(group, {})
+        stages[event.name] = stages.get(event.name, 0.0) + event.self_ns / 1e9
+    return totals
+
+
+def slowest(events: Iterable[SpanEvent], name: str = "file", limit: int = 10) -> List[SpanEvent]:
+    """某个阶段中耗时最长的若干条记录（如最慢的文件）"""
+    return sorted((event for event in events if event.name == name),
+                  key=lambda event: event.dur_ns, reverse=True)[:limit]
+
+
+def top_allocating(events: Iterable[SpanEvent], name: str = "file", limit: int = 10) -> List[SpanEvent]:
+    """某个阶段中峰值内存增量最大的若干条记录（如生成代码等巨型模块）；没有内存记录时为空"""
+    return sorted((event for event in events if event.name == name and event.peak_bytes is not None),
+                  key=lambda event: event.peak_bytes, reverse=True)[:limit]
+
+
+def _owner(event: SpanEvent) -> str:
+    owner = "/".join(str(event.context[key]) for key in ("project", "version") if key in event.context)
+    return f"  ({owner})" if owner else ""
+
+
+def format_summary(events: List[SpanEvent], limit: int = 10, flag_ratio: float = 10.0,
+                   peak_bytes: Optional[int] = None) -> str:
+    """
+    文本汇总：各阶段耗时、最慢的文件、各项目 / 版本的耗时；
+    有内存记录时另列各阶段峰值内存与分配最多的文件（峰值超过所有文件中位数 flag_ratio 倍的标记为异常）
+    peak_bytes: 主进程整体的 traced 内存峰值（Tracer.peak_bytes），给出时列在最前
+    """
+    memory = any(event.peak_bytes is not None for event in events)
+    lines = []
+    if peak_bytes is not None:
+        lines.append(f"主进程 traced 内存峰值：{peak_bytes / 1e6:.1f} MB")
+    lines.append("各阶段耗时（按自身耗时排序）：")
+    lines.append(f"  {'阶段':<28}{'次数':>8}{'总耗时(s)':>12}{'自身(s)':>10}{'平均(ms)':>10}{'最大(ms)':>10}"
+                 + (f"{'峰值(MB)':>10}" if memory else ""))
+    for row in stage_summary(events):
+        line = (f"  {row['stage']:<28}{row['count']:>8}{row['total_seconds']:>12.3f}"
+                f"{row['self_seconds']:>10.3f}{row['mean_seconds'] * 1000:>10.2f}"
+                f"{row['max_seconds'] * 1000:>10.2f}")
+        if memory:
+            line += f"{row['peak_bytes'] / 1e6:>10.2f}" if row["peak_bytes"] is not None else f"{'-':>10}"
+        lines.append(line)
+
+    files = slowest(events, "file", limit)
+    if files:
+        lines.append(f"最慢的 {len(files)} 个文件：")
+        for event in files:
+            lines.append(f"  {event.dur_ns / 1e6:>10.2f} ms  {event.context.get('file')}{_owner(event)}")
+
+    allocating = top_allocating(events, "file", limit)
+    if allocating:
+        peaks = sorted(event.peak_bytes for event in events if event.name == "file" and event.peak_bytes is not None)
+        threshold = peaks[len(peaks) // 2] * flag_ratio
+        lines.append(f"峰值内存最高的 {len(allocating)} 个文件：")
+        for event in allocating:
+            flag = "  [异常]" if threshold and event.peak_bytes > threshold else ""
+            lines.append(f"  {event.peak_bytes / 1e6:>10.2f} MB  {event.context.get('file')}{_owner(event)}{flag}")
+
+    for key, title in (("project", "各项目耗时："), ("version", "各版本耗时：")):
+        totals = group_totals(events, key)
+        if not totals:
+            continue
+        lines.append(title)
+        ranked = sorted(totals.items(), key=lambda item: sum(item[1].values()), reverse=True)[:limit]
+        for group, stages in ranked:
+            label = "/".join(map(str, group)) if isinstance(group, tuple) else str(group)
+            top = max(stages.items(), key=lambda item: item[1])
+            lines.append(f"  {label:<36}{sum(stages.values()):>10.3f} s  最耗时阶段：{top[0]}（{top[1]:.3f} s）")
+    return "\n".join(lines)
@@ -0,0 +1,42 @@
+import pytest
+
+# 各版本默认的源码：相对版本目录的路径 -> 内容
+SOURCES = {
+    "a.py": "import os\n# 注释\nx = 1  # 行内\n",
+    "pkg/b.py": "from sys import path\nif path:\n    for p in path:\n        print(p)\n",
+}
+BROKEN_SOURCE = "def bad(:\n    pass\n"
+
+
+def write_projects(root, projects=("alpha", "beta"), versions=("1.0", "2.0"), sources=None,
+                   broken=False, suffix=False, extra=None):
+    """
+    在 root 下创建 项目 × 版本 的目录结构（root/<项目>/<版本>/<相对路径>），返回 root
+    sources 默认为 SOURCES，extra 为额外的文件；broken=True 时每个版本另有语法错误的 pkg/broken.py；
+    suffix=True 时每个文件末尾追加 len(版本名) 行 "# <项目> <版本>"，各版本、各项目的文件内容互不相同
+    """
+    files = dict(SOURCES if sources is None else sources)
+    if broken:
+        files["pkg/broken.py"] = BROKEN_SOURCE
+    files.update(extra or {})
+    for project in projects:
+        for version in versions:
+            for rel_path, content in files.items():
+                file_path = root / project / version / rel_path
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                if suffix:
+                    content += f"# {project} {version}\n" * len(version)
+                file_path.write_text(content, encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def project_layout():
+    """project_root 的布局参数（传给 write_projects）；测试模块按需覆盖"""
+    return {}
+
+
+@pytest.fixture
+def project_root(tmp_path, project_layout):
+    """默认 2 个项目 × 2 个版本的临时目录结构（tmp_path/data）"""
+    return write_projects(tmp_path / "data", **project_layout)
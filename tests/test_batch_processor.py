@@ -0,0 +1,74 @@
+import pytest
+
+from pipeline import batch_processor
+from pipeline.batch_processor import (
+    analyze_file, summarize_file_metrics, process_single_version, process_all_projects, resolve_pool
+)
+from pipeline.metrics_cache import MetricsCache
+from pipeline.csv_exporter import export_to_csv
+
+
+@pytest.fixture
+def project_layout():
+    """各版本内容不同，含语法错误的文件与应被忽略的 tests 目录"""
+    return {"broken": True, "suffix": True, "extra": {"tests/test_skip.py": "import skipped\n"}}
+
+
+def test_analyze_file_compact_result(tmp_path):
+    """测试单文件分析返回紧凑元组"""
+    file_path = tmp_path / "m.py"
+    file_path.write_text("import os\nif os:\n    pass\n", encoding="utf-8")
+    assert analyze_file(str(file_path)) == (3, 0.0, 2, 1, 1)
+    assert analyze_file(str(tmp_path / "missing.py")) is None
+
+
+def test_summarize_skips_failed_files():
+    """测试汇总时跳过失败文件"""
+    metrics = summarize_file_metrics([(10, 0.5, 3, 2, 1), None, (20, 0.0, 1, 0, 0)])
+    assert metrics == {
+        "loc": 30, "comment_rate": 0.25, "avg_complexity": 2.0,
+        "total_imports": 2, "avg_import_count": 0.5
+    }
+
+
+def test_process_single_version(project_root):
+    """测试版本汇总（tests 目录被忽略）"""
+    metrics = process_single_version(str(project_root / "alpha" / "1.0"))
+    assert metrics["total_imports"] == 2
+
+
+def test_parallel_matches_serial(project_root, tmp_path):
+    """测试并行模式的行顺序和 CSV 输出与串行完全一致"""
+    serial = process_all_projects(str(project_root))
+    parallel = process_all_projects(str(project_root), workers=2, chunksize=1)
+    assert parallel == serial
+
+    serial_csv = tmp_path / "out" / "serial.csv"
+    parallel_csv = tmp_path / "out" / "parallel.csv"
+    export_to_csv(serial, str(serial_csv))
+    export_to_csv(parallel, str(parallel_csv))
+    assert serial_csv.read_bytes() == parallel_csv.read_bytes()
+
+
+def test_thread_pool_matches_serial(project_root, tmp_path):
+    """测试线程池模式（含缓存与增量模式）的结果与串行完全一致"""
+    serial = process_all_projects(str(project_root))
+    assert process_all_projects(str(project_root), workers=2, chunksize=1, pool="thread") == serial
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert process_all_projects(str(project_root), workers=2, cache=cache, pool="thread") == serial
+        assert process_all_projects(str(project_root), workers=2, cache=cache, pool="thread",
+                                    state_dir=str(tmp_path / "state")) == serial
+        assert cache.hits > 0
+
+
+def test_resolve_pool(monkeypatch, capsys):
+    """测试 auto 按解释器是否启用 GIL 选择执行方式，启用 GIL 时强制线程池会给出提示"""
+    monkeypatch.setattr(batch_processor, "gil_enabled", lambda: True)
+    assert resolve_pool("auto") == "process"
+    assert resolve_pool("thread") == "thread"
+    assert "GIL" in capsys.readouterr().out
+    monkeypatch.setattr(batch_processor, "gil_enabled", lambda: False)
+    assert resolve_pool("auto") == "thread"
+    assert capsys.readouterr().out == ""
+    with pytest.raises(ValueError):
+        resolve_pool("fiber")
@@ -0,0 +1,80 @@
+import pytest
+
+from benchmarks.baseline import compare_reports, has_regression, load_baseline, save_baseline
+from benchmarks.stats import median, median_ci, ratio_ci
+
+
+def _report(samples_by_case, corpus=None):
+    return {
+        "corpus": corpus or {"files": 10, "seed": 0},
+        "results": [{"name": name, "seconds": median(samples), "samples": samples}
+                    for name, samples in samples_by_case.items()],
+    }
+
+
+def test_median_and_ci():
+    """测试中位数与置信区间：区间包含中位数，相同样本结果稳定"""
+    samples = [1.0, 1.1, 0.9, 1.05, 0.95, 1.2, 1.0]
+    assert median(samples) == 1.0
+    assert median([1.0, 2.0, 4.0, 3.0]) == 2.5
+    low, high = median_ci(samples)
+    assert low <= 1.0 <= high
+    assert median_ci(samples) == (low, high)
+    assert median_ci([2.0]) == (2.0, 2.0)
+    with pytest.raises(ValueError):
+        median([])
+
+    ratio, low, high = ratio_ci([1.0, 1.02, 0.98], [2.0, 2.04, 1.96])
+    assert ratio == pytest.approx(2.0)
+    assert 1.8 < low <= ratio <= high < 2.2
+    assert ratio_ci([1.0], [2.0]) == (2.0, None, None)
+
+
+def test_compare_flags_regressions():
+    """测试分别判定每个用例：明显变慢为回归，波动范围内的变化不算，变快为改进"""
+    baseline = _report({
+        "analyzer:loc": [1.0, 1.01, 0.99, 1.0, 1.02],
+        "analyzer:complexity": [1.0, 1.01, 0.99, 1.0, 1.02],
+        "process_all_projects[workers=1]": [1.0, 1.01, 0.99, 1.0, 1.02],
+        "analyzer:noisy": [1.0, 0.6, 1.4, 0.8, 1.2],
+        "analyzer:removed": [1.0],
+    })
+    current = _report({
+        "analyzer:loc": [1.5, 1.52, 1.49, 1.5, 1.51],
+        "analyzer:complexity": [0.5, 0.51, 0.49, 0.5, 0.5],
+        "process_all_projects[workers=1]": [1.03, 1.0, 1.04, 1.02, 1.01],
+        "analyzer:noisy": [1.15, 0.7, 1.6, 0.9, 1.3],
+        "analyzer:added": [1.0],
+    })
+    status = {c.name: c.status for c in compare_reports(baseline, current, threshold=0.1)}
+    assert status == {
+        "analyzer:loc": "regression",
+        "analyzer:complexity": "improvement",
+        "process_all_projects[workers=1]": "unchanged",
+        "analyzer:noisy": "unchanged",
+        "analyzer:added": "new",
+        "analyzer:removed": "missing",
+    }
+    assert has_regression(compare_reports(baseline, current))
+    # 单独放宽某个用例的阈值
+    relaxed = compare_reports(baseline, current, thresholds={"analyzer:loc": 0.6})
+    assert not has_regression(relaxed)
+
+
+def test_compare_requires_same_corpus():
+    """测试语料参数不同的报告不能对比"""
+    with pytest.raises(ValueError):
+        compare_reports(_report({"a": [1.0]}), _report({"a": [1.0]}, corpus={"files": 20, "seed": 0}))
+
+
+def test_baseline_roundtrip(tmp_path):
+    """测试命名基线的保存与读取，非法名称报错"""
+    report = _report({"analyzer:loc": [1.0, 1.1]})
+    path = save_baseline(report, "main", str(tmp_path))
+    loaded = load_baseline("main", str(tmp_path))
+    assert loaded["results"] == report["results"] and loaded["baseline_name"] == "main"
+    assert load_baseline(path)["baseline_name"] == "main"
+    with pytest.raises(ValueError):
+        save_baseline(report, "../escape", str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        load_baseline("missing", str(tmp_path))
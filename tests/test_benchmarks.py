@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.runner import default_cases, run_benchmarks, write_report
+from pipeline.file_walker import get_project_versions, get_python_files
+
+
+def _digest(root):
+    digest = hashlib.sha1()
+    for path in sorted(p for p in root.rglob("*.py")):
+        digest.update(str(path.relative_to(root)).encode() + path.read_bytes())
+    return digest.hexdigest()
+
+
+def test_corpus_is_reproducible(tmp_path):
+    """测试相同参数生成字节完全相同的语料，参数改变时重新生成"""
+    first = generate_corpus(str(tmp_path / "a"), files=30, projects=2, versions=2, max_blocks=20, seed=7)
+    second = generate_corpus(str(tmp_path / "b"), files=30, projects=2, versions=2, max_blocks=20, seed=7)
+    assert first == second
+    assert _digest(tmp_path / "a") == _digest(tmp_path / "b")
+    assert first["total_files"] == 120
+
+    projects = get_project_versions(str(tmp_path / "a"))
+    assert sorted(projects) == ["project0", "project1"]
+    assert len(get_python_files(projects["project0"]["2.0"])) == 30
+
+    other = generate_corpus(str(tmp_path / "a"), files=30, projects=2, versions=2, max_blocks=20, seed=8)
+    assert other["seed"] == 8 and _digest(tmp_path / "a") != _digest(tmp_path / "b")
+
+    # 参数变小时不留下旧语料多出的文件与项目
+    smaller = generate_corpus(str(tmp_path / "a"), files=10, projects=1, versions=1, max_blocks=20, seed=7)
+    assert smaller["total_files"] == 10
+    assert sorted(get_project_versions(str(tmp_path / "a"))) == ["project0"]
+    assert sum(len(files) for _, _, files in os.walk(tmp_path / "a")) == 11  # 含 corpus.json
+
+
+def test_report(tmp_path):
+    """测试报告包含吞吐量与峰值内存，并可写为 JSON"""
+    spec = generate_corpus(str(tmp_path / "corpus"), files=10, versions=1, max_blocks=5)
+    report = run_benchmarks(str(tmp_path / "corpus"), spec,
+                            [("analyzer:loc", 1), ("process_all_projects", 1)])
+    names = [result["name"] for result in report["results"]]
+    assert names == ["analyzer:loc", "process_all_projects[workers=1]"]
+    for result in report["results"]:
+        assert result["files"] == 10
+        assert result["bytes"] == spec["total_bytes"]
+        assert result["files_per_sec"] > 0 and result["mb_per_sec"] > 0
+        assert result["peak_rss_bytes"] is None or result["peak_rss_bytes"] > 0
+
+    write_report(report, str(tmp_path / "out" / "report.json"))
+    assert json.loads((tmp_path / "out" / "report.json").read_text(encoding="utf-8"))["corpus"] == spec
+
+
+def test_default_cases_thread_pool():
+    """测试线程池用例只在并行数大于 1 时加入，与同样并行数的进程池用例对比"""
+    cases = default_cases(workers=(1, 4), pools=("process", "thread"))
+    parallel = [case for case in cases if case[0].startswith("process_all")]
+    assert parallel == [("process_all_projects", 1), ("process_all_projects", 4),
+                        ("process_all_projects_threads", 4)]
+    assert ("process_all_projects_threads", 4) not in default_cases(workers=(4,))
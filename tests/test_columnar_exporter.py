@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from pipeline.batch_processor import process_all_projects
+from pipeline.columnar_exporter import (
+    convert_rows_file, detect_format, export_file_metrics, export_to_columnar
+)
+from pipeline.csv_exporter import StreamingExporter, export_to_csv
+from pipeline.metrics_store import MetricsStore
+from visualization.data_loader import load_metrics
+
+
+@pytest.fixture
+def project_layout():
+    """项目名为纯数字，检验分区列仍是字符串"""
+    return {"projects": ("alpha", "2048"), "suffix": True}
+
+
+def _sorted_records(df):
+    return sorted(df.to_dict("records"), key=lambda row: (row["project_name"], row["version"]))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_round_trip_partitioned_by_project(project_root, tmp_path, fmt):
+    """测试按项目分区写出，读回的行与类型与原始结果一致"""
+    rows = process_all_projects(str(project_root))
+    output_dir = tmp_path / "columnar"
+    export_to_columnar(rows, str(output_dir), fmt=fmt)
+
+    assert sorted(p.name for p in output_dir.iterdir()) == ["project_name=2048", "project_name=alpha"]
+    assert detect_format(str(output_dir)) == fmt
+    df = load_metrics(str(output_dir))
+    assert _sorted_records(df) == sorted(rows, key=lambda row: (row["project_name"], row["version"]))
+    assert df["version"].tolist().count("1.0") == 2
+
+    # 重新导出覆盖已有分区，不会重复
+    export_to_columnar(rows, str(output_dir), fmt=fmt)
+    assert len(load_metrics(str(output_dir))) == len(rows)
+
+
+def test_column_projection(project_root, tmp_path):
+    """测试只读取请求的列，缺失的列被忽略"""
+    export_to_columnar(process_all_projects(str(project_root)), str(tmp_path / "columnar"))
+    df = load_metrics(str(tmp_path / "columnar"), columns=["version", "loc", "missing"])
+    assert list(df.columns) == ["version", "loc"]
+
+
+@pytest.mark.parametrize("name", ["rows.csv", "rows.jsonl"])
+def test_convert_rows_file(project_root, tmp_path, name):
+    """测试 CSV / JSON Lines 输出转换为 Parquet 后与原始结果一致"""
+    rows = process_all_projects(str(project_root))
+    if name.endswith(".csv"):
+        export_to_csv(rows, str(tmp_path / "out" / name))
+    else:
+        with StreamingExporter(str(tmp_path / "out" / name)) as exporter:
+            exporter.write_rows(rows)
+    convert_rows_file(str(tmp_path / "out" / name), str(tmp_path / "columnar"))
+    assert _sorted_records(load_metrics(str(tmp_path / "columnar"))) == \
+        sorted(rows, key=lambda row: (row["project_name"], row["version"]))
+
+
+def test_export_file_metrics(project_root, tmp_path):
+    """测试逐文件明细分批导出，行数与指标库一致"""
+    with MetricsStore(str(tmp_path / "store.sqlite")) as store:
+        process_all_projects(str(project_root), store=store)
+        export_file_metrics(store, str(tmp_path / "files"), batch_rows=3)
+        total = store.query("SELECT COUNT(*) FROM file_metrics")[0][0]
+    df = load_metrics(str(tmp_path / "files"), columns=["project_name", "path", "cyclomatic_complexity"])
+    assert len(df) == total == 8
+    assert df[df["path"] == "pkg/b.py"]["cyclomatic_complexity"].tolist() == [3, 3, 3, 3]
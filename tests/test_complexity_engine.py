@@ -0,0 +1,97 @@
+import ast
+import pathlib
+
+from analyzers.complexity import calculate_complexity, calculate_complexity_detail, complexity_hotspots
+from analyzers.engine import analyze_source
+from analyzers.registry import ParseContext, run_analyzers
+
+SAMPLE_CODE = '''
+import x
+
+@decorate(lambda v: v or None)
+class A(Base):
+    def f(self, a):
+        if a and b or c:
+            return [i for i in a if i]
+        match a:
+            case 1:
+                pass
+            case _:
+                pass
+        def g():
+            while x:
+                pass
+        return 1 if a else 2
+
+async def h():
+    async for item in items:
+        try:
+            pass
+        except ValueError:
+            pass
+        finally:
+            pass
+'''
+
+
+def _legacy_counts(code):
+    """旧版 ast.walk + isinstance 的统计方式，用于对照"""
+    counts = dict.fromkeys(('if_count', 'for_count', 'while_count', 'try_count', 'except_count'), 0)
+    for node in ast.walk(ast.parse(code)):
+        if isinstance(node, ast.If):
+            counts['if_count'] += 1
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            counts['for_count'] += 1
+        elif isinstance(node, ast.While):
+            counts['while_count'] += 1
+        elif isinstance(node, ast.Try):
+            counts['try_count'] += 1
+            counts['except_count'] += len(node.handlers)
+    return counts
+
+
+def test_legacy_counts_unchanged():
+    """测试旧版复杂度指标与 ast.walk 的结果一致（含本仓库全部源码）"""
+    root = pathlib.Path(__file__).resolve().parent.parent
+    sources = [SAMPLE_CODE] + [path.read_text(encoding='utf-8') for path in sorted(root.glob('*/*.py'))]
+    for code in sources:
+        if not code.strip():
+            continue
+        result = calculate_complexity(code)
+        expected = _legacy_counts(code)
+        assert {name: result[name] for name in expected} == expected
+        assert result['cyclomatic_complexity'] == 1 + sum(expected.values())
+
+
+def test_scope_records():
+    """测试每个函数、类的复杂度在同一次遍历中得到"""
+    detail = calculate_complexity_detail(SAMPLE_CODE)
+    scopes = {scope.name: scope for scope in detail['scopes']}
+    # 1 + if + 2 个布尔运算 + 推导式 for/if + 非兜底 case + 条件表达式
+    assert scopes['A.f'].complexity == 8
+    assert scopes['A.f.g'].complexity == 2
+    assert scopes['A'].complexity == 1
+    assert scopes['h'].complexity == 3
+    assert scopes['<module>'].complexity == 2  # 装饰器中的布尔运算计入模块
+    assert (scopes['A.f'].kind, scopes['A.f'].lineno, scopes['A.f'].end_lineno) == ('function', 6, 17)
+    assert detail['cyclomatic_complexity'] == 1 + sum(scope.complexity - 1 for scope in detail['scopes'])
+    assert detail['bool_op_count'] == 3 and detail['match_case_count'] == 1
+
+
+def test_hotspots():
+    """测试热点按复杂度降序"""
+    assert [scope.name for scope in complexity_hotspots(SAMPLE_CODE, limit=2)] == ['A.f', 'h']
+
+
+def test_detail_and_legacy_share_traversal():
+    """测试同时请求两种结果时，AST 只解析一次且共用同一次遍历"""
+    ctx = ParseContext(SAMPLE_CODE, ('complexity', 'complexity_detail'))
+    result = run_analyzers(None, ('complexity', 'complexity_detail'), context=ctx)
+    assert ctx.built == ['ast']
+    assert result['complexity'] == calculate_complexity(SAMPLE_CODE)
+
+
+def test_syntax_error_and_blank():
+    """测试语法错误与空白代码"""
+    assert calculate_complexity_detail("def bad(:\n")['error'].startswith('语法错误')
+    assert analyze_source("  \n", ('complexity_detail',))['complexity_detail']['scopes'] == []
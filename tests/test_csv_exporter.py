@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+from pipeline.batch_processor import iter_all_projects, process_all_projects
+from pipeline.csv_exporter import StreamingExporter, export_to_csv, read_exported_rows
+
+
+@pytest.fixture
+def project_layout():
+    """2 个项目 × 3 个版本，各版本内容不同"""
+    return {"versions": ("1.0", "2.0", "3.0"), "suffix": True}
+
+
+def test_streaming_csv_matches_export_to_csv(project_root, tmp_path):
+    """测试流式导出的 CSV 与一次性导出的字节完全一致"""
+    rows = process_all_projects(str(project_root))
+    export_to_csv(rows, str(tmp_path / "out" / "full.csv"))
+    with StreamingExporter(str(tmp_path / "out" / "stream.csv")) as exporter:
+        assert exporter.write_rows(iter_all_projects(str(project_root))) == len(rows)
+    assert (tmp_path / "out" / "stream.csv").read_bytes() == (tmp_path / "out" / "full.csv").read_bytes()
+
+
+def test_resume_skips_done_versions_and_drops_partial_row(project_root, tmp_path):
+    """测试中断后重启：跳过已完成的版本，丢弃写了一半的行，结果与一次跑完相同"""
+    rows = process_all_projects(str(project_root))
+    export_to_csv(rows, str(tmp_path / "full.csv"))
+
+    output = tmp_path / "resume.csv"
+    with StreamingExporter(str(output)) as exporter:
+        exporter.write_rows(rows[:4])
+    with open(output, "ab") as f:
+        f.write(b"beta,2.0,2,1")  # 模拟写到一半时进程被杀
+
+    with StreamingExporter(str(output)) as exporter:
+        assert exporter.done == {(row["project_name"], row["version"]) for row in rows[:4]}
+        resumed = list(iter_all_projects(str(project_root), skip=set(exporter.done)))
+        assert resumed == rows[4:]
+        exporter.write_rows(resumed)
+    assert output.read_bytes() == (tmp_path / "full.csv").read_bytes()
+
+
+def test_resume_false_starts_over(project_root, tmp_path):
+    """测试 resume=False 时清空检查点并重新导出"""
+    rows = process_all_projects(str(project_root))
+    output = tmp_path / "out.csv"
+    with StreamingExporter(str(output)) as exporter:
+        exporter.write_rows(rows)
+    with StreamingExporter(str(output), resume=False) as exporter:
+        assert exporter.done == set()
+        exporter.write_rows(rows[:1])
+    assert len(output.read_text(encoding="utf-8-sig").splitlines()) == 2
+
+
+def test_finish_removes_checkpoint(project_root, tmp_path):
+    """测试完整写完后删除检查点：再次以恢复模式运行时重新导出，不保留旧的结果"""
+    rows = process_all_projects(str(project_root))
+    output = tmp_path / "out.csv"
+    with StreamingExporter(str(output)) as exporter:
+        exporter.write_rows(rows)
+        exporter.finish()
+    assert not (tmp_path / "out.csv.checkpoint.jsonl").exists()
+    with StreamingExporter(str(output)) as exporter:
+        assert exporter.done == set()
+        exporter.write_rows(rows[:1])
+    assert len(output.read_text(encoding="utf-8-sig").splitlines()) == 2
+
+
+def test_jsonl_output(project_root, tmp_path):
+    """测试 JSON Lines 输出，列顺序与 CSV 相同"""
+    rows = process_all_projects(str(project_root))
+    output = tmp_path / "out.jsonl"
+    with StreamingExporter(str(output)) as exporter:
+        exporter.write_rows(rows)
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == rows
+    assert list(json.loads(lines[0])) == list(rows[0])
+
+
+@pytest.mark.parametrize("kwargs", [{"workers": 2}, {"state_dir": "state"}])
+def test_skip_in_parallel_and_incremental_modes(project_root, tmp_path, kwargs):
+    """测试并行与增量模式下跳过中间版本，其余行不变"""
+    if "state_dir" in kwargs:
+        kwargs = {"state_dir": str(tmp_path / kwargs["state_dir"])}
+    rows = process_all_projects(str(project_root))
+    skip = {("alpha", "1.0"), ("alpha", "2.0")}
+    expected = [row for row in rows if (row["project_name"], row["version"]) not in skip]
+    # 增量模式先完整跑一遍，被跳过的版本留下状态文件供后续版本作为基准
+    list(iter_all_projects(str(project_root), **kwargs))
+    assert list(iter_all_projects(str(project_root), skip=skip, **kwargs)) == expected
+
+
+def test_streaming_csv_quoting_matches_export_to_csv(tmp_path):
+    """测试需要转义的字段（逗号、引号、换行、空值、浮点数）与一次性导出的字节一致"""
+    rows = [
+        {"project_name": 'a,"b"', "version": "1.0\n2", "file_count": 3, "loc": None, "comment_rate": 0.1 + 0.2,
+         "avg_complexity": 1e-7, "total_imports": 0, "avg_import_count": " x "},
+        {"project_name": "plain", "version": "2.0\r", "file_count": 0, "loc": 1, "comment_rate": 0.0,
+         "avg_complexity": 2.5, "total_imports": 1},
+    ]
+    export_to_csv(rows, str(tmp_path / "out" / "full.csv"))
+    with StreamingExporter(str(tmp_path / "out" / "stream.csv")) as exporter:
+        exporter.write_rows(rows)
+    assert (tmp_path / "out" / "stream.csv").read_bytes() == (tmp_path / "out" / "full.csv").read_bytes()
+
+
+@pytest.mark.parametrize("name", ["out.csv", "out.ndjson"])
+def test_read_exported_rows_agrees_with_resume(project_root, tmp_path, name):
+    """测试读回的行与恢复时认定的已完成版本一致（含 .ndjson 与写了一半的检查点行）"""
+    rows = process_all_projects(str(project_root))
+    output = tmp_path / name
+    with StreamingExporter(str(output)) as exporter:
+        exporter.write_rows(rows[:3])
+    with open(output, "ab") as f:
+        f.write(b'{"project_name": "beta"')
+    with open(str(output) + ".checkpoint.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"project_name": "beta", "vers')
+
+    read = read_exported_rows(str(output))
+    assert [(row["project_name"], row["version"]) for row in read] == \
+        [(row["project_name"], row["version"]) for row in rows[:3]]
+    if name.endswith(".ndjson"):
+        assert read == rows[:3]
+    with StreamingExporter(str(output)) as exporter:
+        assert exporter.done == {(row["project_name"], row["version"]) for row in read}
+        exporter.write_rows(rows[3:])
+    # 恢复后追加的检查点记录没有接在写了一半的行后面
+    with StreamingExporter(str(output)) as exporter:
+        assert len(exporter.done) == len(rows)
+    assert len(read_exported_rows(str(output))) == len(rows)
+
+
+@pytest.mark.parametrize("name", ["out.csv", "out.jsonl"])
+def test_finish_without_rows_writes_nothing(tmp_path, capsys, name):
+    """测试没有任何版本时与 export_to_csv 一样提示“无数据可导出”、不留下输出；keep_empty 时保留空输出"""
+    output = tmp_path / "out" / name
+    export_to_csv([], str(output))
+    with StreamingExporter(str(output)) as exporter:
+        assert exporter.write_rows([]) == 0
+        assert exporter.finish() is False
+    assert "无数据可导出" in capsys.readouterr().out
+    assert not output.exists() and not (tmp_path / "out" / (name + ".checkpoint.jsonl")).exists()
+
+    exporter = StreamingExporter(str(output))
+    assert exporter.finish(keep_empty=True) is True
+    assert read_exported_rows(str(output)) == []
@@ -0,0 +1,64 @@
+from analyzers.engine import analyze_source, ALL_SECTIONS
+from analyzers.loc import calculate_loc
+from analyzers.comment import analyze_comments
+from analyzers.complexity import calculate_complexity
+from analyzers.dependency import analyze_dependencies
+
+SAMPLE_CODE = '''import os, sys.path
+from flask import Flask  # web
+# TODO: 拆分函数
+
+def handler(x):
+    if x > 0:
+        for i in range(x):
+            print(i)
+    try:
+        pass
+    except ValueError:
+        pass
+'''
+
+
+def test_single_pass_matches_wrappers():
+    """测试引擎一次计算的结果与各分析函数一致"""
+    result = analyze_source(SAMPLE_CODE)
+    assert set(result) == set(ALL_SECTIONS)
+    assert result['loc'] == calculate_loc(SAMPLE_CODE)
+    assert result['comments'] == analyze_comments(SAMPLE_CODE)
+    assert result['complexity'] == calculate_complexity(SAMPLE_CODE)
+    assert result['dependency'] == analyze_dependencies(SAMPLE_CODE)
+
+
+def test_sample_values():
+    """测试各指标的具体数值"""
+    result = analyze_source(SAMPLE_CODE)
+    assert result['loc']['code_lines'] == 10
+    assert result['loc']['comment_lines'] == 1
+    assert result['loc']['inline_comment_lines'] == 1
+    assert result['comments']['todo_count'] == 1
+    assert result['complexity']['cyclomatic_complexity'] == 5
+    assert result['dependency']['modules'] == ['os', 'sys', 'flask']
+    assert result['dependency']['external_libs'] == ['flask']
+
+
+def test_only_requested_sections():
+    """测试只计算请求的指标分组"""
+    result = analyze_source(SAMPLE_CODE, ('loc',))
+    assert list(result) == ['loc']
+
+
+def test_blank_code_keeps_legacy_results():
+    """测试空白代码：LOC 逐行统计，其余指标返回空结果"""
+    result = analyze_source("  \n\t")
+    assert result['loc']['blank_lines'] == 2
+    assert result['comments']['total_comments'] == 0
+    assert result['complexity']['cyclomatic_complexity'] == 1
+    assert result['dependency']['total_imports'] == 0
+    assert analyze_source("")['loc']['comment_rate'] == 0
+
+
+def test_syntax_error_only_affects_complexity():
+    """测试语法错误只记录在复杂度结果中"""
+    result = analyze_source("def bad(:\n    pass")
+    assert result['complexity']['error'].startswith('语法错误')
+    assert result['loc']['code_lines'] == 2
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+import pipeline.batch_processor as batch_processor
+import pipeline.file_walker as file_walker
+import pipeline.incremental as incremental
+from pipeline.batch_processor import process_all_projects
+from pipeline.file_walker import FileManifest, get_python_files, scan_python_files
+from pipeline.metrics_cache import MetricsCache
+
+OLD_MTIME = 1_600_000_000
+
+
+def _walk_python_files(root_dir):
+    """原来基于 os.walk 的实现，作为对照"""
+    python_files = []
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('__pycache__', 'tests')]
+        for file in files:
+            if file.endswith('.py') and not file.startswith('.'):
+                python_files.append(os.path.abspath(os.path.join(root, file)))
+    return python_files
+
+
+@pytest.fixture
+def project_layout():
+    return {"projects": ("proj",), "suffix": True}
+
+
+@pytest.fixture
+def project_root(project_root):
+    """1 个项目 × 2 个版本，文件修改时间设为很久以前"""
+    for root, dirs, files in os.walk(project_root):
+        for name in files:
+            os.utime(os.path.join(root, name), (OLD_MTIME, OLD_MTIME))
+    return project_root
+
+
+def test_scan_matches_os_walk(tmp_path):
+    """测试 scandir 遍历的结果与顺序和 os.walk 版完全一致"""
+    for rel_path in ("z.py", "a/y.py", "a/b/x.py", "a/b/n.txt", ".hidden/q.py",
+                     "tests/t.py", "__pycache__/c.py", "c/.s.py", "c/w.py"):
+        (tmp_path / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel_path).write_text("x = 1\n", encoding="utf-8")
+    os.symlink(tmp_path / "a", tmp_path / "c" / "linked_dir")
+    os.symlink(tmp_path / "z.py", tmp_path / "c" / "linked.py")
+    os.symlink(tmp_path / "missing", tmp_path / "c" / "broken.py")
+
+    assert get_python_files(str(tmp_path)) == _walk_python_files(str(tmp_path))
+    stats = scan_python_files(str(tmp_path))
+    assert stats[str(tmp_path / "c" / "broken.py")] == (-1, 0, 0)
+    assert stats[str(tmp_path / "c" / "linked.py")][0] == 6
+
+
+def test_scan_once_per_run(project_root, monkeypatch):
+    """测试同一次运行内每个版本目录只遍历一次"""
+    calls = []
+
+    def spy(root_dir):
+        calls.append(root_dir)
+        return scan_python_files(root_dir)
+
+    monkeypatch.setattr(file_walker, "scan_python_files", spy)
+    process_all_projects(str(project_root))
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("mode", [{}, {"workers": 2}, {"state_dir": "state"}])
+def test_unchanged_files_not_read_on_rerun(project_root, tmp_path, monkeypatch, mode):
+    """测试持久化清单：再次运行时 stat 未变的文件不读取内容，结果不变"""
+    if "state_dir" in mode:
+        mode = {"state_dir": str(tmp_path / "state")}
+    manifest_path = str(tmp_path / "manifest.json")
+    expected = process_all_projects(str(project_root))
+
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        manifest = FileManifest(manifest_path)
+        assert process_all_projects(str(project_root), cache=cache, manifest=manifest, **mode) == expected
+        manifest.save()
+
+    def fail_open(*args, **kwargs):
+        raise AssertionError("stat 未变的文件不应再读取")
+
+    monkeypatch.setattr(batch_processor, "open", fail_open, raising=False)
+    monkeypatch.setattr(incremental, "open", lambda path, mode="r", **kwargs: (
+        fail_open() if "b" in mode else open(path, mode, **kwargs)), raising=False)
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        manifest = FileManifest(manifest_path)
+        assert process_all_projects(str(project_root), cache=cache, manifest=manifest, **mode) == expected
+
+
+def test_changed_stat_invalidates_key(project_root, tmp_path):
+    """测试文件内容变化（stat 随之变化）后重新读取"""
+    manifest_path = str(tmp_path / "manifest.json")
+    file_path = str(project_root / "proj" / "1.0" / "a.py")
+    manifest = FileManifest(manifest_path)
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        process_all_projects(str(project_root), cache=cache, manifest=manifest)
+    manifest.save()
+    assert FileManifest(manifest_path).get_key(file_path) is None  # 尚未扫描
+    reloaded = FileManifest(manifest_path)
+    reloaded.scan(str(project_root / "proj" / "1.0"))
+    assert reloaded.get_key(file_path) is not None
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("import sys\n")
+    changed = FileManifest(manifest_path)
+    changed.scan(str(project_root / "proj" / "1.0"))
+    assert changed.get_key(file_path) is None
+    # 修改时间过近的文件不记录内容键
+    changed.set_key(file_path, "0" * 40)
+    assert changed.get_key(file_path) is None
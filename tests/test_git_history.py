@@ -0,0 +1,78 @@
+import os
+import subprocess
+
+from pipeline import git_history
+from pipeline.batch_processor import summarize_file_metrics
+from pipeline.git_history import iter_commit_changes, process_git_history
+from pipeline.git_source import GitBlobReader, analyze_blobs, list_python_blobs
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True,
+                          capture_output=True, text=True).stdout
+
+
+def _commit(repo, message, files=(), removed=()):
+    for rel_path, content in dict(files).items():
+        file_path = repo / rel_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding="utf-8")
+    for rel_path in removed:
+        _git(repo, "rm", "-q", rel_path)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", message)
+
+
+def test_history_rows_match_full_tree_analysis(tmp_path):
+    """测试逐提交的累计结果与在每个提交上全量分析一致（含合并、删除、符号链接）"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    _commit(repo, "c1", {"a.py": "import os\n", "pkg/b.py": "if x:\n    pass\n", "README": "x"})
+    _git(repo, "checkout", "-qb", "feature")
+    _commit(repo, "f1", {"pkg/c.py": "from sys import path\n", "tests/test_a.py": "import a\n"})
+    _git(repo, "checkout", "-q", "main")
+    _commit(repo, "c2", {"a.py": "import os  # 改\nimport re\n"}, removed=["pkg/b.py"])
+    _git(repo, "merge", "-q", "--no-edit", "feature")
+    os.symlink("a.py", repo / "link.py")
+    _commit(repo, "c3", {"bad.py": "def f(:\n"})
+
+    commits = _git(repo, "rev-list", "--first-parent", "--reverse", "main").split()
+    assert [commit for commit, changes in iter_commit_changes(str(repo))] == commits
+
+    rows = process_git_history(str(repo), "proj", batch_commits=2)
+    assert [row["version"] for row in rows] == commits
+    assert process_git_history(str(repo), "proj", workers=2) == rows
+
+    with GitBlobReader(str(repo)) as reader:
+        for commit, row in zip(commits, rows):
+            blobs = list_python_blobs(str(repo), commit)
+            expected = summarize_file_metrics(analyze_blobs(blobs, reader, {}))
+            assert row == {"project_name": "proj", "version": commit,
+                           "file_count": len(blobs), **expected}
+
+
+def test_memo_keeps_only_current_tree(tmp_path, monkeypatch):
+    """测试每批回放后 memo 只保留当前树中的 blob，回退到旧内容时结果仍正确"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    for index in range(4):
+        _commit(repo, f"c{index}", {"a.py": f"x = {index}\n", f"m{index}.py": "import os\n"})
+    _commit(repo, "revert", {"a.py": "x = 0\n"}, removed=["m3.py"])
+
+    memos = []
+    original = git_history.analyze_missing_blobs
+    monkeypatch.setattr(git_history, "analyze_missing_blobs",
+                        lambda shas, reader, memo, *args: memos.append(memo) or original(shas, reader, memo, *args))
+    rows = process_git_history(str(repo), "proj", batch_commits=1)
+    final_tree = {sha for path, sha, size in list_python_blobs(str(repo), "HEAD")}
+    assert set(memos[-1]) == final_tree
+
+    with GitBlobReader(str(repo)) as reader:
+        expected = summarize_file_metrics(analyze_blobs(list_python_blobs(str(repo), "HEAD"), reader, {}))
+    assert rows[-1] == {"project_name": "proj", "version": rows[-1]["version"], "file_count": 4, **expected}
@@ -0,0 +1,95 @@
+import subprocess
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pipeline.batch_processor import process_all_projects
+from pipeline.git_source import GitBlobReader, analyze_missing_blobs, list_python_blobs, list_tags, process_git_tags
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """创建带两个标签的临时仓库，同时导出一份目录结构用于对比"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    versions = {
+        "v1.0": {"app.py": "import os\nif os:\n    pass\n", "pkg/util.py": "from sys import path\n",
+                 "tests/test_app.py": "import app\n", ".hidden/x.py": "import y\n"},
+        "v2.0": {"app.py": "import os\nif os:\n    pass\n", "pkg/util.py": "from sys import path  # 改\n",
+                 "pkg/new.py": "def f(:\n"},
+    }
+    for tag, files in versions.items():
+        _git(repo, "rm", "-rq", "--ignore-unmatch", ".")
+        for rel_path, content in files.items():
+            for root in (repo, tmp_path / "data" / "proj" / tag):
+                file_path = root / rel_path
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_text(content, encoding="utf-8")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-qm", tag)
+        _git(repo, "tag", tag)
+    return repo
+
+
+def test_list_python_blobs_filters_like_file_walker(repo):
+    """测试 ls-tree 结果与 get_python_files 的过滤规则一致"""
+    assert list_tags(str(repo)) == ["v1.0", "v2.0"]
+    paths = [path for path, sha, size in list_python_blobs(str(repo), "v1.0")]
+    assert paths == ["app.py", "pkg/util.py"]
+
+
+def test_reader_reads_blob_bytes(repo):
+    """测试 cat-file --batch 读取 blob 内容"""
+    (path, sha, size), *_ = list_python_blobs(str(repo), "v1.0")
+    with GitBlobReader(str(repo)) as reader:
+        data = reader.read(sha)
+        assert data == b"import os\nif os:\n    pass\n" and len(data) == size
+        with pytest.raises(KeyError):
+            reader.read("0" * 40)
+
+
+def test_tags_match_exported_tree_and_blobs_are_read_once(repo, tmp_path, monkeypatch):
+    """测试直接分析标签的结果与导出目录一致，相同 blob 只读取一次"""
+    reads = []
+    original_read = GitBlobReader.read
+    monkeypatch.setattr(GitBlobReader, "read", lambda self, sha: reads.append(sha) or original_read(self, sha))
+
+    rows = process_git_tags({"proj": str(repo)})
+    assert rows == process_all_projects(str(tmp_path / "data"))
+    assert len(reads) == len(set(reads)) == 4
+
+
+def test_unreadable_blob_recorded_as_error(repo):
+    """测试读取失败的 blob 记为失败结果，不留下占位，其余 blob 照常分析"""
+    (path, sha, size), *_ = list_python_blobs(str(repo), "v1.0")
+    memo = {}
+    with GitBlobReader(str(repo)) as reader:
+        analyze_missing_blobs([sha, "0" * 40], reader, memo)
+    assert memo[sha][0] is not None
+    record, error = memo["0" * 40]
+    assert record is None and "对象不存在" in error
+
+
+class _BrokenExecutor:
+    def map(self, func, *iterables, chunksize=1):
+        raise BrokenProcessPool("进程池已崩溃")
+
+
+def test_failed_analysis_leaves_no_placeholder(repo):
+    """测试分析中途失败时 memo 中不留占位，捕获异常后可以重新分析"""
+    shas = [sha for path, sha, size in list_python_blobs(str(repo), "v2.0")]
+    memo = {}
+    with GitBlobReader(str(repo)) as reader:
+        with pytest.raises(BrokenProcessPool):
+            analyze_missing_blobs(shas + shas, reader, memo, executor=_BrokenExecutor())
+        assert memo == {}
+        analyze_missing_blobs(shas + shas, reader, memo)
+    assert sorted(memo) == sorted(set(shas))
+    assert all(len(entry) == 2 for entry in memo.values())
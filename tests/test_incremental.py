@@ -0,0 +1,76 @@
+import json
+
+from pipeline.batch_processor import process_all_projects, analyze_file
+from pipeline.incremental import VersionState, process_version_incremental, diff_manifests
+from pipeline.file_walker import get_python_files
+
+
+def _write_version(root, version, files):
+    version_dir = root / version
+    for rel_path, content in files.items():
+        file_path = version_dir / rel_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding="utf-8")
+    return str(version_dir)
+
+
+def _spy(calls):
+    def analyze_paths(paths):
+        calls.append(sorted(p.replace("\\", "/").rsplit("/", 1)[1] for p in paths))
+        return [analyze_file(p) for p in paths]
+    return analyze_paths
+
+
+def test_diff_manifests():
+    """测试清单对比：新增、修改（大小或哈希不同）、删除"""
+    previous = {"a.py": (10, "h1", None), "b.py": (5, "h2", None), "c.py": (1, "h3", None)}
+    manifest = {"a.py": (10, "h1"), "b.py": (5, "hX"), "d.py": (2, "h4")}
+    assert diff_manifests(previous, manifest) == (["d.py"], ["b.py"], ["c.py"])
+
+
+def test_only_changed_files_are_analyzed(tmp_path):
+    """测试第二个版本只分析新增和修改的文件，汇总与全量计算一致"""
+    v1 = _write_version(tmp_path / "proj", "1.0", {
+        "same.py": "import os\n", "edit.py": "x = 1\n", "gone.py": "if x:\n    pass\n"})
+    v2 = _write_version(tmp_path / "proj", "2.0", {
+        "same.py": "import os\n", "edit.py": "x = 1  # 改了\n", "new.py": "from a import b\n"})
+
+    calls = []
+    state1 = process_version_incremental(v1, get_python_files(v1), None, _spy(calls))
+    state2 = process_version_incremental(v2, get_python_files(v2), state1, _spy(calls))
+    assert calls[1] == ["edit.py", "new.py"]
+    assert sorted(state2.files) == ["edit.py", "new.py", "same.py"]
+
+    full = process_all_projects(str(tmp_path))
+    assert [state1.metrics(), state2.metrics()] == [
+        {k: row[k] for k in state1.metrics()} for row in full]
+
+
+def test_state_survives_restart(tmp_path):
+    """测试保存的状态在下次运行时复用，未变化的版本不再分析任何文件"""
+    _write_version(tmp_path / "data" / "proj", "1.0", {"a.py": "import os\n", "b.py": "y = 2\n"})
+    state_dir = str(tmp_path / "state")
+    first = process_all_projects(str(tmp_path / "data"), state_dir=state_dir)
+    assert first == process_all_projects(str(tmp_path / "data"))
+
+    saved = VersionState.load(str(tmp_path / "state" / "proj" / "1.0.json"))
+    calls = []
+    version_dir = str(tmp_path / "data" / "proj" / "1.0")
+    state = process_version_incremental(version_dir, get_python_files(version_dir), saved, _spy(calls))
+    assert calls == [[]]
+    assert state.metrics() == saved.metrics()
+
+
+def test_state_from_other_analyzer_version_ignored(tmp_path):
+    """测试其他分析器版本写出的状态按没有状态处理"""
+    _write_version(tmp_path / "data" / "proj", "1.0", {"a.py": "import os\n"})
+    process_all_projects(str(tmp_path / "data"), state_dir=str(tmp_path / "state"))
+    path = tmp_path / "state" / "proj" / "1.0.json"
+    assert VersionState.load(str(path)) is not None
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    path.write_text(json.dumps(dict(data, analyzer_version="0.0.0")), encoding="utf-8")
+    assert VersionState.load(str(path)) is None
+    del data["analyzer_version"]
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert VersionState.load(str(path)) is None
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from analyzers.engine import analyze_source
+from analyzers.loc import calculate_loc
+from analyzers.loc_bytes import count_loc_bytes, count_loc_file
+from analyzers.registry import ParseContext, decode_source, run_analyzers
+
+CASES = [
+    b"",
+    b"\n",
+    b"print('hello')\n# comment\nx = 1  # inline\n\n",
+    b"a\r\n# x\r\r\n  b # c\n",
+    b"\t \x0c\x1c\n   # indented\n",
+    "# 中文注释\nx = '中文'  # 行内\n\u3000\n\xa0# nbsp\n".encode("utf-8"),
+    "\ufeff# bom\nx = 1\n".encode("utf-8"),
+    b"\xff# invalid utf-8\n\xc2\n",
+    b"x = 1\0\n#",
+]
+
+
+@pytest.mark.parametrize("data", CASES)
+def test_matches_calculate_loc(data):
+    """测试字节计数与解码后的 calculate_loc 完全一致"""
+    assert count_loc_bytes(data) == calculate_loc(decode_source(data))
+
+
+def test_random_bytes_match():
+    """测试随机组合空白、换行、注释符与各类非 ASCII 字节"""
+    alphabet = [b" ", b"\t", b"#", b"a", b"\n", b"\r", b"\r\n", b"\x0c", b"\x1f", b"\xc2\xa0",
+                b"\xe3\x80\x80", b"\xe4\xb8\xad", b"\xe2\x80\xa8", b"\xff", b"\xc2", b"\x85"]
+    rng = random.Random(0)
+    for _ in range(5000):
+        data = b"".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert count_loc_bytes(data) == calculate_loc(decode_source(data)), data
+
+
+def test_mmap_file(tmp_path):
+    """测试 mmap 映射文件（含空文件）"""
+    for index, data in enumerate(CASES):
+        path = tmp_path / f"{index}.py"
+        path.write_bytes(data)
+        assert count_loc_file(str(path)) == calculate_loc(decode_source(data))
+
+
+def test_pep263_cookie():
+    """测试遵循编码声明：只有含非 ASCII 字节时才按声明解码"""
+    data = "# -*- coding: latin-1 -*-\n\xa0# nbsp\n".encode("latin-1")
+    expected = calculate_loc(data.decode("latin-1"))
+    assert expected["comment_lines"] == 2
+    assert count_loc_bytes(data, pep263=True) == expected
+    assert count_loc_bytes(data) == calculate_loc(decode_source(data))
+
+
+def test_loc_only_analysis_skips_lines():
+    """测试字节源码只请求 LOC 时不切分逐行字符串"""
+    data = CASES[2]
+    ctx = ParseContext(data, ("loc", "complexity"))
+    result = run_analyzers(None, ("loc", "complexity"), context=ctx)
+    assert "lines" not in ctx.built
+    assert result == analyze_source(decode_source(data), ("loc", "complexity"))
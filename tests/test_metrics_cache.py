@@ -0,0 +1,81 @@
+import subprocess
+
+import analyzers.registry as registry
+from pipeline.batch_processor import analyze_file, process_all_projects
+from pipeline.metrics_cache import MetricsCache, content_key
+
+
+def test_content_key_matches_git_blob_sha(tmp_path):
+    """测试内容键与 git hash-object 的结果一致"""
+    file_path = tmp_path / "a.py"
+    file_path.write_bytes(b"print('hi')\n")
+    git_sha = subprocess.run(["git", "hash-object", str(file_path)],
+                             capture_output=True, text=True, check=True).stdout.strip()
+    assert content_key(file_path.read_bytes()) == git_sha
+
+
+def test_round_trip_and_failures(tmp_path):
+    """测试结果与失败结果都能写入并读回"""
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.put("k1", (3, 0.25, 2, 1, 1))
+        cache.put("k2", None, "source code string cannot contain null bytes")
+        cache.flush()
+        assert cache.get("k1") == ((3, 0.25, 2, 1, 1), None)
+        assert cache.get("k2") == (None, "source code string cannot contain null bytes")
+        assert cache.get("missing") is None
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_analyzer_version_is_part_of_key(tmp_path):
+    """测试分析器版本变化后旧条目不再命中"""
+    path = str(tmp_path / "cache.sqlite")
+    with MetricsCache(path, analyzer_version="1") as cache:
+        cache.put("k", (1, 0.0, 1, 0, 0))
+    with MetricsCache(path, analyzer_version="2") as cache:
+        assert cache.get("k") is None
+
+
+def test_eviction_keeps_recently_used(tmp_path):
+    """测试超出容量时淘汰最久未用的条目"""
+    with MetricsCache(str(tmp_path / "cache.sqlite"), max_entries=2) as cache:
+        cache.put("old", (1, 0.0, 1, 0, 0))
+        cache.put("hot", (2, 0.0, 1, 0, 0))
+        cache.flush()
+        cache.get("hot")
+        cache.flush()
+        cache.put("new", (3, 0.0, 1, 0, 0))
+        cache.flush()
+        assert len(cache) == 2
+        assert cache.get("old") is None
+        assert cache.get("hot") is not None
+
+
+def test_syntax_error_files_are_not_parsed_again(tmp_path, monkeypatch):
+    """测试语法错误文件命中缓存后不再调用 ast.parse"""
+    file_path = tmp_path / "broken.py"
+    file_path.write_text("def bad(:\n    pass\n", encoding="utf-8")
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        first = analyze_file(str(file_path), cache)
+        cache.flush()
+        key = content_key(file_path.read_bytes())
+        assert cache.get(key)[1].startswith("语法错误")
+
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("命中缓存时不应再次解析")
+
+        monkeypatch.setattr(registry.ast, "parse", fail_parse)
+        assert analyze_file(str(file_path), cache) == first
+
+
+def test_identical_files_analyzed_once_across_versions(tmp_path):
+    """测试跨版本相同内容的文件只分析一次，结果与不使用缓存一致"""
+    for version in ("1.0", "2.0", "3.0"):
+        version_dir = tmp_path / "data" / "proj" / version
+        version_dir.mkdir(parents=True)
+        (version_dir / "same.py").write_text("import os\nif os:\n    pass\n", encoding="utf-8")
+        (version_dir / "changed.py").write_text(f"x = '{version}'\n", encoding="utf-8")
+
+    expected = process_all_projects(str(tmp_path / "data"))
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert process_all_projects(str(tmp_path / "data"), cache=cache) == expected
+        assert (cache.hits, cache.misses) == (2, 4)
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from pipeline import metrics_store
+from pipeline.batch_processor import process_all_projects
+from pipeline.file_walker import FileManifest
+from pipeline.metrics_store import MetricsStore, analyze_details
+from tests.conftest import BROKEN_SOURCE, write_projects
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    """创建 1 个项目 × 2 个版本，2.0 中 b.py 复杂度上升并新增 c.py"""
+    sources = {
+        "1.0": {
+            "a.py": "import os\n# 注释\n",
+            "pkg/b.py": "import requests\nif x:\n    pass\n",
+            "broken.py": BROKEN_SOURCE,
+        },
+        "2.0": {
+            "a.py": "import os\n# 注释\n",
+            "pkg/b.py": "import requests\nif x:\n    for i in x:\n        while i:\n            pass\n",
+            "c.py": "x = 1  # TODO\n",
+        },
+    }
+    for version, files in sources.items():
+        write_projects(tmp_path / "data", ("proj",), (version,), files)
+    (tmp_path / "data" / "proj" / "2.0" / "nul.py").write_bytes(b"x = 1\0\n")
+    return tmp_path / "data"
+
+
+def test_analyze_details():
+    """测试完整明细包含各分析器的结果，列表以 JSON 保存"""
+    details, error = analyze_details(b"import os, requests\n# TODO\nif os:\n    pass\n")
+    assert error is None
+    assert details["cyclomatic_complexity"] == 2
+    assert details["todo_count"] == 1
+    assert json.loads(details["external_libs"]) == ["requests"]
+
+    details, error = analyze_details(b"x = 1\0\n")
+    assert error is not None
+
+
+def test_version_view_matches_csv_rows(project_root, tmp_path):
+    """测试 version_metrics 视图与 process_all_projects 的行一致"""
+    with MetricsStore(str(tmp_path / "store.sqlite")) as store:
+        rows = process_all_projects(str(project_root), store=store)
+        assert store.version_metrics() == rows
+        assert store.query("SELECT COUNT(*) FROM file_contents")[0][0] == 6
+
+
+def test_drill_down(project_root, tmp_path):
+    """测试逐文件下钻：找出复杂度上升的文件"""
+    with MetricsStore(str(tmp_path / "store.sqlite")) as store:
+        process_all_projects(str(project_root), store=store)
+        deltas = store.file_deltas("proj", "1.0", "2.0")
+        assert deltas[0] == ("pkg/b.py", 2, 4, 2)
+        assert ("broken.py", 1, 0, -1) in deltas
+        error = store.query("SELECT error FROM file_metrics WHERE path = 'broken.py'")[0][0]
+        assert error.startswith("语法错误")
+        with pytest.raises(ValueError):
+            store.file_deltas("proj", "1.0", "2.0", column="path; DROP TABLE version_files")
+
+
+def test_rerun_replaces_version_rows(project_root, tmp_path):
+    """测试重复运行替换版本记录，已有内容不再分析"""
+    path = str(tmp_path / "store.sqlite")
+    with MetricsStore(path) as store:
+        process_all_projects(str(project_root), store=store, manifest=FileManifest())
+    (project_root / "proj" / "2.0" / "c.py").unlink()
+    with MetricsStore(path) as store:
+        rows = process_all_projects(str(project_root), store=store)
+        assert store.version_metrics() == rows
+        assert store.query("SELECT COUNT(*) FROM version_files WHERE version = '2.0'")[0][0] == 3
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"readers": 2}, {"workers": 2}, {"workers": 2, "readers": 2},
+                                    {"workers": 2, "pool": "thread"}, {"state_dir": "state"}])
+def test_pipeline_pass_details_reused(project_root, tmp_path, monkeypatch, kwargs):
+    """测试指标库直接使用流水线分析时得到的明细，不再读取、分析一次；空版本也有一行"""
+    (project_root / "proj" / "3.0").mkdir()
+    if "state_dir" in kwargs:
+        kwargs = {"state_dir": str(tmp_path / kwargs["state_dir"])}
+    with MetricsStore(str(tmp_path / "expected.sqlite")) as store:
+        rows = process_all_projects(str(project_root), store=store)
+        expected = store.query("SELECT * FROM file_metrics ORDER BY version, path")
+
+    def fail(data):
+        raise AssertionError("record_version 不应再次分析文件")
+
+    monkeypatch.setattr(metrics_store, "analyze_details", fail)
+    with MetricsStore(str(tmp_path / "store.sqlite")) as store:
+        assert process_all_projects(str(project_root), store=store, **kwargs) == rows
+        assert store.query("SELECT * FROM file_metrics ORDER BY version, path") == expected
+        assert store.version_metrics() == rows
+        assert rows[-1]["version"] == "3.0" and rows[-1]["file_count"] == 0
+        assert store._pending == {}
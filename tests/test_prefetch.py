@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from pipeline import prefetch as prefetch_module
+from pipeline.batch_processor import process_all_projects, process_single_version
+from pipeline.file_walker import FileManifest
+from pipeline.metrics_cache import MetricsCache, content_key
+from pipeline.prefetch import prefetch
+
+
+@pytest.fixture
+def project_layout():
+    """各版本内容不同，含语法错误的文件"""
+    return {"broken": True, "suffix": True}
+
+
+def test_prefetch_preserves_order_and_reports_errors(tmp_path):
+    """测试预取按输入顺序产出，读取失败的文件带错误信息"""
+    paths = []
+    for index in range(20):
+        file_path = tmp_path / f"m{index}.py"
+        file_path.write_bytes(b"x = %d\n" % index)
+        paths.append(str(file_path))
+    paths.insert(5, str(tmp_path / "missing.py"))
+
+    items = list(prefetch(paths, [None] * len(paths), readers=3, depth=4))
+    assert [item.path for item in items] == paths
+    assert items[5].error is not None and items[5].data is None
+    assert items[6].data == b"x = 5\n"
+    assert items[6].key is None  # 不使用缓存时不计算内容键
+
+
+def test_prefetch_uses_cache(tmp_path):
+    """测试已知内容键命中缓存时不读取文件，读取后按内容键命中时不返回内容"""
+    known = tmp_path / "known.py"
+    known.write_bytes(b"a = 1\n")
+    fresh = tmp_path / "fresh.py"
+    fresh.write_bytes(b"b = 2\n")
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.put("stale-key", (1, 0.0, 1, 0, 0))
+        cache.put(content_key(b"b = 2\n"), (2, 0.0, 1, 0, 0))
+        known.unlink()  # 命中缓存时不会读取
+        items = list(prefetch([str(known), str(fresh)], ["stale-key", None], cache))
+    assert items[0].entry == ((1, 0.0, 1, 0, 0), None) and items[0].error is None
+    assert items[1].entry == ((2, 0.0, 1, 0, 0), None) and items[1].data is None
+    assert items[1].key == content_key(b"b = 2\n")
+
+
+def test_prefetch_bounded_in_flight(tmp_path, monkeypatch):
+    """测试同时在读取或等待取走的文件数不超过 depth"""
+    paths = []
+    for index in range(50):
+        file_path = tmp_path / f"m{index}.py"
+        file_path.write_bytes(b"pass\n")
+        paths.append(str(file_path))
+
+    lock = threading.Lock()
+    state = {"started": 0, "consumed": 0, "max_ahead": 0}
+    original_read = prefetch_module._read
+
+    def counting_read(file_path, need_key):
+        with lock:
+            state["started"] += 1
+            state["max_ahead"] = max(state["max_ahead"], state["started"] - state["consumed"])
+        return original_read(file_path, need_key)
+
+    monkeypatch.setattr(prefetch_module, "_read", counting_read)
+    for _ in prefetch(paths, [None] * len(paths), readers=4, depth=8):
+        with lock:
+            state["consumed"] += 1
+    assert state["started"] == 50
+    assert state["max_ahead"] <= 8
+
+
+def test_process_single_version_with_readers(project_root, capsys):
+    """测试预取模式的版本汇总与逐文件读取一致"""
+    version_dir = str(project_root / "alpha" / "1.0")
+    assert process_single_version(version_dir, readers=2) == process_single_version(version_dir)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_two_stage_matches_default(project_root, tmp_path, workers):
+    """测试两段式流水线（含缓存、清单）的结果与默认模式完全一致，缓存命中计数正确"""
+    expected = process_all_projects(str(project_root))
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        manifest = FileManifest(str(tmp_path / "manifest.json"))
+        first = process_all_projects(str(project_root), workers=workers, chunksize=2, cache=cache,
+                                     manifest=manifest, readers=2)
+        assert first == expected
+        assert cache.misses == 12 and cache.hits == 0
+        manifest.save()
+
+        # 再次运行：清单按 stat 给出内容键，全部命中缓存，不需要读取
+        manifest = FileManifest(str(tmp_path / "manifest.json"))
+        second = process_all_projects(str(project_root), workers=workers, chunksize=2, cache=cache,
+                                      manifest=manifest, readers=2)
+        assert second == expected
+        assert cache.hits == 12
@@ -0,0 +1,38 @@
+import os
+import pstats
+
+import pytest
+
+from pipeline.batch_processor import process_all_projects
+from pipeline.profiling import MERGED_FILE, enable_profiling, finish_profiling
+
+
+def _functions(stats):
+    return {(os.path.basename(path), name) for path, line, name in stats.stats}
+
+
+def test_finish_without_profiling():
+    """测试未启用剖析时不输出任何内容"""
+    assert finish_profiling() is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merged_profile(project_root, tmp_path, workers):
+    """测试合并主进程与工作进程的剖析结果，报告包含分析器函数"""
+    profile_dir = tmp_path / "profile"
+    enable_profiling(str(profile_dir))
+    rows = process_all_projects(str(project_root), workers=workers)
+    report_path = finish_profiling(top=15)
+    assert len(rows) == 4
+
+    workers_written = [name for name in os.listdir(profile_dir) if name.startswith("worker-")]
+    assert bool(workers_written) == (workers > 1)
+    merged = pstats.Stats(str(profile_dir / MERGED_FILE))
+    assert ("engine.py", "_scan_lines") in _functions(merged)
+    if workers > 1:
+        # 分析只在工作进程中执行，合并后仍能看到
+        main_only = pstats.Stats(str(profile_dir / "main.prof"))
+        assert ("engine.py", "_scan_lines") not in _functions(main_only)
+
+    report = open(report_path, encoding="utf-8").read()
+    assert "按自身耗时排序" in report and "analyzers 包内" in report and "_scan_lines" in report
@@ -0,0 +1,56 @@
+import io
+import json
+
+import pytest
+
+from pipeline.batch_processor import process_all_projects
+from pipeline.file_walker import FileManifest, get_project_versions
+from pipeline.progress import ProgressReporter
+
+
+def test_plan_and_track(project_root):
+    """测试按计划统计总量，逐文件计数，未逐文件计数的版本在结束时计满"""
+    manifest = FileManifest()
+    projects = get_project_versions(str(project_root))
+    progress = ProgressReporter(stream=io.StringIO())
+    progress.plan(projects, manifest, skip={("beta", "2.0")})
+    assert progress.files_total == 6
+    version_bytes = sum(manifest.size(path) for path in manifest.scan(projects["alpha"]["1.0"]))
+    assert progress.bytes_total == 3 * version_bytes
+
+    paths = manifest.scan(projects["alpha"]["1.0"])
+    progress.begin_version("alpha", "1.0", [manifest.size(path) for path in paths])
+    assert list(progress.track(["r1"])) == ["r1"]
+    assert progress.files_done == 1
+    snap = progress.snapshot()
+    assert snap["projects"]["alpha"]["files_done"] == 1
+    assert snap["projects"]["alpha"]["current_version"] == "1.0"
+    progress.end_version()
+    progress.begin_version("alpha", "2.0")
+    progress.end_version()
+    snap = progress.snapshot()
+    assert snap["files_done"] == 4 and snap["bytes_done"] == 2 * version_bytes
+    assert snap["projects"]["alpha"]["files_done"] == snap["projects"]["alpha"]["files_total"] == 4
+    assert snap["projects"]["beta"]["files_total"] == 2
+    assert snap["eta_seconds"] is not None and snap["worker_utilization"] is None
+
+
+@pytest.mark.parametrize("workers, pool", [(1, "process"), (2, "process"), (2, "thread")])
+def test_pipeline_progress(project_root, tmp_path, workers, pool):
+    """测试流水线运行时的周期快照（JSON Lines）与最终进度、工作进程（线程）利用率"""
+    snapshot_path = tmp_path / "out" / "progress.jsonl"
+    stream = io.StringIO()
+    with ProgressReporter(str(snapshot_path), interval=0.01, stream=stream) as progress:
+        rows = process_all_projects(str(project_root), workers=workers, progress=progress, pool=pool)
+    assert len(rows) == 4
+
+    snapshots = [json.loads(line) for line in snapshot_path.read_text(encoding="utf-8").splitlines()]
+    final = snapshots[-1]
+    assert final["files_done"] == final["files_total"] == 8
+    assert final["bytes_done"] == final["bytes_total"] > 0
+    assert final["eta_seconds"] == 0
+    assert all(project["files_done"] == 4 for project in final["projects"].values())
+    assert final["workers"] == workers
+    if workers > 1:
+        assert 0 < final["worker_utilization"] <= 1
+    assert "进度 100.0%" in stream.getvalue()
@@ -0,0 +1,85 @@
+import urllib.request
+
+import pytest
+
+from pipeline.batch_processor import process_all_projects
+from pipeline.metrics_cache import MetricsCache
+from pipeline.prometheus import Histogram, PipelineMetrics
+from pipeline.tracing import SpanEvent, disable_tracing, enable_tracing
+
+
+def _samples(text):
+    """解析文本格式中的样本行：'名称{标签}' -> 数值"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+@pytest.fixture
+def project_layout():
+    """各版本内容不同（缓存全部未命中），每个版本含一个语法错误的文件"""
+    return {"broken": True, "suffix": True}
+
+
+def test_histogram_buckets():
+    """测试直方图按 le 上界累计，含 +Inf、_sum 与 _count"""
+    histogram = Histogram("demo_seconds", "示例", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("read",))
+    samples = _samples("\n".join(histogram.render()))
+    assert samples['demo_seconds_bucket{stage="read",le="0.1"}'] == 2
+    assert samples['demo_seconds_bucket{stage="read",le="1"}'] == 3
+    assert samples['demo_seconds_bucket{stage="read",le="+Inf"}'] == 4
+    assert samples['demo_seconds_count{stage="read"}'] == 4
+    assert samples['demo_seconds_sum{stage="read"}'] == pytest.approx(3.65)
+
+
+def test_observe_events():
+    """测试按计时记录累加文件数、字节数、失败数与分析器耗时，标签值被转义"""
+    metrics = PipelineMetrics()
+    metrics.observe(SpanEvent("read", "stage", 0, 1000, 1000, 1, 1, {"bytes": 120}))
+    metrics.observe(SpanEvent("read", "stage", 0, 1000, 1000, 1, 1, {}, error="FileNotFoundError"))
+    metrics.observe(SpanEvent("ast.parse", "parse", 0, 2000, 2000, 1, 1, {}, error="SyntaxError"))
+    metrics.observe(SpanEvent("analyzer:loc", "analyzer", 0, 3000, 3000, 1, 1, {}))
+    metrics.observe(SpanEvent("version", "stage", 0, 3000, 3000, 1, 1, {"project": 'a"b'}))
+    samples = _samples(metrics.render())
+    assert samples["codequality_bytes_read_total"] == 120
+    assert samples["codequality_read_failures_total"] == 1
+    assert samples["codequality_parse_failures_total"] == 1
+    assert samples['codequality_analyzer_duration_seconds_count{analyzer="loc"}'] == 1
+    assert samples['codequality_versions_processed_total{project="a\\"b"}'] == 1
+    assert samples["codequality_files_processed_total"] == 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_metrics(project_root, tmp_path, workers):
+    """测试流水线运行后（含子进程）的指标、textfile 文件与本地 /metrics 服务"""
+    cache = MetricsCache(str(tmp_path / "cache.sqlite"))
+    textfile = tmp_path / "textfile" / "codequality.prom"
+    metrics = PipelineMetrics(cache).attach(enable_tracing(keep=False))
+    try:
+        metrics.start(str(textfile), port=0, interval=60)
+        process_all_projects(str(project_root), workers=workers, cache=cache)
+        port = metrics._server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            served = _samples(response.read().decode("utf-8"))
+    finally:
+        metrics.close()
+        tracer = disable_tracing()
+        cache.close()
+    assert tracer.events == []  # keep=False 时不保留逐条记录
+
+    samples = _samples(textfile.read_text(encoding="utf-8"))
+    sizes = sum(path.stat().st_size for path in project_root.rglob("*.py"))
+    assert samples["codequality_files_processed_total"] == 12
+    assert samples["codequality_bytes_read_total"] == sizes
+    assert samples["codequality_parse_failures_total"] == 4
+    assert samples['codequality_versions_processed_total{project="alpha"}'] == 2
+    for analyzer in ("loc", "complexity", "dependency"):
+        assert samples[f'codequality_analyzer_duration_seconds_count{{analyzer="{analyzer}"}}'] == 12
+    assert samples["codequality_cache_misses_total"] == 12
+    assert served["codequality_files_processed_total"] == 12
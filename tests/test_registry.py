@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from analyzers import ParseContext, calculate_comment_rate, register_analyzer, run_analyzers
+from analyzers.engine import ALL_SECTIONS, analyze_source
+from analyzers.registry import registered_analyzers, required_representations, unregister_analyzer
+
+SAMPLE_CODE = "import os\n# TODO: 注释\nif os:\n    pass\n"
+
+
+@pytest.fixture
+def plugin():
+    """注册一个需要 tokens 的第三方分析器，测试结束后注销"""
+    @register_analyzer('name_tokens', requires=('tokens',))
+    def name_tokens(ctx):
+        return sum(1 for token in ctx.tokens if token.type == 1)
+
+    yield 'name_tokens'
+    unregister_analyzer('name_tokens')
+
+
+def test_builtins_registered():
+    """测试内置指标分组都已注册"""
+    assert set(ALL_SECTIONS) | {'comment_rate'} <= set(registered_analyzers())
+    assert required_representations(ALL_SECTIONS) == ('lines', 'ast')
+
+
+def test_each_representation_built_once(plugin):
+    """测试多个分析器共享同一个上下文：每种表示只构建一次"""
+    ctx = ParseContext(SAMPLE_CODE.encode('utf-8'), ALL_SECTIONS + (plugin,))
+    result = run_analyzers(None, ALL_SECTIONS + (plugin,), context=ctx)
+    assert sorted(ctx.built) == ['ast', 'lines', 'text', 'tokens']
+    assert result[plugin] == 5
+    assert {name: result[name] for name in ALL_SECTIONS} == analyze_source(SAMPLE_CODE)
+
+
+def test_representations_built_lazily():
+    """测试只构建请求的分析器需要的表示"""
+    ctx = ParseContext(SAMPLE_CODE, ('loc',))
+    run_analyzers(None, ('loc',), context=ctx)
+    assert ctx.built == ['lines']
+
+
+def test_comment_rate_reuses_loc():
+    """测试注释率复用同一上下文上的 LOC 结果"""
+    ctx = ParseContext(SAMPLE_CODE, ('loc', 'comment_rate'))
+    result = run_analyzers(None, ('loc', 'comment_rate'), context=ctx)
+    assert result['comment_rate'] == calculate_comment_rate(SAMPLE_CODE) == 0.2
+    assert ctx.built == ['lines']
+
+
+def test_syntax_error_recorded_once():
+    """测试语法错误记录在上下文中，复杂度结果照常返回"""
+    ctx = ParseContext("def bad(:\n    pass\n")
+    assert ctx.tree is None and ctx.tree is None
+    assert isinstance(ctx.errors['ast'], SyntaxError)
+    assert ctx.result('complexity')['error'].startswith('语法错误')
+
+
+def test_register_validation():
+    """测试重复注册与未知表示会报错"""
+    with pytest.raises(ValueError):
+        register_analyzer('loc')(lambda ctx: None)
+    with pytest.raises(ValueError):
+        register_analyzer('x', requires=('bytecode',))
+    with pytest.raises(KeyError):
+        run_analyzers(SAMPLE_CODE, ('missing',))
+
+
+def test_concurrent_analysis_and_registration():
+    """测试多个线程同时分析、注册与注销分析器时结果一致且不出错"""
+    sources = [SAMPLE_CODE * (index % 5 + 1) for index in range(200)]
+    expected = [analyze_source(source, ALL_SECTIONS) for source in sources]
+
+    def churn(index):
+        name = f'churn_{index}'
+        register_analyzer(name, requires=('lines',))(lambda ctx: len(ctx.lines))
+        unregister_analyzer(name)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        churned = [executor.submit(churn, index) for index in range(50)]
+        results = list(executor.map(analyze_source, sources, [ALL_SECTIONS] * len(sources)))
+        for future in churned:
+            future.result()
+    assert results == expected
+    assert not any(name.startswith('churn_') for name in registered_analyzers())
@@ -0,0 +1,63 @@
+from pipeline.batch_processor import process_all_projects
+from pipeline.scheduler import MIN_BATCH_BYTES, WorkerLoad, batch_target, in_order, plan_batches
+
+
+def test_plan_batches_largest_first():
+    """测试大文件单独成块并最先提交，小文件按字节数打包"""
+    kb = 1024
+    sizes = [1 * kb, 5000 * kb, 2 * kb, 3 * kb, 400 * kb, 1 * kb]
+    batches = plan_batches(sizes, workers=2)
+    target = batch_target(sum(sizes), 2)
+    assert batches[0] == [1] and batches[1] == [4]  # 不小于目标字节数的文件单独成块
+    assert sorted(index for batch in batches for index in batch) == list(range(len(sizes)))
+    for batch in batches[2:]:
+        assert sum(sizes[index] for index in batch) < target + max(sizes[index] for index in batch)
+    # 小文件从大到小，大小相同时保持遍历顺序
+    assert [index for batch in batches[2:] for index in batch] == [3, 2, 0, 5]
+
+
+def test_plan_batches_limits_and_offset():
+    """测试每块文件数上限、下标偏移与未知大小"""
+    batches = plan_batches([10, -1, 10, 10, 10], workers=4, max_files=2, offset=100)
+    assert batches == [[100, 102], [103, 104], [101]]
+    assert batch_target(0, 4) == MIN_BATCH_BYTES
+    assert plan_batches([], workers=4) == []
+
+
+def test_in_order_buffers_out_of_order_results():
+    """测试乱序到达的结果按下标顺序产出"""
+    assert list(in_order([(2, "c"), (0, "a"), (1, "b"), (4, "e"), (3, "d")])) == ["a", "b", "c", "d", "e"]
+    assert list(in_order([(6, "y"), (5, "x")], start=5)) == ["x", "y"]
+
+
+def test_worker_load_summary():
+    """测试负载统计：最忙 / 平均忙碌时间与并行效率"""
+    load = WorkerLoad()
+    load.add(1, 3.0, 10, 1000)
+    load.add(2, 1.0, 5, 500)
+    load.add(1, 1.0, 5, 500)
+    summary = load.summary()
+    assert summary["workers"] == 2 and summary["batches"] == 3 and summary["files"] == 20
+    assert summary["busy_seconds"] == {1: 4.0, 2: 1.0}
+    assert summary["imbalance"] == 1.6
+    assert summary["efficiency"] == 0.625
+    assert summary["longest_batch_seconds"] == 3.0
+    assert "2 个进程" in load.format()
+    assert WorkerLoad().summary()["imbalance"] is None
+
+
+def test_scheduled_parallel_matches_serial(tmp_path, capsys):
+    """测试按大小调度的并行结果与串行完全一致，并输出负载报告"""
+    for version in ("1.0", "2.0"):
+        version_dir = tmp_path / "alpha" / version
+        (version_dir / "pkg").mkdir(parents=True)
+        for index in range(6):
+            (version_dir / "pkg" / f"m{index}.py").write_text(f"import os\nx = {index}\n", encoding="utf-8")
+        # 遍历顺序中最后一个文件最大
+        (version_dir / "zz_big.py").write_text("def f(a):\n    if a:\n        return 1\n" * 2000, encoding="utf-8")
+
+    serial = process_all_projects(str(tmp_path))
+    capsys.readouterr()
+    for readers in (0, 2):
+        assert process_all_projects(str(tmp_path), workers=2, chunksize=3, readers=readers) == serial
+        assert "工作进程负载：" in capsys.readouterr().out
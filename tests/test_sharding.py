@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pipeline.csv_exporter import StreamingExporter
+from pipeline.file_walker import FileManifest, get_project_versions
+from pipeline.metrics_store import MetricsStore
+from pipeline.sharding import (ShardSpec, assign_shards, merge_shards, parse_shard, plan_shards, shard_path,
+                               write_plan)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    """创建 3 个项目、各版本大小不同的临时目录结构（含语法错误的文件）"""
+    for project, versions in (("alpha", 3), ("beta", 2), ("gamma", 1)):
+        for index in range(versions):
+            version_dir = tmp_path / "data" / project / f"{index + 1}.0"
+            (version_dir / "pkg").mkdir(parents=True)
+            (version_dir / "a.py").write_text("import os\n# 注释\nx = 1  # 行内\n" * (index + 1),
+                                              encoding="utf-8")
+            (version_dir / "pkg" / "b.py").write_text(
+                "from sys import path\nif path:\n    for p in path:\n        print(p)\n" * (3 - index),
+                encoding="utf-8")
+            (version_dir / "pkg" / "broken.py").write_text("def bad(:\n    pass\n", encoding="utf-8")
+    return tmp_path / "data"
+
+
+def test_parse_shard():
+    """测试分片参数的解析与校验"""
+    assert parse_shard("2/4") == ShardSpec(2, 4)
+    assert shard_path("./output/project_metrics.csv", ShardSpec(2, 4)) == \
+        "./output/project_metrics.shard-2-of-4.csv"
+    for text in ("0/4", "5/4", "1/0", "4", "a/b", "1/2/3"):
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+def test_assign_shards_deterministic_and_balanced():
+    """测试分配与输入顺序无关，且按字节数大致均衡"""
+    sizes = {("p", f"v{index}"): size for index, size in enumerate([900, 500, 400, 300, 300, 200, 100, 100])}
+    assignment = assign_shards(sizes, 3)
+    assert assignment == assign_shards(dict(reversed(list(sizes.items()))), 3)
+    loads = [sum(size for unit, size in sizes.items() if assignment[unit] == index) for index in (1, 2, 3)]
+    assert sorted(loads) == [900, 900, 1000]
+    assert assign_shards(sizes, 1) == {unit: 1 for unit in sizes}
+
+
+def test_plan_covers_every_version(project_root, tmp_path):
+    """测试分片计划按处理顺序覆盖所有版本，每个版本恰好属于一个分片"""
+    projects = get_project_versions(str(project_root))
+    plan = plan_shards(projects, FileManifest(), 2)
+    assert [(project, version) for project, version, _, _ in plan["units"]] == \
+        [(project, version) for project, versions in projects.items() for version in versions]
+    assert {index for _, _, _, index in plan["units"]} == {1, 2}
+    assert all(size > 0 for _, _, size, _ in plan["units"])
+
+
+def test_merge_rejects_incomplete_shards(project_root, tmp_path):
+    """测试有分片缺少其负责的版本时合并报错，不写出结果"""
+    output_path = str(tmp_path / "out" / "metrics.csv")
+    plan = plan_shards(get_project_versions(str(project_root)), FileManifest(), 2)
+    for index in (1, 2):
+        shard = ShardSpec(index, 2)
+        write_plan(shard_path(output_path, shard), plan, shard)
+        StreamingExporter(shard_path(output_path, shard)).close()  # 只有表头
+    with pytest.raises(ValueError, match="缺少"):
+        merge_shards(output_path, 2)
+    assert not os.path.exists(output_path)
+
+    with pytest.raises(FileNotFoundError):
+        merge_shards(output_path, 3)
+
+
+def _run_main(cwd, *args):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    return subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "main.py"), *args], cwd=cwd, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def _wait(process):
+    output, _ = process.communicate(timeout=300)
+    assert process.returncode == 0, output
+    return output
+
+
+def test_sharded_run_matches_single_host(project_root, tmp_path):
+    """测试两个分片作为独立进程并行运行后合并，输出与单机运行逐字节相同"""
+    single = tmp_path / "single"
+    sharded = tmp_path / "sharded"
+    for work_dir in (single, sharded):
+        work_dir.mkdir()
+        os.symlink(project_root, work_dir / "data")
+
+    _wait(_run_main(str(single)))
+    shards = [_run_main(str(sharded), "--shard", f"{index}/2") for index in (1, 2)]
+    outputs = [_wait(process) for process in shards]
+    assert all("（本分片）" in output for output in outputs)
+    _wait(_run_main(str(sharded), "--merge-shards", "2"))
+
+    expected = (single / "output" / "project_metrics.csv").read_bytes()
+    assert (sharded / "output" / "project_metrics.csv").read_bytes() == expected
+    assert expected.count(b"\r\n") == 7  # 表头 + 6 个版本
+    assert not (sharded / "output" / "project_metrics.csv.checkpoint.jsonl").exists()
+    for index in (1, 2):
+        shard_rows = (sharded / "output" / f"project_metrics.shard-{index}-of-2.csv").read_bytes()
+        assert 1 < shard_rows.count(b"\r\n") < 7
+
+
+def test_store_merge_from(project_root, tmp_path):
+    """测试合并分片指标库后与单库记录所有版本的结果相同"""
+    projects = get_project_versions(str(project_root))
+    units = [(project, version, version_dir) for project, versions in projects.items()
+             for version, version_dir in versions.items()]
+
+    def record(store, selected):
+        for project, version, version_dir in selected:
+            manifest = FileManifest()
+            store.record_version(project, version, version_dir, manifest.scan(version_dir))
+
+    with MetricsStore(str(tmp_path / "single.sqlite")) as store:
+        record(store, units)
+        expected = store.query("SELECT * FROM file_metrics ORDER BY project_name, version, path")
+    with MetricsStore(str(tmp_path / "s1.sqlite")) as store:
+        record(store, units[::2])
+    with MetricsStore(str(tmp_path / "s2.sqlite")) as store:
+        record(store, units[1::2])
+    with MetricsStore(str(tmp_path / "merged.sqlite")) as store:
+        record(store, units[:1])
+        store.merge_from(str(tmp_path / "s1.sqlite"))
+        store.merge_from(str(tmp_path / "s2.sqlite"))
+        store.merge_from(str(tmp_path / "s2.sqlite"))  # 重复合并不产生重复行
+        assert store.query("SELECT * FROM file_metrics ORDER BY project_name, version, path") == expected
+        with pytest.raises(FileNotFoundError):
+            store.merge_from(str(tmp_path / "missing.sqlite"))
@@ -0,0 +1,73 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from pipeline import batch_processor
+from pipeline.batch_processor import process_all_projects, summarize_file_metrics
+from pipeline.metrics_cache import MetricsCache
+from pipeline.shared_results import SharedResults, summarize_rows, write_records
+
+
+def _random_records(count, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            records.append(None)
+        else:
+            records.append((rng.randint(0, 5000), round(rng.random(), 3), rng.randint(1, 80),
+                            rng.randint(0, 40), rng.randint(0, 30)))
+    return records
+
+
+def test_summarize_matches_tuples():
+    """测试向量化汇总与逐个累加的结果逐位一致（含失败的文件与空版本）"""
+    records = _random_records(2000)
+    with SharedResults(len(records)) as shared:
+        for index, record in enumerate(records):
+            shared.set(index, record)
+        assert shared.summarize(0, len(records)) == summarize_file_metrics(records)
+        assert shared.summarize(100, 137) == summarize_file_metrics(records[100:137])
+        assert shared.summarize(5, 5) == summarize_file_metrics([])
+        assert [shared.record(index) for index in range(len(records))] == records
+    with SharedResults(0) as empty:
+        assert summarize_rows(empty.array) == summarize_file_metrics([])
+
+
+def test_workers_write_in_place():
+    """测试工作进程按句柄把结果写入各自的行，主进程直接读到"""
+    records = _random_records(64, seed=1)
+    with SharedResults(len(records)) as shared:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(write_records, shared.handle, list(range(start, start + 16)),
+                                       records[start:start + 16])
+                       for start in range(0, len(records), 16)]
+            for future in futures:
+                future.result()
+        assert [shared.record(index) for index in range(len(records))] == records
+
+
+@pytest.mark.parametrize("readers", [0, 2])
+@pytest.mark.parametrize("pool", ["process", "thread"])
+def test_parallel_results_unchanged(tmp_path, monkeypatch, readers, pool):
+    """测试使用共享缓冲区的并行结果与串行、与不使用缓冲区时相同（含缓存写入与命中）"""
+    sources = ["import os\n# 注释\nx = 1  # 行内\n", "def bad(:\n    pass\n", "",
+               "from sys import path\nif path:\n    for p in path:\n        print(p)\n"]
+    for project in ("alpha", "beta"):
+        for version in ("1.0", "2.0"):
+            for index, content in enumerate(sources * 3):
+                file_path = tmp_path / "data" / project / version / f"m{index}.py"
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_text(content * (index + 1) + f"# {version}\n" * index, encoding="utf-8")
+    root = str(tmp_path / "data")
+
+    expected = process_all_projects(root)
+    with MetricsCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert process_all_projects(root, workers=2, cache=cache, readers=readers, pool=pool) == expected
+        assert cache.misses > 0
+        assert process_all_projects(root, workers=2, cache=cache, readers=readers, pool=pool) == expected
+    monkeypatch.setattr(batch_processor, "numpy_available", lambda: False)
+    assert process_all_projects(root, workers=2, readers=readers, pool=pool) == expected
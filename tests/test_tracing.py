@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from analyzers import registry
+from pipeline.batch_processor import process_all_projects
+from pipeline.csv_exporter import StreamingExporter
+from pipeline.tracing import (
+    disable_tracing, enable_tracing, format_summary, group_totals, span, stage_summary, top_allocating,
+    write_chrome_trace
+)
+
+
+@pytest.fixture
+def tracer():
+    tracer = enable_tracing()
+    yield tracer
+    disable_tracing()
+
+
+def test_disabled_is_noop():
+    """测试未启用时 span 不记录任何内容，也不设置分析器计时钩子"""
+    assert disable_tracing() is None
+    with span("read", file="x.py"):
+        pass
+    assert registry._span_factory is None
+
+
+def test_nested_spans_self_time(tracer):
+    """测试嵌套 span 继承归属信息，自身耗时扣除子 span"""
+    with span("version", project="p", version="1.0"):
+        with span("file", file="a.py"):
+            with span("read"):
+                pass
+    read, file_event, version = tracer.events
+    assert read.context == {"project": "p", "version": "1.0", "file": "a.py"}
+    assert file_event.self_ns == file_event.dur_ns - read.dur_ns
+    assert version.self_ns == version.dur_ns - file_event.dur_ns
+
+
+@pytest.mark.parametrize("kwargs", [{"workers": 1}, {"workers": 2}, {"workers": 2, "pool": "thread"}])
+def test_pipeline_spans(project_root, tmp_path, tracer, kwargs):
+    """测试串行 / 进程池 / 线程池流水线的各阶段都有记录，并能按项目、版本、文件汇总"""
+    with StreamingExporter(str(tmp_path / "out.csv"), resume=False) as exporter:
+        exporter.write_rows(process_all_projects(str(project_root), **kwargs))
+    events = disable_tracing().events
+    files = [event for event in events if event.name == "file"]
+    assert all({"project", "version"} <= event.context.keys() for event in files)
+    assert {(event.context["project"], event.context["version"]) for event in files} == \
+        {(project, version) for project in ("alpha", "beta") for version in ("1.0", "2.0")}
+
+    stages = {row["stage"]: row["count"] for row in stage_summary(events)}
+    assert stages["file"] == 8 and stages["read"] == 8 and stages["ast.parse"] == 8
+    assert stages["version"] == 4 and stages["export"] == 4
+    assert stages["analyzer:dependency"] == 8 and stages["walk"] == 4
+
+    by_project = group_totals(events, "project")
+    assert sorted(by_project) == ["alpha", "beta"]
+    assert "analyzer:complexity" in by_project["alpha"]
+    assert ("beta", "2.0") in group_totals(events, "version")
+    assert len(group_totals(events, "file")) == 8
+
+    summary = format_summary(events, limit=3)
+    assert "最慢的 3 个文件" in summary and "alpha" in summary
+
+    write_chrome_trace(events, str(tmp_path / "trace.json"))
+    trace = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))
+    assert len(trace["traceEvents"]) == len(events)
+    assert {event["ph"] for event in trace["traceEvents"]} == {"X"}
+
+
+def test_memory_peaks_propagate():
+    """测试内存统计：子 span 的峰值计入外层，释放后的净分配接近 0"""
+    enable_tracing(memory=True)
+    try:
+        with span("version"):
+            with span("file"):
+                data = bytearray(5_000_000)
+                del data
+            kept = bytearray(1_000_000)
+    finally:
+        tracer = disable_tracing()
+    file_event, version = tracer.events
+    assert file_event.peak_bytes >= 5_000_000 and file_event.alloc_bytes < 100_000
+    assert version.peak_bytes >= file_event.peak_bytes
+    assert version.alloc_bytes >= 1_000_000
+    assert tracer.peak_bytes >= 5_000_000
+    assert len(kept) == 1_000_000
+    assert stage_summary(tracer.events)[0]["peak_bytes"] is not None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_top_allocating_files(project_root, workers):
+    """测试逐文件峰值内存（含子进程），巨型生成模块排在最前并被标记"""
+    big = project_root / "alpha" / "2.0" / "generated.py"
+    big.write_text("".join(f"def f{i}(x):\n    return [x + {i} for _ in range(3)]\n" for i in range(3000)),
+                   encoding="utf-8")
+    enable_tracing(memory=True)
+    process_all_projects(str(project_root), workers=workers)
+    tracer = disable_tracing()
+
+    top = top_allocating(tracer.events, limit=3)
+    assert top[0].context["file"] == str(big)
+    assert top[0].context["project"] == "alpha" and top[0].context["version"] == "2.0"
+    summary = format_summary(tracer.events, limit=3, peak_bytes=tracer.peak_bytes)
+    assert "峰值内存最高的 3 个文件" in summary and "[异常]" in summary and "峰值(MB)" in summary
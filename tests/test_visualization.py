@@ -94,4 +94,24 @@ class TestVisualization:
         
         assert os.path.exists(output_path), "热力图未成功生成"
         assert output_path.endswith(".png"), "热力图格式不是PNG"
-        assert os.path.getsize(output_path) > 0, "热力图文件为空，生成失败"
\ No newline at end of file
+        assert os.path.getsize(output_path) > 0, "热力图文件为空，生成失败"
+
+    # 测试列式数据：中文列的 Parquet 正常绘图，流水线导出的英文列给出缺列提示（而不是读取失败）
+    def test_columnar_required_columns(self, sample_data_paths, test_output_dir, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pandas as pd
+        from pipeline.columnar_exporter import export_to_columnar
+
+        parquet_path = str(tmp_path / "trend.parquet")
+        pd.read_csv(sample_data_paths["trend"]).to_parquet(parquet_path)
+        assert os.path.getsize(plot_project_trend(csv_path=parquet_path, output_dir=test_output_dir)) > 0
+
+        rows = [{"project_name": "alpha", "version": "1.0", "file_count": 1, "loc": 10, "comment_rate": 0.1,
+                 "avg_complexity": 1.0, "total_imports": 1, "avg_import_count": 1.0}]
+        export_to_columnar(rows, str(tmp_path / "columnar"))
+        with pytest.raises(ValueError, match="缺少必要列"):
+            plot_project_trend(csv_path=str(tmp_path / "columnar"), output_dir=test_output_dir)
+        with pytest.raises(ValueError, match="缺少必要列"):
+            plot_project_comparison(csv_path=str(tmp_path / "columnar"), output_dir=test_output_dir)
+        with pytest.raises(ValueError, match="读取数据文件失败"):
+            plot_project_trend(csv_path=str(tmp_path / "missing.csv"), output_dir=test_output_dir)
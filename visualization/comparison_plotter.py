@@ -2,10 +2,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+from .data_loader import load_metrics, metrics_columns
+
 def plot_project_comparison(csv_path, metric_col="注释率", output_dir="output", figsize=(10, 6)):
     """
     绘制多个项目同一指标的分组柱状图
-    :param csv_path: CSV数据文件路径（列：项目、版本、指标列）
+    :param csv_path: 数据文件路径（CSV 或 Parquet / Arrow 列式导出）（列：项目、版本、指标列）
     :param metric_col: 要对比的指标列名（默认：注释率）
     :param output_dir: 图表输出目录
     :param figsize: 图表尺寸
@@ -14,16 +16,20 @@ def plot_project_comparison(csv_path, metric_col="注释率", output_dir="output
     # 1. 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
     
-    # 2. 读取CSV数据
+    # 2. 数据校验（读取前按 CSV 表头 / 列式数据的 schema 检查必要列）
+    required_columns = ["项目", "版本", metric_col]
     try:
-        df = pd.read_csv(csv_path)
+        columns = metrics_columns(csv_path)
     except Exception as e:
-        raise ValueError(f"读取CSV文件失败：{str(e)}")
+        raise ValueError(f"读取数据文件失败：{str(e)}")
+    if not all(col in columns for col in required_columns):
+        raise ValueError(f"数据文件缺少必要列，要求：{required_columns}，实际列：{columns}")
     
-    # 3. 数据校验
-    required_columns = ["项目", "版本", metric_col]
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"CSV文件缺少必要列，要求：{required_columns}")
+    # 3. 读取数据（只读取需要的列）
+    try:
+        df = load_metrics(csv_path, columns=required_columns)
+    except Exception as e:
+        raise ValueError(f"读取数据文件失败：{str(e)}")
     
     # 4. 设置matplotlib中文支持
     plt.rcParams["font.sans-serif"] = ["SimHei"]
@@ -4,10 +4,12 @@ import numpy as np
 from scipy import stats
 import os
 
+from .data_loader import load_metrics, metrics_columns
+
 def plot_metric_correlation(csv_path, x_col="代码行数", y_col="圈复杂度", output_dir="output", figsize=(10, 6)):
     """
     绘制两个指标的散点图+趋势线，分析关联关系
-    :param csv_path: CSV数据文件路径（包含两个指标列）
+    :param csv_path: 数据文件路径（CSV 或 Parquet / Arrow 列式导出）（包含两个指标列）
     :param x_col: X轴指标列名
     :param y_col: Y轴指标列名
     :param output_dir: 图表输出目录
@@ -17,16 +19,20 @@ def plot_metric_correlation(csv_path, x_col="代码行数", y_col="圈复杂度"
     # 1. 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
     
-    # 2. 读取CSV数据
+    # 2. 数据校验（读取前按 CSV 表头 / 列式数据的 schema 检查必要列）
+    required_columns = [x_col, y_col]
     try:
-        df = pd.read_csv(csv_path)
+        columns = metrics_columns(csv_path)
     except Exception as e:
-        raise ValueError(f"读取CSV文件失败：{str(e)}")
+        raise ValueError(f"读取数据文件失败：{str(e)}")
+    if not all(col in columns for col in required_columns):
+        raise ValueError(f"数据文件缺少必要列，要求：{required_columns}，实际列：{columns}")
     
-    # 3. 数据校验
-    required_columns = [x_col, y_col]
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"CSV文件缺少必要列，要求：{required_columns}")
+    # 3. 读取数据（只读取需要的列）
+    try:
+        df = load_metrics(csv_path, columns=required_columns)
+    except Exception as e:
+        raise ValueError(f"读取数据文件失败：{str(e)}")
     
     # 4. 去除缺失值（避免计算错误）
     df = df.dropna(subset=[x_col, y_col])
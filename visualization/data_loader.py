@@ -0,0 +1,47 @@
+import pandas as pd
+
+from pipeline.columnar_exporter import COLUMNAR_FORMATS, PARTITION_COLUMN, detect_format
+from pipeline.tracing import span
+
+
+def load_metrics(path, columns=None):
+    """
+    读取指标数据：CSV 用 pd.read_csv，Parquet / Arrow IPC（文件或按项目分区的目录）用 pyarrow.dataset
+    :param path: CSV 文件、列式文件或列式导出目录
+    :param columns: 只读取这些列（列投影）；数据中不存在的列直接忽略，交由调用方校验
+    :return: DataFrame
+    """
+    with span("load_metrics", path=str(path)):
+        return _load(path, columns)
+
+
+def metrics_columns(path):
+    """
+    数据中的全部列名：CSV 只读表头，列式数据只读 schema（含分区列）
+    供调用方在按列读取之前校验必要列，缺列时给出明确的提示
+    """
+    fmt = detect_format(path)
+    if fmt is None:
+        return list(pd.read_csv(path, nrows=0).columns)
+    return list(_dataset(path, fmt).schema.names)
+
+
+def _dataset(path, fmt):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+    return ds.dataset(path, format=COLUMNAR_FORMATS[fmt], partitioning=partitioning)
+
+
+def _load(path, columns):
+    fmt = detect_format(path)
+    if fmt is None:
+        if columns is None:
+            return pd.read_csv(path)
+        wanted = set(columns)
+        return pd.read_csv(path, usecols=lambda name: name in wanted)
+
+    dataset = _dataset(path, fmt)
+    if columns is not None:
+        columns = [name for name in columns if name in dataset.schema.names]
+    return dataset.to_table(columns=columns).to_pandas()
@@ -3,10 +3,12 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from .data_loader import load_metrics
+
 def plot_metric_heatmap(csv_path, output_dir="output", figsize=(12, 8)):
     """
     绘制多版本多模块的热力图，展示数据分布
-    :param csv_path: CSV数据文件路径（列：版本、模块1、模块2...）
+    :param csv_path: 数据文件路径（CSV 或 Parquet / Arrow 列式导出）（列：版本、模块1、模块2...）
     :param output_dir: 图表输出目录
     :param figsize: 图表尺寸
     :return: 生成的图表文件路径
@@ -14,11 +16,11 @@ def plot_metric_heatmap(csv_path, output_dir="output", figsize=(12, 8)):
     # 1. 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
     
-    # 2. 读取CSV数据
+    # 2. 读取数据
     try:
-        df = pd.read_csv(csv_path)
+        df = load_metrics(csv_path)
     except Exception as e:
-        raise ValueError(f"读取CSV文件失败：{str(e)}")
+        raise ValueError(f"读取数据文件失败：{str(e)}")
     
     # 3. 数据处理（版本作为索引，模块作为列）
     version_col = "版本"
@@ -2,10 +2,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+from .data_loader import load_metrics, metrics_columns
+
 def plot_project_trend(csv_path, output_dir="output", figsize=(10, 6)):
     """
     绘制单个项目各版本指标变化折线图
-    :param csv_path: CSV数据文件路径（列：项目、版本、指标值）
+    :param csv_path: 数据文件路径（CSV 或 Parquet / Arrow 列式导出）（列：项目、版本、指标值）
     :param output_dir: 图表输出目录
     :param figsize: 图表尺寸
     :return: 生成的图表文件路径
@@ -13,16 +15,20 @@ def plot_project_trend(csv_path, output_dir="output", figsize=(10, 6)):
     # 1. 创建输出目录（如果不存在）
     os.makedirs(output_dir, exist_ok=True)
     
-    # 2. 读取CSV数据
+    # 2. 数据校验（读取前按 CSV 表头 / 列式数据的 schema 检查必要列）
+    required_columns = ["项目", "版本", "指标值"]
     try:
-        df = pd.read_csv(csv_path)
+        columns = metrics_columns(csv_path)
     except Exception as e:
-        raise ValueError(f"读取CSV文件失败：{str(e)}")
+        raise ValueError(f"读取数据文件失败：{str(e)}")
+    if not all(col in columns for col in required_columns):
+        raise ValueError(f"数据文件缺少必要列，要求：{required_columns}，实际列：{columns}")
     
-    # 3. 数据校验（确保列名正确）
-    required_columns = ["项目", "版本", "指标值"]
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"CSV文件缺少必要列，要求：{required_columns}")
+    # 3. 读取数据（只读取需要的列）
+    try:
+        df = load_metrics(csv_path, columns=required_columns)
+    except Exception as e:
+        raise ValueError(f"读取数据文件失败：{str(e)}")
     
     # 4. 获取项目名称（单个项目）
     project_name = df["项目"].unique()[0]